@@ -1,9 +1,17 @@
 """
 Điểm khởi chạy chính cho ứng dụng TifTiff
+
+    python app.py                  # chạy ứng dụng
+    python app.py --startup-check  # in báo cáo thời gian khởi động (JSON) rồi thoát,
+                                   # mã thoát 1 nếu vượt ngân sách
 """
 
+import time
+STARTED = time.perf_counter()
+
 import os
 import sys
+import json
 from tkinterdnd2 import TkinterDnD
 import ttkbootstrap as ttk
 
@@ -14,26 +22,49 @@ if current_dir not in sys.path:
 
 # Sử dụng imports phù hợp với cấu trúc thư mục hiện tại
 from ui.main_window import MainWindow
-from resources.constants import resource_path
+from resources.constants import resource_path, ICONS
+from utils.startup import StartupTimer
 
 def main():
     """Hàm chính để khởi chạy ứng dụng"""
+    startup_check = "--startup-check" in sys.argv[1:]
+    timer = StartupTimer(STARTED)
+    timer.mark("imports")
+
     # Tạo cửa sổ chính với hỗ trợ kéo thả
     root = TkinterDnD.Tk()
-    
+
     # Thiết lập style mặc định
     style = ttk.Style("cosmo")  # hoặc flatly, minty, darkly...
-    
+
     # Thiết lập icon
     try:
         if os.path.exists(resource_path("icon.ico")):
             root.iconbitmap(resource_path("icon.ico"))
     except Exception:
         pass
-    
+    timer.mark("tk")
+
     # Khởi tạo và chạy ứng dụng
     app = MainWindow(root)
+    timer.mark("main_window")
+
+    def shown():
+        # Khung hình đầu tiên đã được vẽ: kết thúc đo và so với ngân sách
+        root.update_idletasks()
+        timer.mark("first_frame")
+        app.logger.log(f"🚀 {app._('startup_time')}: {timer.summary()}")
+        if not timer.within_budget():
+            app.logger.log(f"{ICONS['warning']} {app._('startup_over_budget')}: {timer.summary()}")
+        if startup_check:
+            print(json.dumps(timer.report(), ensure_ascii=False, indent=2))
+            root.after(0, root.destroy)
+
+    root.after_idle(shown)
     root.mainloop()
 
+    if startup_check:
+        sys.exit(0 if timer.within_budget() and not timer.report()["deferred_loaded"] else 1)
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,3 @@
+"""
+Các script đo hiệu năng cho TifTiff
+"""
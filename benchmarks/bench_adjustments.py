@@ -0,0 +1,71 @@
+"""
+So sánh kernel điều chỉnh hợp nhất với chuỗi ImageEnhance gốc
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_adjustments --size 4000 --repeat 3
+"""
+
+import argparse
+import time
+import numpy as np
+from PIL import Image
+
+from processing.adjustments import apply_adjustments, apply_adjustments_pillow
+
+# Các bộ tham số (độ sáng, độ tương phản, độ bão hòa) được đo
+CASES = [
+    (1.2, 1.0, 1.0),
+    (1.0, 1.3, 1.0),
+    (1.0, 1.0, 0.6),
+    (1.2, 1.3, 1.5),
+    (0.8, 0.7, 1.4),
+]
+
+
+def make_image(size, mode="RGBA", seed=0):
+    """Tạo ảnh tổng hợp (dải màu + nhiễu) có thể tái lập"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:size, 0:size]
+    base = ((x + y) * 255 // max(1, 2 * size - 2)).astype(np.int16)
+    channels = [
+        np.clip(base + rng.integers(-40, 40, base.shape), 0, 255).astype(np.uint8)
+        for _ in range(len(mode))
+    ]
+    return Image.fromarray(np.dstack(channels), mode)
+
+
+def best_time(func, repeat):
+    """Thời gian nhỏ nhất qua nhiều lần chạy"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=2000, help="Cạnh ảnh vuông (pixel)")
+    parser.add_argument("--mode", default="RGBA", choices=["RGB", "RGBA"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    img = make_image(args.size, args.mode)
+    print(f"Ảnh {args.size}x{args.size} {args.mode}")
+    print(f"{'brightness':>10} {'contrast':>9} {'saturation':>10} {'pillow (s)':>11} {'fused (s)':>10} {'speedup':>8} {'max ΔDN':>8}")
+
+    for brightness, contrast, saturation in CASES:
+        t_pillow, ref = best_time(
+            lambda: apply_adjustments_pillow(img, brightness, contrast, saturation), args.repeat)
+        t_fused, out = best_time(
+            lambda: apply_adjustments(img, brightness, contrast, saturation), args.repeat)
+        diff = int(np.abs(np.asarray(ref, dtype=np.int16) - np.asarray(out, dtype=np.int16)).max())
+        print(f"{brightness:>10} {contrast:>9} {saturation:>10} {t_pillow:>11.3f} {t_fused:>10.3f} "
+              f"{t_pillow / t_fused:>7.2f}x {diff:>8}")
+
+
+if __name__ == "__main__":
+    main()
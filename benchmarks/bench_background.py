@@ -0,0 +1,79 @@
+"""
+So sánh bộ xóa nền hợp nhất với hai cách cài đặt cũ của ImageProcessor
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_background --size 4000 --repeat 3
+"""
+
+import argparse
+import numpy as np
+from PIL import Image
+
+from benchmarks.bench_adjustments import best_time
+from processing.background import remove_key_colors, BLACK, WHITE
+
+
+def make_image(size, seed=0):
+    """Ảnh RGBA có các vùng nền đen/trắng chính xác và gần đúng xen lẫn nội dung"""
+    rng = np.random.default_rng(seed)
+    data = rng.integers(0, 256, (size, size, 4), dtype=np.uint8)
+    data[..., 3] = 255
+    band = size // 8
+    data[:band] = 0
+    data[band:2 * band] = 255
+    data[2 * band:3 * band, ..., :3] = rng.integers(0, 10, (band, size, 3), dtype=np.uint8)
+    data[3 * band:4 * band, ..., :3] = rng.integers(246, 256, (band, size, 3), dtype=np.uint8)
+    data[..., 3] = 255
+    return Image.fromarray(data)
+
+
+def legacy_exact(img, remove_black=True, remove_white=True):
+    """ImageProcessor.remove_background trước đây: khớp chính xác 0/255 bằng np.all"""
+    data = np.array(img)
+    mask = np.zeros(data.shape[:2], bool)
+    if remove_white:
+        mask |= np.all(data[..., :3] == 255, axis=-1)
+    if remove_black:
+        mask |= np.all(data[..., :3] == 0, axis=-1)
+    data[mask] = (0, 0, 0, 0)
+    return Image.fromarray(data)
+
+
+def legacy_threshold(img, is_black=True):
+    """ImageProcessor._remove_background trước đây: ngưỡng <10 / >245 trên từng kênh"""
+    data = np.array(img)
+    if is_black:
+        mask = (data[:, :, 0] < 10) & (data[:, :, 1] < 10) & (data[:, :, 2] < 10)
+    else:
+        mask = (data[:, :, 0] > 245) & (data[:, :, 1] > 245) & (data[:, :, 2] > 245)
+    data[:, :, 3][mask] = 0
+    return Image.fromarray(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=4000, help="Cạnh ảnh vuông (pixel)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    img = make_image(args.size)
+    cases = [
+        ("exact đen+trắng", lambda: legacy_exact(img),
+         lambda: remove_key_colors(img, [BLACK, WHITE])),
+        ("ngưỡng đen", lambda: legacy_threshold(img, True),
+         lambda: remove_key_colors(img, [BLACK], tolerance=9, clear_color=False)),
+        ("ngưỡng trắng", lambda: legacy_threshold(img, False),
+         lambda: remove_key_colors(img, [WHITE], tolerance=9, clear_color=False)),
+    ]
+
+    print(f"Ảnh {args.size}x{args.size} RGBA")
+    print(f"{'trường hợp':>16} {'cũ (s)':>8} {'mới (s)':>8} {'speedup':>8} {'giống hệt':>10}")
+    for name, legacy, unified in cases:
+        t_legacy, ref = best_time(legacy, args.repeat)
+        t_new, out = best_time(unified, args.repeat)
+        same = np.array_equal(np.asarray(ref), np.asarray(out))
+        print(f"{name:>16} {t_legacy:>8.3f} {t_new:>8.3f} {t_legacy / t_new:>7.2f}x {str(same):>10}")
+
+
+if __name__ == "__main__":
+    main()
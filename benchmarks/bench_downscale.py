@@ -0,0 +1,98 @@
+"""
+So sánh thứ tự xử lý thu nhỏ trước (giải mã giảm kích thước) với thứ tự gốc
+
+Đo tùy chọn fast_downscale của process_image (gần đúng, bật khi được yêu cầu).
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_downscale --size 4000 --repeat 3
+"""
+
+import argparse
+import os
+import tempfile
+import numpy as np
+import rasterio
+from PIL import Image
+
+from benchmarks.bench_adjustments import make_image, best_time
+from processing.image_processor import ImageProcessor
+from resources.constants import RESAMPLE
+
+# Các định dạng nguồn và tỷ lệ thu nhỏ được đo
+FORMATS = [".jpg", ".png", ".tif"]
+SCALES = [0.5, 0.25, 0.1]
+
+# Điều chỉnh áp dụng trong mọi lần đo (độ sáng, độ tương phản, độ bão hòa)
+ADJUSTMENTS = (1.1, 1.2, 1.3)
+
+
+class _SilentLogger:
+    def log(self, message, *args, **kwargs):
+        pass
+
+
+def write_source(img, path):
+    """Ghi ảnh nguồn; TIFF được ghi bằng rasterio (có tile) như GeoTIFF thực tế"""
+    if path.endswith(".tif"):
+        data = np.moveaxis(np.asarray(img), 2, 0)
+        with rasterio.open(path, "w", driver="GTiff", width=img.width, height=img.height,
+                           count=data.shape[0], dtype="uint8", photometric="RGB",
+                           tiled=True, blockxsize=256, blockysize=256) as dst:
+            dst.write(data)
+    else:
+        img.save(path, quality=90) if path.endswith(".jpg") else img.save(path)
+
+
+def legacy_pipeline(processor, path, output_path, scale):
+    """Thứ tự gốc: giải mã toàn bộ, điều chỉnh ở độ phân giải gốc rồi mới thu nhỏ"""
+    img = Image.open(path).convert("RGBA")
+    img = processor._apply_adjustments(img, *ADJUSTMENTS)
+    img = img.resize((int(img.width * scale), int(img.height * scale)), RESAMPLE)
+    img.save(output_path)
+    return output_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=4000, help="Cạnh ảnh vuông (pixel)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=2.0, help="Sai khác trung bình tối đa cho phép (DN)")
+    args = parser.parse_args(argv)
+
+    processor = ImageProcessor(_SilentLogger())
+    img = make_image(args.size, "RGB")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.makedirs(os.path.join(tmp, "out"))
+        print(f"Ảnh {args.size}x{args.size}, điều chỉnh {ADJUSTMENTS}")
+        print(f"{'nguồn':>6} {'tỷ lệ':>6} {'gốc (s)':>8} {'mới (s)':>8} {'speedup':>8} {'max ΔDN':>8} {'mean ΔDN':>9}")
+        failed = False
+
+        for ext in FORMATS:
+            path = os.path.join(tmp, "source" + ext)
+            write_source(img, path)
+
+            for scale in SCALES:
+                ref_path = os.path.join(tmp, "legacy.png")
+                t_legacy, _ = best_time(lambda: legacy_pipeline(processor, path, ref_path, scale), args.repeat)
+                t_new, out_path = best_time(lambda: processor.process_image(
+                    path, os.path.join(tmp, "out"), ".png", str(scale),
+                    brightness=ADJUSTMENTS[0], contrast=ADJUSTMENTS[1], saturation=ADJUSTMENTS[2],
+                    tiled=False, fast_downscale=True
+                ), args.repeat)
+
+                # Đầu ra giữ chế độ gốc của ảnh (RGB), cách cũ luôn chuyển sang RGBA
+                with Image.open(out_path) as out_img:
+                    out = np.asarray(out_img.convert("RGBA"), dtype=np.int16)
+                ref = np.asarray(Image.open(ref_path), dtype=np.int16)
+                diff = np.abs(ref - out)
+                ok = diff.mean() <= args.tolerance
+                failed |= not ok
+                print(f"{ext:>6} {scale:>6} {t_legacy:>8.3f} {t_new:>8.3f} {t_legacy / t_new:>7.2f}x "
+                      f"{int(diff.max()):>8} {diff.mean():>9.3f}{'' if ok else '  ✗'}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
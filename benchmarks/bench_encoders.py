@@ -0,0 +1,75 @@
+"""
+So sánh thời gian mã hóa và dung lượng file của các chế độ nén theo định dạng
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_encoders --input screenshots --repeat 3
+"""
+
+import argparse
+import glob
+import io
+import os
+from PIL import Image
+
+from benchmarks.bench_adjustments import make_image, best_time
+from processing.outputs import encoder_options
+from resources.constants import ENCODER_PROFILES
+
+# Định dạng được đo và tên định dạng của Pillow
+FORMATS = {".png": "PNG", ".jpg": "JPEG", ".webp": "WEBP", ".tif": "TIFF"}
+
+# Đuôi file được lấy làm mẫu từ thư mục --input
+INPUT_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tif", ".tiff", ".bmp", ".webp")
+
+
+def load_corpus(input_dir, size):
+    """Ảnh mẫu từ thư mục (chuyển sang RGB) hoặc một ảnh tổng hợp nếu không có"""
+    paths = sorted(
+        p for p in glob.glob(os.path.join(input_dir or "", "*"))
+        if p.lower().endswith(INPUT_EXTENSIONS)
+    ) if input_dir else []
+    if not paths:
+        return [("synthetic", make_image(size, "RGB"))]
+    return [(os.path.basename(p), Image.open(p).convert("RGB")) for p in paths]
+
+
+def encode(img, output_format, options):
+    """Mã hóa vào bộ nhớ, trả về số byte"""
+    buffer = io.BytesIO()
+    img.save(buffer, FORMATS[output_format], **options)
+    return buffer.tell()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--input", default="screenshots", help="Thư mục ảnh mẫu")
+    parser.add_argument("--size", type=int, default=2000, help="Cạnh ảnh tổng hợp khi không có ảnh mẫu")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.input, args.size)
+    megapixels = sum(img.width * img.height for _, img in corpus) / 1e6
+    print(f"{len(corpus)} ảnh, {megapixels:.1f} MP")
+    print(f"{'định dạng':>9} {'chế độ':>9} {'thời gian (s)':>13} {'ms/MP':>8} {'dung lượng (KB)':>15} {'so với balanced':>15}")
+
+    for output_format in FORMATS:
+        rows = []
+        for profile in ENCODER_PROFILES:
+            options = encoder_options(output_format, profile)
+            elapsed, size = 0.0, 0
+            for _, img in corpus:
+                t, n = best_time(lambda: encode(img, output_format, options), args.repeat)
+                elapsed += t
+                size += n
+            rows.append((profile, elapsed, size))
+
+        reference = dict((p, s) for p, _, s in rows).get("balanced") or rows[0][2]
+        for profile, elapsed, size in rows:
+            print(f"{output_format:>9} {profile:>9} {elapsed:>13.3f} {elapsed * 1000 / megapixels:>8.1f} "
+                  f"{size / 1024:>15.1f} {size / reference:>14.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
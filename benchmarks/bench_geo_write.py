@@ -0,0 +1,80 @@
+"""
+So sánh các chế độ ghi GeoTIFF của chế độ nghiên cứu: thời gian ghi, dung lượng
+file và thời gian đọc ảnh thu nhỏ (như khi phần mềm GIS mở toàn cảnh)
+
+Mỗi chế độ trong GEO_WRITE_PROFILES được đo bằng GeoProcessor.reproject_raster trên
+GeoTIFF 8-bit và 16-bit, dữ liệu mịn (nén được như ảnh thực tế) và dữ liệu nhiễu.
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_geo_write --size 4000 --repeat 3
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import rasterio
+from rasterio.enums import Resampling
+
+from benchmarks.bench_adjustments import best_time
+from benchmarks.corpus import GEO_CRS, REPROJECT_TARGETS, make_geo_array, write_geotiff
+from processing.geo_processor import GeoProcessor
+from resources.constants import GEO_WRITE_PROFILES
+
+# Ảnh nguồn: (kiểu dữ liệu, số band, biên độ nhiễu)
+SOURCES = (("uint8", 3, 0.02), ("uint16", 4, 0.002), ("uint16", 4, 1 / 6))
+
+# Ảnh thu nhỏ đọc lại sau khi ghi (1/OVERVIEW_FACTOR kích thước gốc)
+OVERVIEW_FACTOR = 16
+
+
+def read_overview(path):
+    """Thời gian đọc toàn ảnh ở 1/OVERVIEW_FACTOR kích thước (dùng overview nếu có)"""
+    start = time.perf_counter()
+    with rasterio.open(path) as src:
+        src.read(out_shape=(src.count, max(1, src.height // OVERVIEW_FACTOR),
+                            max(1, src.width // OVERVIEW_FACTOR)),
+                 resampling=Resampling.nearest)
+    return time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=4000, help="Cạnh ảnh vuông (pixel)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    crs, origin, resolution = GEO_CRS[0]
+    dst_crs = REPROJECT_TARGETS[crs]
+    processor = GeoProcessor()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"Ảnh {args.size}x{args.size}, {crs} → {dst_crs}, {processor.num_threads} luồng")
+        print(f"{'nguồn':<18} {'chế độ':<12} {'ghi (s)':>8} {'MB':>9} {'tỷ lệ':>6} {'đọc 1/16 (ms)':>14}")
+
+        for seed, (dtype, bands, noise) in enumerate(SOURCES, 1):
+            src_path = os.path.join(tmp, f"source_{seed}.tif")
+            write_geotiff(src_path, make_geo_array(args.size, dtype, bands, seed, noise),
+                          crs, origin, resolution)
+            label = f"{dtype}x{bands} {'nhiễu' if noise > 0.1 else 'mịn'}"
+            base_size = None
+
+            for profile in GEO_WRITE_PROFILES:
+                dst_path = os.path.join(tmp, f"{profile}.tif")
+                elapsed, result = best_time(lambda: processor.reproject_raster(
+                    src_path, dst_path, dst_crs, write_profile=profile), args.repeat)
+                if not result:
+                    print(f"{label:<18} {profile:<12} ❌ lỗi")
+                    return 1
+
+                size = os.path.getsize(dst_path)
+                base_size = base_size or size
+                read_ms = min(read_overview(dst_path) for _ in range(args.repeat)) * 1000
+                print(f"{label:<18} {profile:<12} {elapsed:>8.3f} {size / 1024 / 1024:>9.1f} "
+                      f"{size / base_size:>6.2f} {read_ms:>14.1f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
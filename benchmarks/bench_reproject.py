@@ -0,0 +1,95 @@
+"""
+So sánh chuyển đổi hệ tọa độ từng band (cách cũ) với một lần gọi cho mọi band
+
+Đo trên GeoTIFF 16-bit 4 và 12 band: vòng lặp reproject theo từng band, một lần
+gọi trên mảng 3 chiều (1 luồng warp) và cùng cách đó với nhiều luồng warp GDAL.
+Số pixel khác nhau được tính so với kết quả một lần gọi 1 luồng (cách cũ có thể
+lệch vài pixel do GDAL chia khối khác nhau; nhiều luồng phải trùng khớp).
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_reproject --size 3000 --bands 4,12 --threads 4
+"""
+
+import argparse
+import os
+import tempfile
+import numpy as np
+import rasterio
+from rasterio.warp import calculate_default_transform, reproject, Resampling
+
+from benchmarks.bench_adjustments import best_time
+from benchmarks.corpus import GEO_CRS, REPROJECT_TARGETS, make_geo_array, write_geotiff
+from processing.geo_processor import GeoProcessor
+
+
+def legacy_reproject(src_path, dst_path, dst_crs):
+    """Cách cũ: đọc, warp và ghi từng band (phép chiếu được tính lại cho mỗi band)"""
+    with rasterio.open(src_path) as src:
+        transform, width, height = calculate_default_transform(
+            src.crs, dst_crs, src.width, src.height, *src.bounds)
+        profile = src.meta.copy()
+        profile.update(crs=dst_crs, transform=transform, width=width, height=height)
+        with rasterio.open(dst_path, "w", **profile) as dst:
+            for i in range(1, src.count + 1):
+                destination = np.zeros((height, width), dtype=src.dtypes[0])
+                reproject(
+                    src.read(i), destination,
+                    src_transform=src.transform, src_crs=src.crs,
+                    dst_transform=transform, dst_crs=dst_crs,
+                    resampling=Resampling.nearest
+                )
+                dst.write(destination, i)
+    with rasterio.open(dst_path) as dst:
+        return dst.read()
+
+
+def processor_reproject(processor, src_path, dst_path, dst_crs):
+    """GeoProcessor.reproject_raster (mọi band trong một lần gọi), trả về mảng kết quả"""
+    if not processor.reproject_raster(src_path, dst_path, dst_crs, windowed=False):
+        raise RuntimeError(f"Không chuyển đổi được {src_path}")
+    with rasterio.open(dst_path) as dst:
+        return dst.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=3000, help="Cạnh ảnh vuông (pixel)")
+    parser.add_argument("--bands", default="4,12", help="Số band của các ảnh đo, cách nhau bởi dấu phẩy")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Số luồng warp GDAL")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    crs, origin, resolution = GEO_CRS[0]
+    dst_crs = REPROJECT_TARGETS[crs]
+    single = GeoProcessor(num_threads=1)
+    threaded = GeoProcessor(num_threads=args.threads)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dst_path = os.path.join(tmp, "out.tif")
+        print(f"Ảnh {args.size}x{args.size} uint16, {crs} → {dst_crs}, {args.threads} luồng warp")
+        print(f"{'band':>5} {'từng band (s)':>14} {'một lần (s)':>12} {'speedup':>8} "
+              f"{f'{args.threads} luồng (s)':>13} {'speedup':>8} {'Δpx cũ':>9} {'Δpx luồng':>10}")
+        failed = False
+
+        for bands in (int(b) for b in args.bands.split(",")):
+            src_path = os.path.join(tmp, f"source_{bands}.tif")
+            write_geotiff(src_path, make_geo_array(args.size, "uint16", bands, bands), crs, origin, resolution)
+
+            t_legacy, legacy = best_time(lambda: legacy_reproject(src_path, dst_path, dst_crs), args.repeat)
+            t_single, ref = best_time(
+                lambda: processor_reproject(single, src_path, dst_path, dst_crs), args.repeat)
+            t_threaded, out = best_time(
+                lambda: processor_reproject(threaded, src_path, dst_path, dst_crs), args.repeat)
+
+            legacy_diff = int((legacy != ref).sum())
+            threaded_diff = int((out != ref).sum())
+            failed |= threaded_diff > 0
+            print(f"{bands:>5} {t_legacy:>14.3f} {t_single:>12.3f} {t_legacy / t_single:>7.2f}x "
+                  f"{t_threaded:>13.3f} {t_legacy / t_threaded:>7.2f}x {legacy_diff:>9} "
+                  f"{threaded_diff:>10}{'' if threaded_diff == 0 else '  ✗'}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,73 @@
+"""
+Đo thời gian khởi động app.py và các module import tốn thời gian nhất
+
+Cần màn hình (hoặc Xvfb). Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_startup --repeat 5 --top 15
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+from resources.constants import STARTUP_BUDGET_S
+
+
+def run_startup_check():
+    """Một lần chạy app.py --startup-check, trả về báo cáo JSON (None nếu lỗi)"""
+    proc = subprocess.run(
+        [sys.executable, "app.py", "--startup-check"], capture_output=True, text=True
+    )
+    start = proc.stdout.find("{")
+    if start < 0:
+        sys.stderr.write(proc.stderr)
+        return None
+    return json.loads(proc.stdout[start:])
+
+
+def import_costs(module="ui.main_window"):
+    """Thời gian import (tích lũy, µs) của từng module theo -X importtime"""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True
+    )
+    costs = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        costs.append((int(cumulative), name))
+    return sorted(costs, reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="Số module import chậm nhất được in")
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<50} {'tích lũy (ms)':>13}")
+    for cumulative, name in import_costs()[:args.top]:
+        print(f"{name:<50} {cumulative / 1000:>13.1f}")
+
+    reports = [r for r in (run_startup_check() for _ in range(args.repeat)) if r]
+    if not reports:
+        print("❌ Không chạy được app.py --startup-check (thiếu màn hình?)")
+        return 1
+
+    elapsed = [r["elapsed_s"] for r in reports]
+    print(f"\n{'bước':<14} {'trung vị (ms)':>13}")
+    for step in reports[0]["steps"]:
+        print(f"{step:<14} {statistics.median(r['steps'][step] for r in reports) * 1000:>13.1f}")
+    median = statistics.median(elapsed)
+    print(f"{'tổng':<14} {median * 1000:>13.1f}  (ngân sách {STARTUP_BUDGET_S * 1000:.0f} ms, "
+          f"tệ nhất {max(elapsed) * 1000:.1f} ms)")
+
+    deferred = sorted({name for r in reports for name in r["deferred_loaded"]})
+    if deferred:
+        print(f"⚠️ Module nặng được import trước khi cửa sổ hiện lên: {', '.join(deferred)}")
+    return 0 if median <= STARTUP_BUDGET_S and not deferred else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
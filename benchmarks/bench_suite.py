@@ -0,0 +1,286 @@
+"""
+Bộ đo hiệu năng tổng hợp trên dữ liệu tổng hợp, so với kết quả chuẩn đã lưu
+
+Đo process_image, batch_process, process_batch, reproject_raster,
+extract_metadata_batch và CacheManager trên bộ dữ liệu của benchmarks.corpus, ghi
+kết quả JSON và đánh dấu các phép đo chậm hơn kết quả chuẩn quá ngưỡng.
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_suite --preset small --save-baseline   # lưu kết quả chuẩn
+    python -m benchmarks.bench_suite --preset small --threshold 0.15  # so sánh, mã thoát 1 nếu chậm đi
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import numpy as np
+import rasterio
+from PIL import Image
+
+from benchmarks.corpus import build_corpus, PRESETS, REPROJECT_TARGETS
+from processing.image_processor import ImageProcessor
+from processing.geo_processor import GeoProcessor
+from processing.metadata_processor import MetadataProcessor
+from utils.cache_manager import CacheManager
+
+# Kết quả chuẩn mặc định (ghi bằng --save-baseline trên máy dùng để so sánh)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Tùy chọn xử lý ảnh dùng trong mọi phép đo (tương ứng chế độ trình chiếu)
+IMAGE_OPTIONS = {
+    "output_format": ".png",
+    "scale_ratio": "0.5",
+    "brightness": "1.1",
+    "contrast": "1.1",
+    "saturation": "1.0",
+    "remove_white": True,
+}
+
+# Số mục ghi/đọc trong phép đo CacheManager
+CACHE_ENTRIES = 200
+
+# Chênh lệch tuyệt đối tối thiểu (giây) để tính là chậm đi (bỏ qua nhiễu của phép đo rất ngắn)
+MIN_DELTA_S = 0.005
+
+
+class _SilentLogger:
+    def log(self, message, *args, **kwargs):
+        pass
+
+    # MetadataProcessor gọi trực tiếp logger(message)
+    __call__ = log
+
+
+def environment():
+    """Phiên bản Python/thư viện và số lõi CPU (kết quả chỉ so sánh được trên cùng môi trường)"""
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pillow": Image.__version__,
+        "numpy": np.__version__,
+        "rasterio": rasterio.__version__,
+        "gdal": rasterio.__gdal_version__,
+    }
+
+
+def measure(func, repeat):
+    """
+    Chạy func nhiều lần
+
+    Trả về:
+        dict: Thời gian nhỏ nhất, trung vị, từng lần chạy (giây) và lỗi nếu có
+    """
+    runs = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            runs.append(time.perf_counter() - start)
+    except Exception as e:
+        return {"seconds": None, "error": f"{e.__class__.__name__}: {e}"}
+    return {
+        "seconds": round(min(runs), 6),
+        "median_s": round(statistics.median(runs), 6),
+        "runs": [round(r, 6) for r in runs],
+        "error": None,
+    }
+
+
+def build_cases(files, out_dir, workers):
+    """
+    Các phép đo: tên → (hàm, danh sách file được xử lý)
+
+    Mỗi hàm xử lý toàn bộ danh sách file của nó; lỗi được báo bằng ngoại lệ để phép
+    đo được đánh dấu lỗi thay vì âm thầm đo một lần chạy không làm gì.
+    """
+    logger = _SilentLogger()
+    image_processor = ImageProcessor(logger)
+    geo_processor = GeoProcessor(logger)
+    metadata_processor = MetadataProcessor(logger)
+    images = [f for f in files if f.kind == "image"]
+    geotiffs = [f for f in files if f.kind == "geotiff"]
+    cases = {}
+
+    def process_each(subset):
+        def run():
+            for entry in subset:
+                if not image_processor.process_image(entry.path, out_dir, tiled=False, **IMAGE_OPTIONS):
+                    raise RuntimeError(f"process_image thất bại: {entry.path}")
+        return run
+
+    for ext, mode in sorted({(os.path.splitext(f.path)[1], f.bands) for f in images}):
+        subset = [f for f in images if f.path.endswith(ext) and f.bands == mode]
+        cases[f"process_image[{ext[1:]}_{'rgba' if mode == 4 else 'rgb'}]"] = (process_each(subset), subset)
+    uint8_geo = [f for f in geotiffs if f.dtype == "uint8"]
+    cases["process_image[geotiff_uint8]"] = (process_each(uint8_geo), uint8_geo)
+
+    def batch_process():
+        paths = [f.path for f in images]
+        if len(image_processor.batch_process(paths, out_dir, **IMAGE_OPTIONS)) != len(paths):
+            raise RuntimeError("batch_process không xử lý hết các ảnh")
+    cases["batch_process"] = (batch_process, images)
+
+    def process_batch():
+        paths = [f.path for f in images]
+        done = image_processor.process_batch(paths, out_dir, IMAGE_OPTIONS, max_workers=workers)
+        if len(done) != len(paths):
+            raise RuntimeError("process_batch không xử lý hết các ảnh")
+    cases[f"process_batch[{workers}w]"] = (process_batch, images)
+
+    def reproject_each(subset):
+        def run():
+            for entry in subset:
+                dst = os.path.join(out_dir, "reprojected_" + os.path.basename(entry.path))
+                if not geo_processor.reproject_raster(entry.path, dst, REPROJECT_TARGETS[entry.crs]):
+                    raise RuntimeError(f"reproject_raster thất bại: {entry.path}")
+        return run
+
+    for dtype in sorted({f.dtype for f in geotiffs}):
+        subset = [f for f in geotiffs if f.dtype == dtype]
+        cases[f"reproject_raster[{dtype}]"] = (reproject_each(subset), subset)
+
+    def extract_metadata():
+        if len(metadata_processor.extract_metadata_batch([f.path for f in files])) != len(files):
+            raise RuntimeError("extract_metadata_batch không đọc hết các file")
+    cases["extract_metadata_batch"] = (extract_metadata, files)
+
+    def cache_operations():
+        cache_dir = os.path.join(out_dir, "cache")
+        shutil.rmtree(cache_dir, ignore_errors=True)
+        cache = CacheManager(cache_dir=cache_dir)
+        for i in range(CACHE_ENTRIES):
+            cache.set_cache(f"bench_{i}", {"index": i, "values": list(range(16))}, category="bench")
+        for i in range(CACHE_ENTRIES):
+            if cache.get_cache(f"bench_{i}", category="bench") is None:
+                raise RuntimeError("CacheManager mất dữ liệu")
+        cache.clear_cache(category="bench")
+    cases[f"cache_manager[{CACHE_ENTRIES}]"] = (cache_operations, [])
+
+    return cases
+
+
+def compare(cases, baseline, threshold, min_delta=MIN_DELTA_S):
+    """
+    So sánh với kết quả chuẩn
+
+    Một phép đo bị coi là chậm đi khi thời gian > chuẩn × (1 + ngưỡng) và chênh lệch
+    lớn hơn min_delta. Kết quả chuẩn có thể đặt ngưỡng riêng cho từng phép đo
+    trong khóa "thresholds".
+
+    Trả về:
+        dict: {tên: {"baseline_s", "ratio", "threshold", "status"}}
+    """
+    reference = baseline.get("cases", {})
+    thresholds = baseline.get("thresholds", {})
+    comparison = {}
+    for name, result in cases.items():
+        limit = thresholds.get(name, threshold)
+        base = reference.get(name, {}).get("seconds")
+        entry = {"baseline_s": base, "ratio": None, "threshold": limit}
+        if result["seconds"] is None:
+            entry["status"] = "error"
+        elif base is None:
+            entry["status"] = "new"
+        else:
+            entry["ratio"] = round(result["seconds"] / base, 4) if base > 0 else None
+            delta = result["seconds"] - base
+            if delta > min_delta and result["seconds"] > base * (1 + limit):
+                entry["status"] = "regression"
+            elif -delta > min_delta and result["seconds"] < base * (1 - limit):
+                entry["status"] = "faster"
+            else:
+                entry["status"] = "ok"
+        comparison[name] = entry
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--preset", default="small", choices=tuple(PRESETS))
+    parser.add_argument("--corpus-dir", help="Thư mục bộ dữ liệu (mặc định: thư mục tạm của hệ thống)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=2, help="Số tiến trình cho process_batch")
+    parser.add_argument("--only", help="Chỉ chạy các phép đo có tên chứa chuỗi này")
+    parser.add_argument("--output", default="tiftiff_bench.json", help="File kết quả JSON (\"-\": in ra stdout)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Kết quả chuẩn để so sánh")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Tỷ lệ chậm đi tối đa cho phép (0.10 = 10%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="Ghi kết quả lần này làm kết quả chuẩn")
+    args = parser.parse_args(argv)
+
+    corpus_dir = args.corpus_dir or os.path.join(tempfile.gettempdir(), "tiftiff_bench_corpus", args.preset)
+    files, corpus_key = build_corpus(corpus_dir, args.preset)
+    # Thông tin in ra stderr để "--output -" cho JSON sạch trên stdout
+    log = lambda message: print(message, file=sys.stderr)
+    log(f"Bộ dữ liệu {args.preset} ({corpus_key}): {len(files)} file trong {corpus_dir}")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as out_dir:
+        cases = build_cases(files, out_dir, args.workers)
+        for name, (func, subset) in cases.items():
+            if args.only and args.only not in name:
+                continue
+            result = measure(func, args.repeat)
+            megapixels = sum(f.width * f.height for f in subset) / 1e6
+            result["items"] = len(subset)
+            result["megapixels"] = round(megapixels, 3)
+            if result["seconds"] and megapixels:
+                result["mpix_per_s"] = round(megapixels / result["seconds"], 3)
+            results[name] = result
+
+    report = {
+        "preset": args.preset,
+        "corpus": corpus_key,
+        "repeat": args.repeat,
+        "environment": environment(),
+        "cases": results,
+    }
+
+    baseline = None
+    if not args.save_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["baseline"] = os.path.abspath(args.baseline)
+        report["baseline_corpus_match"] = baseline.get("corpus") == corpus_key
+        report["comparison"] = compare(results, baseline, args.threshold)
+        report["regressions"] = [n for n, c in report["comparison"].items() if c["status"] == "regression"]
+
+    log(f"{'phép đo':<32} {'tốt nhất (s)':>12} {'trung vị (s)':>12} {'MP/s':>8} {'chuẩn (s)':>10} {'tỷ lệ':>7}  trạng thái")
+    for name, result in results.items():
+        comparison = report.get("comparison", {}).get(name, {})
+        if result["seconds"] is None:
+            log(f"{name:<32} ❌ {result['error']}")
+            continue
+        rate, base, ratio = result.get("mpix_per_s"), comparison.get("baseline_s"), comparison.get("ratio")
+        log(f"{name:<32} {result['seconds']:>12.4f} {result['median_s']:>12.4f} "
+            f"{f'{rate:.1f}' if rate else '-':>8} {f'{base:.4f}' if base is not None else '-':>10} "
+            f"{f'{ratio:.2f}' if ratio is not None else '-':>7}  {comparison.get('status', '')}")
+    if baseline is not None and not report["baseline_corpus_match"]:
+        log("⚠️ Kết quả chuẩn được đo trên bộ dữ liệu khác, so sánh chỉ mang tính tham khảo")
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        log(f"📄 Kết quả: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+        log(f"📌 Đã lưu kết quả chuẩn: {args.baseline}")
+        return 0
+
+    errors = [n for n, r in results.items() if r["seconds"] is None]
+    return 1 if report.get("regressions") or errors else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
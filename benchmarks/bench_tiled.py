@@ -0,0 +1,74 @@
+"""
+So sánh xử lý theo dải (TiledProcessor) với xử lý trong bộ nhớ: thời gian và độ trùng khớp
+
+Ảnh vượt giới hạn bộ nhớ tự chuyển sang xử lý theo dải (tiled="auto"), nên hai
+đường xử lý phải cho cùng chế độ pixel (kể cả kênh alpha sau khi xóa nền) và cùng
+giá trị pixel. Mỗi trường hợp được xử lý với tiled=True và tiled="auto" (ảnh nhỏ
+hơn giới hạn, xử lý trong bộ nhớ) rồi so sánh ảnh đầu ra đọc bằng Pillow.
+
+Chạy từ thư mục gốc của dự án:
+    python -m benchmarks.bench_tiled --size 2000 --repeat 1
+"""
+
+import argparse
+import os
+import tempfile
+import numpy as np
+from PIL import Image
+
+from benchmarks.bench_adjustments import best_time
+from benchmarks.bench_background import make_image
+from benchmarks.bench_downscale import write_source, _SilentLogger
+from processing.image_processor import ImageProcessor
+
+# Định dạng đầu ra ghi được theo dải
+FORMATS = [".tif", ".png"]
+
+# Các trường hợp: (tên, tỷ lệ, tùy chọn process_image)
+CASES = [
+    ("xóa nền", "1.0", {"remove_black": True, "remove_white": True}),
+    ("xóa nền, thu nhỏ", "0.5", {"remove_black": True, "remove_white": True}),
+    ("xóa nền + điều chỉnh", "1.0", {"remove_black": True, "brightness": 1.1, "contrast": 1.2}),
+    ("thu nhỏ + điều chỉnh", "0.25", {"brightness": 1.1, "contrast": 1.2, "saturation": 1.3}),
+]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=2000, help="Cạnh ảnh vuông (pixel)")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    processor = ImageProcessor(_SilentLogger())
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "source.tif")
+        write_source(make_image(args.size).convert("RGB"), path)
+        print(f"Ảnh {args.size}x{args.size} RGB .tif")
+        print(f"{'đầu ra':>6} {'trường hợp':<22} {'bộ nhớ (s)':>10} {'theo dải (s)':>12} "
+              f"{'chế độ':>11} {'Δpx':>8}")
+        failed = False
+
+        for ext in FORMATS:
+            for name, scale, options in CASES:
+                outputs = {}
+                times = {}
+                for tiled in ("auto", True):
+                    out_dir = os.path.join(tmp, str(tiled))
+                    os.makedirs(out_dir, exist_ok=True)
+                    times[tiled], outputs[tiled] = best_time(lambda: processor.process_image(
+                        path, out_dir, ext, scale, tiled=tiled, **options), args.repeat)
+
+                with Image.open(outputs["auto"]) as ref, Image.open(outputs[True]) as out:
+                    modes = f"{ref.mode}/{out.mode}"
+                    diff = -1 if ref.mode != out.mode or ref.size != out.size else \
+                        int((np.asarray(ref) != np.asarray(out)).any(axis=-1).sum())
+                failed |= diff != 0
+                print(f"{ext:>6} {name:<22} {times['auto']:>10.3f} {times[True]:>12.3f} "
+                      f"{modes:>11} {diff:>8}{'' if diff == 0 else '  ✗'}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
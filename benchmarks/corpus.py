@@ -0,0 +1,146 @@
+"""
+Bộ dữ liệu tổng hợp có thể tái lập cho các phép đo hiệu năng
+
+Ảnh thường (PNG/JPEG RGB, RGBA) và GeoTIFF nhiều band 8/16-bit ở nhiều hệ tọa độ
+và kích thước, sinh từ seed cố định: cùng phiên bản thư viện cho ra cùng các file.
+Bộ dữ liệu được ghi một lần vào thư mục corpus và dùng lại khi cấu hình không đổi.
+"""
+
+import hashlib
+import json
+import os
+from collections import namedtuple
+import numpy as np
+import rasterio
+from rasterio.transform import Affine
+from PIL import Image
+
+from benchmarks.bench_adjustments import make_image
+
+# Tăng khi cách sinh dữ liệu thay đổi để bộ dữ liệu cũ được tạo lại
+CORPUS_VERSION = 1
+
+# Tên file mô tả bộ dữ liệu trong thư mục corpus
+CORPUS_MANIFEST = "corpus.json"
+
+# Kích thước (cạnh ảnh vuông, pixel) của ảnh thường và GeoTIFF theo từng mức
+PRESETS = {
+    "small": {"image_sizes": (512, 1024), "geo_sizes": (512,)},
+    "medium": {"image_sizes": (1024, 2048), "geo_sizes": (1024, 2048)},
+    "large": {"image_sizes": (2048, 6000), "geo_sizes": (2048, 6000)},
+}
+
+# Ảnh thường: (đuôi file, chế độ pixel)
+IMAGE_KINDS = ((".png", "RGB"), (".png", "RGBA"), (".jpg", "RGB"))
+
+# GeoTIFF: (kiểu dữ liệu, số band)
+GEO_KINDS = (("uint8", 3), ("uint16", 4))
+
+# Hệ tọa độ nguồn: (mã, góc trên trái (x, y), kích thước pixel) và hệ đích khi chuyển đổi
+GEO_CRS = (
+    ("EPSG:4326", (105.0, 21.5), 0.0001),
+    ("EPSG:32648", (500000.0, 2380000.0), 10.0),
+    ("EPSG:3857", (11690000.0, 2450000.0), 10.0),
+)
+REPROJECT_TARGETS = {"EPSG:4326": "EPSG:32648", "EPSG:32648": "EPSG:4326", "EPSG:3857": "EPSG:4326"}
+
+# Một file trong bộ dữ liệu
+CorpusFile = namedtuple("CorpusFile", ["path", "kind", "width", "height", "bands", "dtype", "crs"])
+
+
+def fingerprint(preset):
+    """Mã nhận diện cấu hình bộ dữ liệu (đổi khi mức, cách sinh hoặc phiên bản thư viện đổi)"""
+    spec = {
+        "version": CORPUS_VERSION,
+        "preset": PRESETS[preset],
+        "images": IMAGE_KINDS,
+        "geo": GEO_KINDS,
+        "crs": GEO_CRS,
+        "pillow": Image.__version__,
+        "numpy": np.__version__,
+        "gdal": rasterio.__gdal_version__,
+    }
+    return hashlib.sha1(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def make_geo_array(size, dtype, bands, seed, noise_fraction=1 / 6):
+    """
+    Dữ liệu band (band, hàng, cột): dải giá trị + nhiễu, phủ toàn bộ dải của kiểu dữ liệu
+
+    noise_fraction là biên độ nhiễu so với giá trị lớn nhất; giá trị nhỏ cho dữ liệu
+    mịn, nén được như ảnh thực tế.
+    """
+    rng = np.random.default_rng(seed)
+    top = np.iinfo(dtype).max
+    y, x = np.mgrid[0:size, 0:size]
+    base = (x + y) / max(1, 2 * size - 2)
+    noise = max(1, int(top * noise_fraction))
+    return np.stack([
+        np.clip(base * top + rng.integers(-noise, noise, base.shape), 0, top).astype(dtype)
+        for _ in range(bands)
+    ])
+
+
+def write_geotiff(path, data, crs, origin, resolution):
+    """Ghi GeoTIFF có tile như dữ liệu thực tế"""
+    bands, height, width = data.shape
+    transform = Affine(resolution, 0.0, origin[0], 0.0, -resolution, origin[1])
+    with rasterio.open(path, "w", driver="GTiff", width=width, height=height, count=bands,
+                       dtype=data.dtype.name, crs=crs, transform=transform,
+                       tiled=True, blockxsize=256, blockysize=256) as dst:
+        dst.write(data)
+
+
+def _generate(root, preset):
+    files = []
+    seed = 0
+    for size in PRESETS[preset]["image_sizes"]:
+        for ext, mode in IMAGE_KINDS:
+            seed += 1
+            path = os.path.join(root, f"img_{size}_{mode.lower()}{ext}")
+            img = make_image(size, mode, seed)
+            img.save(path, quality=90) if ext == ".jpg" else img.save(path)
+            files.append(CorpusFile(path, "image", size, size, len(mode), "uint8", None))
+
+    for size in PRESETS[preset]["geo_sizes"]:
+        for dtype, bands in GEO_KINDS:
+            for crs, origin, resolution in GEO_CRS:
+                seed += 1
+                path = os.path.join(root, f"geo_{size}_{dtype}_{crs.replace(':', '')}.tif")
+                write_geotiff(path, make_geo_array(size, dtype, bands, seed), crs, origin, resolution)
+                files.append(CorpusFile(path, "geotiff", size, size, bands, dtype, crs))
+    return files
+
+
+def build_corpus(root, preset="small"):
+    """
+    Tạo (hoặc dùng lại) bộ dữ liệu trong thư mục root
+
+    Tham số:
+        root (str): Thư mục chứa bộ dữ liệu
+        preset (str): Mức kích thước trong PRESETS
+
+    Trả về:
+        tuple: (danh sách CorpusFile, mã nhận diện bộ dữ liệu)
+    """
+    if preset not in PRESETS:
+        raise ValueError(f"Mức bộ dữ liệu không hỗ trợ: {preset}")
+    os.makedirs(root, exist_ok=True)
+    manifest_path = os.path.join(root, CORPUS_MANIFEST)
+    key = fingerprint(preset)
+
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("fingerprint") == key:
+            files = [CorpusFile(**entry) for entry in manifest["files"]]
+            if all(os.path.exists(entry.path) for entry in files):
+                return files, key
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    files = _generate(root, preset)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"fingerprint": key, "preset": preset,
+                   "files": [entry._asdict() for entry in files]}, f, indent=2)
+    return files, key
@@ -0,0 +1,342 @@
+"""
+Xử lý hàng loạt từ dòng lệnh, không khởi tạo giao diện Tk
+
+Dùng được trên máy không có màn hình (máy render, cron). Tên tùy chọn giống các
+khóa trong config.json; giá trị không truyền trên dòng lệnh được lấy từ file cấu
+hình (khóa "presentation_<tên>" rồi "<tên>"), sau đó là giá trị mặc định.
+
+Chạy từ thư mục gốc của dự án:
+    python -m cli process anh/ -o out --scale_ratio 0.5 --workers 4
+    python -m cli reproject dulieu/ -o out --target_crs "VN-2000 (EPSG:9210)"
+    python -m cli metadata anh/ -o out/metadata.json
+    python -m cli overviews out/ --overview_resampling average
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Không import tkinter/ttkbootstrap (trực tiếp hay qua ui/, utils.config): các bộ
+# xử lý được import trong từng lệnh để "--help" không phải nạp rasterio/numpy.
+from resources.constants import (
+    CONFIG_FILE, COMMON_CRS, ENCODER_PROFILES, SCHEDULE_ORDERS, GEO_OUTPUT_FORMATS, GEO_WRITE_PROFILES,
+    OVERVIEW_RESAMPLING, DEFAULT_OVERVIEW_RESAMPLING, WARP_GRID_CACHE_MB
+)
+
+# Đuôi file được lấy khi đầu vào là thư mục (giống giao diện)
+INPUT_EXTENSIONS = (".tif", ".tiff", ".png", ".jpg", ".jpeg", ".bmp", ".webp")
+GEO_EXTENSIONS = (".tif", ".tiff")
+
+# Giá trị mặc định của các tùy chọn xử lý ảnh (khi cả dòng lệnh và config đều không có)
+PROCESS_DEFAULTS = {
+    "output_format": ".png",
+    "scale_ratio": "1.0",
+    "brightness": "1.0",
+    "contrast": "1.0",
+    "saturation": "1.0",
+    "remove_black_bg": False,
+    "remove_white_bg": False,
+    "encoder_profile": "default",
+}
+
+
+class ConsoleLogger:
+    """Logger đồng bộ ghi ra stdout (thay cho AsyncLogger gắn với giao diện)"""
+
+    def __init__(self, quiet=False):
+        self.quiet = quiet
+
+    def log(self, message, *args, **kwargs):
+        if not self.quiet:
+            print(message, flush=True)
+
+    # MetadataProcessor gọi trực tiếp logger(message)
+    __call__ = log
+
+
+def load_config(path):
+    """Đọc config.json (không có file hoặc file lỗi: cấu hình rỗng)"""
+    if not path or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Không đọc được cấu hình {path}: {e}", file=sys.stderr)
+        return {}
+
+
+def resolve(args, config, name, prefix="presentation_", default=None):
+    """Giá trị của một tùy chọn: dòng lệnh → config "<prefix><tên>" → config "<tên>" → mặc định"""
+    value = getattr(args, name, None)
+    if value is not None:
+        return value
+    for key in (prefix + name, name):
+        if key in config:
+            return config[key]
+    return default
+
+
+def collect_inputs(paths, extensions=INPUT_EXTENSIONS):
+    """Danh sách file từ các đường dẫn file hoặc thư mục (không đệ quy)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name) for name in sorted(os.listdir(path))
+                if name.lower().endswith(extensions)
+            )
+        elif os.path.isfile(path):
+            files.append(path)
+        else:
+            print(f"⚠️ Không tìm thấy: {path}", file=sys.stderr)
+    return files
+
+
+def parse_outputs(value):
+    """Danh sách đầu ra dạng "png:1.0,jpg:0.5:85" (định dạng[:tỷ lệ[:chất lượng]])"""
+    outputs = []
+    for item in value.split(","):
+        parts = item.strip().split(":")
+        quality = int(parts[2]) if len(parts) > 2 and parts[2] else None
+        outputs.append((parts[0], parts[1] if len(parts) > 1 and parts[1] else "1.0", quality))
+    return outputs
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "on")
+
+
+def resolve_crs(value):
+    """Tên trong COMMON_CRS (như trong config.json) hoặc mã CRS bất kỳ ("EPSG:4326")"""
+    return COMMON_CRS.get(value, value)
+
+
+def resolve_geo_format(value):
+    """Tên trong GEO_OUTPUT_FORMATS (như trong config.json) hoặc đuôi file (".jp2") → (đuôi, driver)"""
+    if not value:
+        return None, None
+    if value in GEO_OUTPUT_FORMATS:
+        return GEO_OUTPUT_FORMATS[value]
+    ext = value if value.startswith(".") else "." + value
+    for fmt_ext, driver in GEO_OUTPUT_FORMATS.values():
+        if fmt_ext == ext.lower():
+            return fmt_ext, driver
+    return ext, None
+
+
+def cmd_process(args, config, logger):
+    """Xử lý ảnh cho báo cáo/trình chiếu (ImageProcessor)"""
+    from processing.image_processor import ImageProcessor
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("❌ Không có ảnh đầu vào", file=sys.stderr)
+        return 2
+
+    options = {
+        "output_format": resolve(args, config, "output_format", default=PROCESS_DEFAULTS["output_format"]),
+        "scale_ratio": str(resolve(args, config, "scale_ratio", default=PROCESS_DEFAULTS["scale_ratio"])),
+        "brightness": str(resolve(args, config, "brightness", default=PROCESS_DEFAULTS["brightness"])),
+        "contrast": str(resolve(args, config, "contrast", default=PROCESS_DEFAULTS["contrast"])),
+        "saturation": str(resolve(args, config, "saturation", default=PROCESS_DEFAULTS["saturation"])),
+        "remove_black": parse_bool(resolve(args, config, "remove_black_bg", default=False)),
+        "remove_white": parse_bool(resolve(args, config, "remove_white_bg", default=False)),
+        "encoder_profile": resolve(args, config, "encoder_profile", default=PROCESS_DEFAULTS["encoder_profile"]),
+    }
+    if args.edge_only:
+        options["edge_only"] = True
+    if args.fast_downscale:
+        options["fast_downscale"] = True
+    if args.memory_limit_mb:
+        options["memory_limit_mb"] = args.memory_limit_mb
+    if args.outputs:
+        options["outputs"] = parse_outputs(args.outputs)
+
+    processor = ImageProcessor(logger, config.get("language", "en"))
+    if args.workers == 1:
+        # Một tiến trình: pipeline đọc → biến đổi → ghi chồng lên nhau
+        processed = processor.batch_process(
+            files, args.output, schedule_order=args.schedule_order,
+            memory_budget_mb=args.memory_budget_mb,
+            incremental=args.incremental, use_hash=args.use_hash,
+            stats_report=args.stats_report, **options
+        )
+    else:
+        processed = processor.process_batch(
+            files, args.output, options, max_workers=args.workers,
+            schedule_order=args.schedule_order, memory_budget_mb=args.memory_budget_mb,
+            incremental=args.incremental, use_hash=args.use_hash,
+            stats_report=args.stats_report
+        )
+
+    logger.log(f"✅ {len(processed)} đầu ra trong {args.output}")
+    return 0 if processed else 1
+
+
+def cmd_reproject(args, config, logger):
+    """Chuyển đổi hệ tọa độ GeoTIFF (GeoProcessor)"""
+    from processing.geo_processor import GeoProcessor
+
+    files = collect_inputs(args.inputs, GEO_EXTENSIONS)
+    if not files:
+        print("❌ Không có file GeoTIFF đầu vào", file=sys.stderr)
+        return 2
+
+    dst_crs = resolve_crs(resolve(args, config, "target_crs", prefix="research_", default="EPSG:4326"))
+    logger.log(f"🎯 Hệ tọa độ đích: {dst_crs}")
+    output_ext, driver = resolve_geo_format(resolve(args, config, "geo_format", prefix="research_"))
+
+    processor = GeoProcessor(
+        logger, config.get("language", "en"), args.memory_limit_mb,
+        num_threads=args.num_threads, warp_mem_limit_mb=args.warp_mem_limit_mb,
+        error_threshold=args.error_threshold,
+        write_profile=resolve(args, config, "geo_write_profile", prefix="research_"),
+        warp_grid_cache_mb=args.warp_grid_cache_mb
+    )
+    results = processor.batch_reproject(
+        files, args.output, dst_crs, schedule_order=args.schedule_order,
+        memory_budget_mb=args.memory_budget_mb, max_workers=args.workers,
+        output_ext=output_ext, driver=driver,
+        incremental=args.incremental, use_hash=args.use_hash,
+        overviews=overview_options(args, config) if args.overviews else None,
+        stats_report=args.stats_report
+    )
+
+    logger.log(f"✅ {len(results)}/{len(files)} file trong {args.output}")
+    return 0 if len(results) == len(files) else 1
+
+
+def overview_options(args, config, prefix="overview_"):
+    """Tham số GeoProcessor.build_overviews từ dòng lệnh và config ("research_overview_*")"""
+    return {
+        "resampling": resolve(args, config, prefix + "resampling", prefix="research_",
+                              default=DEFAULT_OVERVIEW_RESAMPLING),
+        "external": getattr(args, prefix + "external", False) or parse_bool(
+            config.get("research_overview_external", False)),
+    }
+
+
+def cmd_overviews(args, config, logger):
+    """Tạo overview cho GeoTIFF có sẵn (bỏ qua ảnh đã có overview hợp lệ)"""
+    from processing.geo_processor import GeoProcessor
+
+    files = collect_inputs(args.inputs, GEO_EXTENSIONS)
+    if not files:
+        print("❌ Không có file GeoTIFF đầu vào", file=sys.stderr)
+        return 2
+
+    processor = GeoProcessor(logger, config.get("language", "en"))
+    results = processor.batch_build_overviews(
+        files, max_workers=args.workers, force=args.force, **overview_options(args, config)
+    )
+    logger.log(f"✅ {len(results)}/{len(files)} file có overview")
+    return 0 if len(results) == len(files) else 1
+
+
+def cmd_metadata(args, config, logger):
+    """Xuất metadata ra CSV hoặc JSON (MetadataProcessor)"""
+    from processing.metadata_processor import MetadataProcessor
+
+    files = collect_inputs(args.inputs)
+    if not files:
+        print("❌ Không có ảnh đầu vào", file=sys.stderr)
+        return 2
+
+    output = os.path.abspath(args.output)
+    export_format = args.format or os.path.splitext(output)[1].lstrip(".").lower() or "csv"
+    processor = MetadataProcessor(logger)
+    if export_format == "json":
+        result = processor.export_metadata_json(files, output)
+    else:
+        result = processor.export_metadata_csv(files, output)
+    return 0 if result else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m cli", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--config", default=CONFIG_FILE, help="File cấu hình lấy giá trị mặc định (\"\": bỏ qua)")
+    parser.add_argument("--quiet", action="store_true", help="Không in log xử lý")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_batch_arguments(sub):
+        sub.add_argument("inputs", nargs="+", help="File hoặc thư mục ảnh")
+        sub.add_argument("-o", "--output", required=True, help="Thư mục đầu ra")
+        sub.add_argument("--workers", type=int, default=None,
+                         help="Số tiến trình/luồng song song (mặc định: số lõi CPU)")
+        sub.add_argument("--memory_budget_mb", type=int, default=None,
+                         help="Tổng bộ nhớ cho các file xử lý đồng thời (MB)")
+        sub.add_argument("--schedule_order", choices=SCHEDULE_ORDERS, default="largest_first")
+
+    process = commands.add_parser("process", help=cmd_process.__doc__)
+    add_batch_arguments(process)
+    process.add_argument("--output_format", help="Định dạng đầu ra (.png, .jpg, .webp, .tif...)")
+    process.add_argument("--scale_ratio")
+    process.add_argument("--brightness")
+    process.add_argument("--contrast")
+    process.add_argument("--saturation")
+    process.add_argument("--remove_black_bg", type=parse_bool, metavar="BOOL")
+    process.add_argument("--remove_white_bg", type=parse_bool, metavar="BOOL")
+    process.add_argument("--edge_only", action="store_true", help="Chỉ xóa nền nối với mép ảnh")
+    process.add_argument("--fast_downscale", action="store_true",
+                         help="Thu nhỏ nhanh: giải mã rút gọn, thu nhỏ trước khi điều chỉnh (gần đúng)")
+    process.add_argument("--encoder_profile", choices=tuple(ENCODER_PROFILES))
+    process.add_argument("--outputs", help="Nhiều đầu ra từ một lần giải mã, ví dụ \"png:1.0,jpg:0.5:85\"")
+    process.add_argument("--memory_limit_mb", type=int, help="Giới hạn bộ nhớ cho một ảnh (xử lý theo dải khi vượt)")
+    process.add_argument("--incremental", action="store_true", help="Bỏ qua các file không đổi từ lần chạy trước")
+    process.add_argument("--use_hash", action="store_true", help="So sánh cả hash nội dung khi mtime thay đổi")
+    process.add_argument("--stats_report", action="store_true", help="Ghi báo cáo thời gian tiftiff_stats.json vào thư mục đầu ra")
+    process.set_defaults(func=cmd_process)
+
+    reproject = commands.add_parser("reproject", help=cmd_reproject.__doc__)
+    add_batch_arguments(reproject)
+    reproject.add_argument("--target_crs", help="Tên trong danh sách hệ tọa độ của ứng dụng hoặc mã (EPSG:4326)")
+    reproject.add_argument("--memory_limit_mb", type=int, help="Giới hạn bộ nhớ cho một file (chuyển đổi theo khối khi vượt)")
+    reproject.add_argument("--geo_format", help="Định dạng đầu ra: tên như \"GeoJPEG2000 (.jp2)\" hoặc đuôi file (mặc định: giữ đuôi nguồn)")
+    reproject.add_argument("--geo_write_profile", choices=tuple(GEO_WRITE_PROFILES),
+                           help="Chế độ ghi GeoTIFF: source (mặc định) giữ bố cục nguồn, cog_* ghi Cloud-Optimized GeoTIFF")
+    reproject.add_argument("--incremental", action="store_true", help="Bỏ qua các file không đổi từ lần chạy trước")
+    reproject.add_argument("--use_hash", action="store_true", help="So sánh cả hash nội dung khi mtime thay đổi")
+    reproject.add_argument("--num_threads", type=int, help="Số luồng warp GDAL cho mỗi file (mặc định: số lõi CPU)")
+    reproject.add_argument("--warp_mem_limit_mb", type=int, help="Bộ nhớ làm việc tối thiểu của bộ warp GDAL (MB)")
+    reproject.add_argument("--error_threshold", type=float,
+                           help="Sai số tối đa (pixel) của phép chiếu xấp xỉ, 0: chính xác (mặc định 0.125)")
+    reproject.add_argument("--overviews", action="store_true", help="Tạo overview cho ảnh đầu ra")
+    reproject.add_argument("--overview_resampling", choices=OVERVIEW_RESAMPLING)
+    reproject.add_argument("--overview_external", action="store_true", help="Ghi overview ra file .ovr riêng")
+    reproject.add_argument("--warp_grid_cache_mb", type=int, default=WARP_GRID_CACHE_MB,
+                           help="Dung lượng lưới warp dùng lại cho ảnh cùng hình học (MB, 0: tắt)")
+    reproject.add_argument("--stats_report", action="store_true", help="Ghi báo cáo thời gian tiftiff_stats.json vào thư mục đầu ra")
+    reproject.set_defaults(func=cmd_reproject)
+
+    overviews = commands.add_parser("overviews", help=cmd_overviews.__doc__)
+    overviews.add_argument("inputs", nargs="+", help="File hoặc thư mục GeoTIFF")
+    overviews.add_argument("--workers", type=int, default=None,
+                           help="Số file xử lý song song (mặc định: số lõi CPU)")
+    overviews.add_argument("--overview_resampling", choices=OVERVIEW_RESAMPLING)
+    overviews.add_argument("--overview_external", action="store_true", help="Ghi overview ra file .ovr riêng")
+    overviews.add_argument("--force", action="store_true", help="Tạo lại kể cả khi đã có overview hợp lệ")
+    overviews.set_defaults(func=cmd_overviews)
+
+    metadata = commands.add_parser("metadata", help=cmd_metadata.__doc__)
+    metadata.add_argument("inputs", nargs="+", help="File hoặc thư mục ảnh")
+    metadata.add_argument("-o", "--output", required=True, help="File đầu ra (.csv hoặc .json)")
+    metadata.add_argument("--format", choices=("csv", "json"), help="Mặc định theo đuôi file đầu ra")
+    metadata.set_defaults(func=cmd_metadata)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "workers", None) is None and args.command != "metadata":
+        args.workers = os.cpu_count() or 1
+    config = load_config(args.config)
+    return args.func(args, config, ConsoleLogger(args.quiet))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,219 @@
+"""
+Điều chỉnh độ sáng, độ tương phản và độ bão hòa trong một lượt NumPy
+"""
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+# Các chế độ 8-bit có thể áp dụng độ sáng/độ tương phản bằng bảng tra 256 phần tử
+LUT_MODES = ("L", "LA", "RGB", "RGBA")
+
+# Các chế độ không có màu, ImageEnhance.Color không làm thay đổi ảnh
+GRAY_MODES = ("L", "LA")
+
+# Số pixel tối đa trong một khối hàng (giới hạn bộ đệm float32 tạm thời)
+BLOCK_PIXELS = 1 << 20
+
+# Hệ số luma giống hệt Pillow khi chuyển RGB sang L (L24 >> 16)
+_LUMA_R = np.float32(19595)
+_LUMA_G = np.float32(38470)
+_LUMA_B = np.float32(7471)
+_LUMA_ROUND = np.float32(0x8000)
+_LUMA_SCALE = np.float32(1.0 / 65536)
+
+
+def apply_adjustments_pillow(img, brightness=1.0, contrast=1.0, saturation=1.0):
+    """Chuỗi ImageEnhance gốc (Brightness → Contrast → Color), mỗi bước tạo một ảnh trung gian"""
+    brightness = float(brightness)
+    contrast = float(contrast)
+    saturation = float(saturation)
+
+    if brightness != 1.0:
+        img = ImageEnhance.Brightness(img).enhance(brightness)
+    if contrast != 1.0:
+        img = ImageEnhance.Contrast(img).enhance(contrast)
+    if saturation != 1.0:
+        img = ImageEnhance.Color(img).enhance(saturation)
+
+    return img
+
+
+def apply_adjustments(img, brightness=1.0, contrast=1.0, saturation=1.0,
+                      block_pixels=BLOCK_PIXELS, lut_cache=None, mean=None):
+    """
+    Áp dụng độ sáng, độ tương phản và độ bão hòa trong một lượt duy nhất
+
+    Với ảnh 8-bit, độ sáng và độ tương phản được gộp thành một bảng tra (LUT) 256
+    phần tử. Khi độ bão hòa bằng 1.0 (hoặc ảnh xám) bảng tra được áp dụng trực
+    tiếp bằng Image.point. Ngược lại ảnh được duyệt theo từng khối hàng: bảng tra
+    được áp dụng bằng np.take rồi trộn độ bão hòa trên cùng bộ đệm float32.
+    Các bước làm tròn và cắt ngưỡng mô phỏng đúng Image.blend nên kết quả khớp
+    chuỗi ImageEnhance trong ±1 DN.
+
+    Tham số:
+        img (PIL.Image): Ảnh đầu vào
+        brightness (float): Hệ số độ sáng
+        contrast (float): Hệ số độ tương phản
+        saturation (float): Hệ số độ bão hòa
+        block_pixels (int): Số pixel tối đa xử lý trong một khối
+        lut_cache (dict): Bộ nhớ đệm bảng tra dùng chung giữa nhiều ảnh (tùy chọn)
+        mean (int): Mức xám trung bình cho độ tương phản khi img chỉ là một dải
+            của ảnh lớn hơn (None để tính từ chính img)
+
+    Trả về:
+        PIL.Image: Ảnh đã điều chỉnh (cùng chế độ với ảnh đầu vào)
+    """
+    brightness = float(brightness)
+    contrast = float(contrast)
+    saturation = float(saturation)
+
+    if img.mode in GRAY_MODES:
+        saturation = 1.0
+
+    if brightness == 1.0 and contrast == 1.0 and saturation == 1.0:
+        return img
+
+    # Các chế độ không hỗ trợ (P, I;16, CMYK...) dùng lại chuỗi Pillow
+    if img.mode not in LUT_MODES:
+        return apply_adjustments_pillow(img, brightness, contrast, saturation)
+
+    lut = tone_lut(img, brightness, contrast, block_pixels, lut_cache, mean)
+
+    # Chỉ có đường cong tông màu: một lần Image.point là đủ
+    if saturation == 1.0:
+        return img.point(_point_table(lut, img.mode))
+
+    data = np.asarray(img)
+    out = np.empty_like(data)
+    rows = _block_rows(img.width, block_pixels)
+    identity = brightness == 1.0 and contrast == 1.0
+
+    for y0 in range(0, data.shape[0], rows):
+        block = data[y0:y0 + rows]
+        rgb = block[..., :3]
+        if not identity:
+            rgb = np.take(lut, rgb)
+        rgb = rgb.astype(np.float32)
+        _blend_from(rgb, _luma(rgb)[..., None], saturation)
+        out[y0:y0 + rows, :, :3] = rgb
+        if data.shape[2] == 4:
+            out[y0:y0 + rows, :, 3] = block[..., 3]
+
+    return Image.fromarray(out, img.mode)
+
+
+def tone_lut(img, brightness=1.0, contrast=1.0, block_pixels=BLOCK_PIXELS, lut_cache=None, mean=None):
+    """
+    Bảng tra 256 phần tử gộp độ sáng và độ tương phản cho ảnh 8-bit
+
+    Điểm tựa của độ tương phản là mức xám trung bình của ảnh sau khi chỉnh độ sáng,
+    nên khóa của bộ nhớ đệm là (brightness, contrast, mode, mean). Mean chỉ nhận
+    256 giá trị nên cả một lô ảnh chỉ xây dựng bảng tra vài lần.
+    """
+    brightness = float(brightness)
+    contrast = float(contrast)
+
+    if contrast == 1.0:
+        mean = None
+    elif mean is None:
+        mean = _contrast_mean(img, brightness, _block_rows(img.width, block_pixels))
+
+    key = (brightness, contrast, img.mode, mean)
+    if lut_cache is not None and key in lut_cache:
+        return lut_cache[key]
+
+    lut = _brighten(np.arange(256, dtype=np.uint8), brightness)
+    if contrast != 1.0:
+        _blend_from(lut, np.float32(mean), contrast)
+    lut = lut.astype(np.uint8)
+
+    if lut_cache is not None:
+        lut_cache[key] = lut
+    return lut
+
+
+def _point_table(lut, mode):
+    """Bảng cho Image.point: đường cong tông màu cho kênh màu, giữ nguyên kênh alpha"""
+    table = lut.tolist()
+    identity = list(range(256))
+    if mode == "L":
+        return table
+    if mode == "LA":
+        return table + identity
+    if mode == "RGB":
+        return table * 3
+    return table * 3 + identity
+
+
+def _block_rows(width, block_pixels):
+    """Số hàng trong một khối để giới hạn bộ nhớ tạm"""
+    return max(1, int(block_pixels) // max(1, width))
+
+
+def _blend_from(rgb, base, factor):
+    """Mô phỏng Image.blend(base, rgb, factor): cắt về [0, 255] rồi cắt phần thập phân"""
+    rgb -= base
+    rgb *= np.float32(factor)
+    rgb += base
+    np.clip(rgb, 0, 255, out=rgb)
+    np.floor(rgb, out=rgb)
+    return rgb
+
+
+def _luma(rgb):
+    """Tính kênh L giống Pillow từ bộ đệm RGB float32 đã là số nguyên"""
+    luma = rgb[..., 0] * _LUMA_R
+    luma += rgb[..., 1] * _LUMA_G
+    luma += rgb[..., 2] * _LUMA_B
+    luma += _LUMA_ROUND
+    luma *= _LUMA_SCALE
+    np.floor(luma, out=luma)
+    return luma
+
+
+def _brighten(values, brightness):
+    """Chuyển giá trị sang float32 và áp dụng độ sáng"""
+    rgb = values.astype(np.float32)
+    if brightness != 1.0:
+        rgb *= np.float32(brightness)
+        np.clip(rgb, 0, 255, out=rgb)
+        np.floor(rgb, out=rgb)
+    return rgb
+
+
+def contrast_mean(strips, brightness=1.0):
+    """
+    Mức xám trung bình (làm tròn) mà ImageEnhance.Contrast dùng làm điểm tựa
+
+    Tham số:
+        strips (iterable): Các dải ảnh PIL liên tiếp phủ toàn bộ ảnh
+        brightness (float): Hệ số độ sáng được áp dụng trước độ tương phản
+
+    Trả về:
+        int: Mức xám trung bình của ảnh sau khi chỉnh độ sáng
+    """
+    brightness = float(brightness)
+    table = None
+    total = 0
+    count = 0
+
+    for strip in strips:
+        if brightness != 1.0:
+            if table is None:
+                lut = _brighten(np.arange(256, dtype=np.uint8), brightness).astype(np.uint8)
+                table = _point_table(lut, strip.mode)
+            strip = strip.point(table)
+        histogram = strip.convert("L").histogram()
+        total += sum(level * n for level, n in enumerate(histogram))
+        count += strip.width * strip.height
+
+    return int(total / count + 0.5) if count else 0
+
+
+def _contrast_mean(img, brightness, rows):
+    """Mức xám trung bình của toàn ảnh, duyệt theo dải hàng để không tạo bản sao toàn ảnh"""
+    strips = (
+        img.crop((0, y0, img.width, min(img.height, y0 + rows)))
+        for y0 in range(0, img.height, rows)
+    )
+    return contrast_mean(strips, brightness)
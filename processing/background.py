@@ -0,0 +1,326 @@
+"""
+Xóa nền theo màu khóa với dung sai, thao tác trực tiếp trên bộ đệm RGBA
+"""
+
+from collections import namedtuple
+import numpy as np
+from PIL import Image
+
+from processing.adjustments import BLOCK_PIXELS
+
+# Màu nền thường gặp
+BLACK = (0, 0, 0)
+WHITE = (255, 255, 255)
+
+# Dung sai lớn nhất so khớp được trên uint32 (khoảng 2 * dung sai phải nhỏ hơn 128)
+SWAR_MAX_TOLERANCE = 63
+
+
+def _pack(*values):
+    """Giá trị uint32 của 4 byte (r, g, b, a) khi xem một pixel RGBA như uint32 (không phụ thuộc endian)"""
+    values = tuple(values) + (0,) * (4 - len(values))
+    return np.frombuffer(bytes(values), dtype=np.uint32)[0]
+
+
+# Mặt nạ byte dùng khi so khớp trên uint32
+_RGB_MASK = _pack(255, 255, 255, 0)
+_HIGH = _pack(128, 128, 128, 128)
+_RGB_HIGH = _pack(128, 128, 128, 0)
+_RGB_LOW7 = _pack(127, 127, 127, 0)
+
+
+def key_colors(remove_black=False, remove_white=False):
+    """Danh sách màu khóa tương ứng với các tùy chọn xóa nền đen/trắng"""
+    colors = []
+    if remove_black:
+        colors.append(BLACK)
+    if remove_white:
+        colors.append(WHITE)
+    return colors
+
+
+def _in_range(rgb, lo, limit, invert=False):
+    """
+    Kiểm tra lo <= kênh <= lo + span cho cả 3 kênh màu cùng lúc trên uint32
+
+    Phép trừ từng byte không mượn giữa các byte (Hacker's Delight 2-18), sau đó
+    cộng limit = 127 - span vào 7 bit thấp: bit cao của byte được bật khi và chỉ
+    khi byte vượt quá span. Khoảng chạm 0 không cần phép trừ; khoảng chạm 255
+    được kiểm tra trên 255 - kênh (invert).
+    """
+    if invert:
+        diff = rgb ^ _RGB_MASK
+    elif lo:
+        diff = ((rgb | _HIGH) - (lo & ~_HIGH)) ^ ((rgb ^ ~lo) & _HIGH)
+    else:
+        diff = rgb
+
+    test = diff & _RGB_LOW7
+    test += limit
+    test |= diff
+    test &= _RGB_HIGH
+    return test == 0
+
+
+def _swar_range(channel_ranges):
+    """Tham số của _in_range (lo, limit, invert) cho khoảng [lo, lo + span] của 3 kênh"""
+    if all(lo + span == 255 for lo, span in channel_ranges):
+        return _pack(), _pack(*(127 - span for _, span in channel_ranges)), True
+    return _pack(*(lo for lo, _ in channel_ranges)), _pack(*(127 - span for _, span in channel_ranges)), False
+
+
+class KeyColorMatcher:
+    """So khớp màu khóa trên dữ liệu RGBA uint8 theo từng khối hàng"""
+
+    def __init__(self, colors, tolerance=0):
+        """
+        Tham số:
+            colors (list): Các màu khóa (r, g, b)
+            tolerance (int): Sai khác tối đa trên mỗi kênh (0: khớp chính xác)
+        """
+        self.tolerance = int(tolerance)
+
+        # Khoảng [lo, lo + span] của từng kênh cho mỗi màu khóa
+        self.ranges = [
+            [(max(0, c - self.tolerance), min(255, c + self.tolerance) - max(0, c - self.tolerance))
+             for c in color[:3]]
+            for color in colors
+        ]
+        self.keys = [_pack(*color[:3]) for color in colors]
+        self.swar = []
+        if self.tolerance <= SWAR_MAX_TOLERANCE:
+            self.swar = [_swar_range(r) for r in self.ranges]
+
+    def __call__(self, pixels):
+        """
+        Mặt nạ các pixel nền của một khối
+
+        Tham số:
+            pixels (np.ndarray): Khối RGBA (h, w, 4) uint8, liên tục trong bộ nhớ
+
+        Trả về:
+            np.ndarray: Mặt nạ bool (h, w)
+        """
+        if self.tolerance > SWAR_MAX_TOLERANCE:
+            mask = None
+            for channel_ranges in self.ranges:
+                match = None
+                for channel, (lo, span) in enumerate(channel_ranges):
+                    ok = (pixels[..., channel] - np.uint8(lo)) <= span
+                    match = ok if match is None else match & ok
+                mask = match if mask is None else mask | match
+            return mask
+
+        rgb = pixels.view(np.uint32)[..., 0] & _RGB_MASK
+        if self.tolerance <= 0:
+            mask = rgb == self.keys[0]
+            for key in self.keys[1:]:
+                mask |= rgb == key
+        else:
+            mask = _in_range(rgb, *self.swar[0])
+            for params in self.swar[1:]:
+                mask |= _in_range(rgb, *params)
+        return mask
+
+
+def _rgba_buffer(img):
+    """Bản sao RGBA có thể ghi của ảnh (một lần sao chép)"""
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    return np.array(img)
+
+
+def _block_rows(width, block_pixels):
+    return max(1, int(block_pixels) // max(1, width))
+
+
+def remove_key_colors(img, colors, tolerance=0, clear_color=True, block_pixels=BLOCK_PIXELS):
+    """
+    Làm trong suốt các pixel có màu gần với một trong các màu khóa
+
+    Dữ liệu RGBA được sao chép một lần vào một mảng có thể ghi và mỗi pixel được
+    xem như một uint32: khớp chính xác là một phép so sánh, khớp có dung sai kiểm
+    tra cả 3 kênh bằng vài phép toán bit (SWAR). Dung sai lớn hơn SWAR_MAX_TOLERANCE
+    được kiểm tra theo từng kênh bằng phép trừ uint8 tràn vòng. Kênh alpha được
+    ghi tại chỗ theo từng khối hàng và ảnh kết quả dùng chung bộ đệm đó qua
+    Image.frombuffer.
+
+    Tham số:
+        img (PIL.Image): Ảnh đầu vào (được chuyển sang RGBA nếu cần)
+        colors (list): Các màu khóa (r, g, b)
+        tolerance (int): Sai khác tối đa trên mỗi kênh để coi là màu nền (0: khớp chính xác)
+        clear_color (bool): Đặt cả pixel về (0, 0, 0, 0) thay vì chỉ đặt alpha = 0
+        block_pixels (int): Số pixel tối đa xử lý trong một khối
+
+    Trả về:
+        PIL.Image: Ảnh RGBA đã xóa nền
+    """
+    if not colors:
+        return img if img.mode == "RGBA" else img.convert("RGBA")
+
+    data = _rgba_buffer(img)
+    match = KeyColorMatcher(colors, tolerance)
+    rows = _block_rows(data.shape[1], block_pixels)
+
+    for y0 in range(0, data.shape[0], rows):
+        block = data[y0:y0 + rows]
+        _clear(block, match(block), clear_color)
+
+    return Image.frombuffer("RGBA", (data.shape[1], data.shape[0]), data, "raw", "RGBA", 0, 1)
+
+
+def _clear(block, mask, clear_color):
+    """Đặt pixel về (0, 0, 0, 0) hoặc chỉ đặt alpha = 0 tại mặt nạ (ghi tại chỗ)"""
+    if clear_color:
+        block.view(np.uint32)[..., 0][mask] = 0
+    else:
+        block[..., 3][mask] = 0
+
+
+# Các đoạn liên tiếp của mặt nạ trên từng hàng: hàng, cột bắt đầu, cột kết thúc (không tính)
+Runs = namedtuple("Runs", ["rows", "starts", "ends"])
+
+
+def mask_runs(mask, row_offset=0):
+    """
+    Mã hóa mặt nạ thành các đoạn liên tiếp theo hàng (run-length)
+
+    Tham số:
+        mask (np.ndarray): Mặt nạ bool (h, w)
+        row_offset (int): Chỉ số hàng của mask[0] trong ảnh đầy đủ
+
+    Trả về:
+        Runs: Các đoạn, sắp xếp theo hàng rồi theo cột
+    """
+    h, w = mask.shape
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.flatnonzero(np.diff(padded, axis=1))
+    starts, ends = edges[0::2], edges[1::2]
+    rows = starts // (w + 1)
+    return Runs(
+        (rows + row_offset).astype(np.int32),
+        (starts - rows * (w + 1)).astype(np.int32),
+        (ends - rows * (w + 1)).astype(np.int32),
+    )
+
+
+def concat_runs(parts):
+    """Nối các Runs của những khối hàng liên tiếp"""
+    parts = list(parts)
+    if not parts:
+        empty = np.zeros(0, dtype=np.int32)
+        return Runs(empty, empty, empty)
+    return Runs(*(np.concatenate([getattr(p, f) for p in parts]) for f in Runs._fields))
+
+
+def _expand_ranges(lo, hi):
+    """Nối các khoảng chỉ số [lo, hi) thành một mảng (không dùng vòng lặp Python)"""
+    lengths = hi - lo
+    keep = lengths > 0
+    lo, lengths = lo[keep], lengths[keep]
+    if not lengths.size:
+        return lo
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.arange(offsets.size) - offsets + np.repeat(lo, lengths)
+
+
+def edge_connected(runs, height, width):
+    """
+    Chọn các đoạn nền liên thông (4 hướng) với biên ảnh
+
+    Các đoạn là đỉnh của đồ thị; hai đoạn ở hai hàng kề nhau được nối nếu chúng
+    chồng lên nhau theo cột. Vì các đoạn được sắp xếp, các đoạn kề của một đoạn ở
+    hàng trên/dưới là một khoảng chỉ số liên tiếp tìm được bằng searchsorted, nên
+    không cần lưu danh sách cạnh. Duyệt theo chiều rộng (BFS) từ các đoạn chạm biên,
+    mỗi bước xử lý cả tầng bằng NumPy; mỗi đỉnh chỉ vào tầng một lần nên tổng công
+    việc tuyến tính theo số đoạn (cộng chi phí searchsorted), không đệ quy.
+
+    Trả về:
+        Runs: Các đoạn nền nối với biên
+    """
+    n = runs.rows.size
+    if not n:
+        return runs
+
+    stride = np.int64(width) + 1
+    rows = runs.rows.astype(np.int64)
+    key_start = rows * stride + runs.starts
+    key_end = rows * stride + runs.ends
+
+    frontier = np.flatnonzero(
+        (runs.rows == 0) | (runs.rows == height - 1) | (runs.starts == 0) | (runs.ends == width)
+    )
+    visited = np.zeros(n, dtype=bool)
+    visited[frontier] = True
+
+    while frontier.size:
+        base_start = rows[frontier] * stride + runs.starts[frontier]
+        base_end = rows[frontier] * stride + runs.ends[frontier]
+
+        neighbors = []
+        for step in (-stride, stride):
+            lo = np.searchsorted(key_end, base_start + step, side="right")
+            hi = np.searchsorted(key_start, base_end + step, side="left")
+            neighbors.append(_expand_ranges(lo, hi))
+        neighbors = np.concatenate(neighbors)
+
+        frontier = neighbors[~visited[neighbors]]
+        visited[frontier] = True
+
+    return Runs(runs.rows[visited], runs.starts[visited], runs.ends[visited])
+
+
+def runs_mask(runs, y0, y1, width):
+    """Mặt nạ bool (y1 - y0, width) của các đoạn thuộc hàng [y0, y1)"""
+    i0, i1 = np.searchsorted(runs.rows, [y0, y1])
+    rows = runs.rows[i0:i1] - y0
+    marks = np.zeros((y1 - y0, width + 1), dtype=np.int8)
+    marks[rows, runs.starts[i0:i1]] = 1
+    marks[rows, runs.ends[i0:i1]] = -1
+    return np.cumsum(marks, axis=1, dtype=np.int8)[:, :width] > 0
+
+
+def background_runs(img, colors, tolerance=0, block_pixels=BLOCK_PIXELS, row_offset=0):
+    """Các đoạn pixel nền (chưa lọc liên thông) của một ảnh hoặc một dải"""
+    data = np.asarray(img if img.mode == "RGBA" else img.convert("RGBA"))
+    match = KeyColorMatcher(colors, tolerance)
+    rows = _block_rows(data.shape[1], block_pixels)
+    return concat_runs(
+        mask_runs(match(data[y0:y0 + rows]), row_offset + y0)
+        for y0 in range(0, data.shape[0], rows)
+    )
+
+
+def clear_runs(img, runs, row_offset=0, clear_color=True, block_pixels=BLOCK_PIXELS):
+    """
+    Làm trong suốt các pixel thuộc các đoạn đã cho
+
+    Tham số:
+        img (PIL.Image): Ảnh hoặc một dải của ảnh
+        runs (Runs): Các đoạn theo tọa độ của ảnh đầy đủ
+        row_offset (int): Chỉ số hàng của hàng đầu tiên của img trong ảnh đầy đủ
+    """
+    data = _rgba_buffer(img)
+    rows = _block_rows(data.shape[1], block_pixels)
+
+    for y0 in range(0, data.shape[0], rows):
+        block = data[y0:y0 + rows]
+        y1 = y0 + block.shape[0]
+        _clear(block, runs_mask(runs, row_offset + y0, row_offset + y1, data.shape[1]), clear_color)
+
+    return Image.frombuffer("RGBA", (data.shape[1], data.shape[0]), data, "raw", "RGBA", 0, 1)
+
+
+def remove_edge_background(img, colors, tolerance=0, clear_color=True, block_pixels=BLOCK_PIXELS):
+    """
+    Chỉ xóa các vùng nền liên thông với biên ảnh
+
+    Pixel có màu nền nằm bên trong nội dung (đường trắng/đen trên bản đồ quét...)
+    được giữ nguyên. Tham số giống remove_key_colors.
+    """
+    if not colors:
+        return img if img.mode == "RGBA" else img.convert("RGBA")
+
+    runs = edge_connected(background_runs(img, colors, tolerance, block_pixels), img.height, img.width)
+    return clear_runs(img, runs, 0, clear_color, block_pixels)
@@ -0,0 +1,161 @@
+"""
+Bộ máy xử lý hàng loạt đa tiến trình cho ImageProcessor
+"""
+
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from processing.scheduler import BatchScheduler
+from processing.tiled_processor import TiledProcessor
+from processing.timing import ImageTimings
+
+# Tên tùy chọn (thuộc tính của đối tượng options hoặc khóa của dict) và tham số
+# tương ứng của ImageProcessor.process_image
+OPTION_FIELDS = {
+    "export_format": "output_format",
+    "output_format": "output_format",
+    "scale_ratio": "scale_ratio",
+    "remove_black": "remove_black",
+    "remove_white": "remove_white",
+    "brightness": "brightness",
+    "contrast": "contrast",
+    "saturation": "saturation",
+    "tiled": "tiled",
+    "memory_limit_mb": "memory_limit_mb",
+    "edge_only": "edge_only",
+    "outputs": "outputs",
+    "encoder_profile": "encoder_profile",
+    "fast_downscale": "fast_downscale",
+}
+
+# Kết quả xử lý một ảnh gửi về tiến trình chính (timings: ImageTimings.as_dict())
+BatchResult = namedtuple(
+    "BatchResult", ["image_path", "output_path", "messages", "error", "timings"], defaults=(None,)
+)
+
+# Bộ xử lý của tiến trình con, được tạo một lần trong _init_worker
+_worker_processor = None
+
+
+def normalize_options(options):
+    """
+    Chuyển tùy chọn xử lý (dict hoặc đối tượng có thuộc tính) thành tham số của process_image
+
+    Chỉ những tùy chọn có mặt mới được trả về để không ghi đè giá trị mặc định.
+
+    Trả về:
+        dict: Tham số từ khóa cho process_image (có thể pickle để gửi sang tiến trình con)
+    """
+    if not options:
+        return {}
+
+    kwargs = {}
+    for name, param in OPTION_FIELDS.items():
+        if isinstance(options, dict):
+            if name in options:
+                kwargs[param] = options[name]
+        elif hasattr(options, name):
+            kwargs[param] = getattr(options, name)
+    return kwargs
+
+
+class BufferedLogger:
+    """Logger nhẹ cho tiến trình con: gom thông điệp để gửi về tiến trình chính"""
+
+    def __init__(self):
+        self.messages = []
+
+    def log(self, message, *args, **kwargs):
+        self.messages.append(message)
+
+    def drain(self):
+        """Lấy và xóa các thông điệp đã gom"""
+        messages, self.messages = self.messages, []
+        return messages
+
+
+def _init_worker(language):
+    """Khởi tạo tiến trình con: một ImageProcessor với logger đệm, dùng cho mọi ảnh"""
+    global _worker_processor
+    from processing.image_processor import ImageProcessor
+    _worker_processor = ImageProcessor(logger=BufferedLogger(), language=language)
+
+
+def _process_one(processor, image_path, output_dir, kwargs):
+    """Xử lý một ảnh, bắt mọi lỗi để một ảnh hỏng không dừng cả lô"""
+    timings = ImageTimings()
+    try:
+        output_path = processor.process_image(image_path, output_dir, timings=timings, **kwargs)
+        error = None
+    except Exception as e:
+        output_path, error = None, str(e)
+
+    messages = processor.logger.drain() if isinstance(processor.logger, BufferedLogger) else []
+    return BatchResult(image_path, output_path, messages, error, timings.as_dict())
+
+
+def _run_task(image_path, output_dir, kwargs):
+    """Tác vụ chạy trong tiến trình con"""
+    return _process_one(_worker_processor, image_path, output_dir, kwargs)
+
+
+def make_scheduler(processor, kwargs, order="largest_first", memory_budget_mb=None, max_workers=None):
+    """Bộ xếp lịch với mô hình chi phí của process_image cho các tham số đã cho"""
+    output_format = kwargs.get("output_format") or ".png"
+    if not output_format.startswith("."):
+        output_format = "." + output_format
+    tiled = kwargs.get("tiled", "auto")
+    tiled_processor = TiledProcessor(processor, kwargs.get("memory_limit_mb"))
+
+    return BatchScheduler(
+        lambda task: tiled_processor.peak_memory(task, output_format, tiled),
+        memory_budget_mb, order, max_workers
+    )
+
+
+def iter_batch(processor, image_files, output_dir, kwargs, max_workers=None,
+               order="largest_first", memory_budget_mb=None):
+    """
+    Xử lý một lô ảnh, trả về kết quả theo thứ tự hoàn thành
+
+    Mỗi ảnh là một tác vụ riêng nên một ảnh lớn không giữ chân cả nhóm ảnh khác.
+    Tiến trình con được khởi tạo một lần với bộ xử lý nhẹ; chỉ đường dẫn và tùy
+    chọn được gửi đi, thông điệp log và lỗi được gửi về cùng kết quả. Thứ tự và
+    số tác vụ chạy đồng thời do BatchScheduler quyết định theo ngân sách bộ nhớ.
+
+    Tham số:
+        processor (ImageProcessor): Bộ xử lý của tiến trình chính (dùng khi chạy tuần tự)
+        image_files (list): Danh sách đường dẫn ảnh
+        output_dir (str): Thư mục đầu ra
+        kwargs (dict): Tham số cho process_image (xem normalize_options)
+        max_workers (int): Số tiến trình con (None: số lõi CPU)
+        order (str): "largest_first" hoặc "shortest_first"
+        memory_budget_mb (int): Tổng bộ nhớ cho các ảnh xử lý đồng thời (MB)
+
+    Trả về (generator):
+        BatchResult: Kết quả từng ảnh
+    """
+    max_workers = min(max_workers or os.cpu_count() or 1, len(image_files))
+    scheduler = make_scheduler(processor, kwargs, order, memory_budget_mb, max_workers)
+
+    if max_workers <= 1:
+        for task in scheduler.plan(image_files):
+            yield _process_one(processor, task.path, output_dir, kwargs)
+        return
+
+    executor = ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(processor.language,)
+    )
+    try:
+        submit = lambda image_path: executor.submit(_run_task, image_path, output_dir, kwargs)
+        for task, future in scheduler.run(submit, image_files):
+            try:
+                yield future.result()
+            except Exception as e:
+                # Tiến trình con bị dừng đột ngột (hết bộ nhớ...)
+                yield BatchResult(task.path, None, [], str(e))
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -3,20 +3,114 @@ Xử lý dữ liệu địa lý cho ảnh GeoTIFF
 """
 
 import os
+import shutil
+import time
+from collections import namedtuple
 import numpy as np
 import rasterio
-from rasterio.warp import calculate_default_transform, reproject, Resampling
+from rasterio.warp import reproject, Resampling
+from rasterio.crs import CRS
 from rasterio.errors import RasterioIOError, CRSError
+from rasterio.windows import Window
+from rasterio.vrt import WarpedVRT
+import rasterio.shutil
 import concurrent.futures
-from resources.constants import COMMON_CRS
+from contextlib import contextmanager, nullcontext
+from resources.constants import (
+    COMMON_CRS, DEFAULT_MEMORY_LIMIT_MB, COG_OPTIONS, GEO_WRITE_PROFILES, DEFAULT_GEO_WRITE_PROFILE,
+    OVERVIEW_RESAMPLING, DEFAULT_OVERVIEW_RESAMPLING, OVERVIEW_MIN_SIZE, WARP_GRID_CACHE_MB
+)
+from resources.translations import get_translation
+from processing.scheduler import BatchScheduler
+from processing.manifest import BatchManifest
+from processing.timing import ImageTimings, BatchStats, BatchResult
+from processing.warp_cache import (
+    TransformCache, WarpGridCache, build_warp_grid, apply_warp_grid, index_warp_nbytes,
+    grid_size_estimate, stats_delta
+)
+
+# Bộ nhớ đỉnh ước tính khi chuyển đổi mọi band một lúc: ảnh nguồn, ảnh đích (thường
+# lớn hơn nguồn do khung bao bị xoay) và bộ đệm làm việc của GDAL cho cả hai, tính
+# theo số byte ảnh nguồn (đo được khoảng 4.5 lần với ảnh 12 band)
+REPROJECT_BAND_FACTOR = 5
+
+# Chuyển đổi theo khối: dung lượng tối đa (MB) của một dải đích (đủ chiều rộng, mọi
+# band) và bộ nhớ làm việc của bộ warp GDAL cho mỗi dải
+REPROJECT_BLOCK_MB = 64
+REPROJECT_WARP_MEM_MB = 64
+
+# Sai số tối đa (pixel) của bộ biến đổi xấp xỉ: GDAL chỉ tính phép chiếu chính xác
+# tại một số điểm trên mỗi dòng rồi nội suy tuyến tính. 0.125 là mặc định của GDAL
+# (gdalwarp -et) và của rasterio.warp.reproject
+REPROJECT_ERROR_THRESHOLD = 0.125
+
+# Ghi COG: driver COG của GDAL chỉ sao chép từ một ảnh có sẵn, nên dữ liệu được ghi
+# trước vào file tạm có tile, không nén (ghi nhanh, đọc lại theo khối khi sao chép)
+COG_STAGING_SUFFIX = ".tiftiff_tmp.tif"
+COG_STAGING_OPTIONS = {'tiled': True, 'blockxsize': 512, 'blockysize': 512, 'BIGTIFF': 'IF_SAFER'}
+
+# Tham số của rasterio.open mô tả ảnh (mọi khóa khác là tùy chọn tạo file)
+DATASET_KEYS = ('driver', 'width', 'height', 'count', 'dtype', 'crs', 'transform', 'nodata')
+
+# Tùy chọn tạo file của người dùng khi ghi COG: tên GTiff tương đương, giá trị
+# predictor dạng số và các tùy chọn driver COG nhận (không gồm các tùy chọn tự
+# chuyển đổi hệ tọa độ như TILING_SCHEME, TARGET_SRS)
+COG_OPTION_ALIASES = {'ZLEVEL': 'LEVEL', 'ZSTD_LEVEL': 'LEVEL', 'JPEG_QUALITY': 'QUALITY', 'WEBP_LEVEL': 'QUALITY'}
+COG_PREDICTORS = {'1': 'NO', '2': 'STANDARD', '3': 'FLOATING_POINT'}
+COG_CREATION_OPTIONS = frozenset({
+    'COMPRESS', 'LEVEL', 'PREDICTOR', 'QUALITY', 'MAX_Z_ERROR', 'NBITS', 'BLOCKSIZE', 'BIGTIFF',
+    'NUM_THREADS', 'OVERVIEWS', 'OVERVIEW_COUNT', 'OVERVIEW_RESAMPLING', 'RESAMPLING',
+    'OVERVIEW_COMPRESS', 'OVERVIEW_PREDICTOR', 'OVERVIEW_QUALITY', 'MAX_Z_ERROR_OVERVIEW',
+    'GEOTIFF_VERSION', 'SPARSE_OK', 'STATISTICS',
+})
+
+# Kích thước khối (pixel) của overview được GDAL tính song song theo từng khối
+OVERVIEW_BLOCK_SIZE = 512
+
+# Một file trong lô chuyển đổi: ảnh nguồn, ảnh đích và driver GDAL (None: theo đuôi file đích)
+ReprojectJob = namedtuple("ReprojectJob", ["src_path", "dst_path", "driver"], defaults=(None,))
+
+# Sự kiện tiến trình của lô gửi cho người gọi. status: "started", "completed", "copied",
+# "skipped" hoặc "failed" (tạo overview: "built", "valid"); done/total: số file đã xong
+# trên tổng số file của lô
+ReprojectEvent = namedtuple("ReprojectEvent", ["status", "job", "done", "total", "error"], defaults=(None,))
 
 class GeoProcessor:
     """Lớp xử lý dữ liệu địa lý cho ảnh GeoTIFF"""
     
-    def __init__(self, logger=None):
-        """Khởi tạo với tham số tùy chọn"""
+    def __init__(self, logger=None, language="en", memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB,
+                 num_threads=None, warp_mem_limit_mb=REPROJECT_WARP_MEM_MB,
+                 error_threshold=REPROJECT_ERROR_THRESHOLD, write_profile=DEFAULT_GEO_WRITE_PROFILE,
+                 warp_grid_cache_mb=WARP_GRID_CACHE_MB):
+        """
+        Khởi tạo với tham số tùy chọn
+        
+        Tham số:
+            memory_limit_mb (int): Bộ nhớ tối đa (MB) khi chuyển đổi cả ảnh một lúc;
+                file vượt quá được chuyển đổi theo khối (xem reproject_raster)
+            num_threads (int): Số luồng của bộ warp GDAL cho mỗi file (mặc định: số lõi CPU)
+            warp_mem_limit_mb (int): Bộ nhớ làm việc tối thiểu (MB) của bộ warp GDAL (được
+                nâng lên khi cần để GDAL không chia nhỏ ảnh hoặc dải đang chuyển đổi)
+            error_threshold (float): Sai số tối đa (pixel) của bộ biến đổi xấp xỉ
+            write_profile (str): Chế độ ghi GeoTIFF mặc định (GEO_WRITE_PROFILES)
+            warp_grid_cache_mb (int): Dung lượng tối đa (MB) của các lưới warp dùng lại cho
+                ảnh cùng hình học (0: không dùng lưới warp)
+        """
         self.logger = logger
+        self.language = language
+        self.memory_limit = (memory_limit_mb or DEFAULT_MEMORY_LIMIT_MB) * 1024 * 1024
+        self.num_threads = max(1, num_threads or os.cpu_count() or 1)
+        self.warp_mem_limit_mb = warp_mem_limit_mb or REPROJECT_WARP_MEM_MB
+        self.error_threshold = REPROJECT_ERROR_THRESHOLD if error_threshold is None else error_threshold
+        self.write_profile = write_profile or DEFAULT_GEO_WRITE_PROFILE
         self.common_crs = COMMON_CRS
+        self.transform_cache = TransformCache()
+        self.warp_grid_cache = WarpGridCache(warp_grid_cache_mb) if warp_grid_cache_mb else None
+        self.batch_stats = None
+    
+    def _(self, key):
+        """Dịch thông điệp log theo ngôn ngữ của bộ xử lý"""
+        return get_translation(key, self.language) or key
     
     def log(self, message):
         """Ghi log nếu logger được cung cấp"""
@@ -35,35 +129,357 @@ class GeoProcessor:
             self.log(f"❌ {self._('error_prefix')}: {self._('crs_read_error')} - {str(e)}")
             return None
     
-    def batch_reproject(self, input_files, output_dir, dst_crs, options=None):
-        """Chuyển đổi hệ tọa độ hàng loạt sử dụng đa luồng"""
-        if not input_files:
-            return []
+    def estimate_reproject_memory(self, task):
+        """Bộ nhớ đỉnh (byte) ước tính để chuyển đổi một file (BatchTask)"""
+        full = task.width * task.height * max(1, task.bands) * task.sample_bytes * REPROJECT_BAND_FACTOR
+        if full <= self.memory_limit:
+            return full
+        # Theo khối: một dải đích và bộ nhớ của bộ warp, không phụ thuộc kích thước file
+        return max(REPROJECT_BLOCK_MB * REPROJECT_BAND_FACTOR,
+                   REPROJECT_BLOCK_MB + self.warp_mem_limit_mb) * 1024 * 1024
+    
+    def use_windowed(self, src, windowed="auto"):
+        """Quyết định chuyển đổi theo khối (windowed: True, False hoặc "auto")"""
+        if windowed != "auto":
+            return bool(windowed)
+        raster_bytes = src.width * src.height * src.count * np.dtype(src.dtypes[0]).itemsize
+        return raster_bytes * REPROJECT_BAND_FACTOR > self.memory_limit
+    
+    def warp_options(self, warp_mem_limit_mb=None, num_threads=None):
+        """Tham số chung cho rasterio.warp.reproject (mọi band trong một lần gọi)"""
+        return {
+            'resampling': Resampling.nearest,
+            'num_threads': num_threads or self.num_threads,
+            'warp_mem_limit': max(self.warp_mem_limit_mb, warp_mem_limit_mb or 0),
+        }
+    
+    def cog_options(self, write_profile=None, num_threads=None):
+        """
+        Tùy chọn tạo COG của một chế độ ghi
         
-        # Sử dụng ThreadPoolExecutor để xử lý đa luồng
-        with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
-            # Submit các nhiệm vụ
-            future_to_file = {
-                executor.submit(self.reproject_raster, src_path, 
-                                os.path.join(output_dir, os.path.basename(src_path)),
-                                dst_crs, options): src_path 
-                for src_path in input_files
-            }
+        Trả về:
+            dict: Tùy chọn cho driver COG, None nếu chế độ ghi giữ bố cục file nguồn
+        """
+        write_profile = write_profile or self.write_profile
+        if write_profile not in GEO_WRITE_PROFILES:
+            raise ValueError(f"Chế độ ghi GeoTIFF không hỗ trợ: {write_profile}")
+        profile = GEO_WRITE_PROFILES[write_profile]
+        if profile is None:
+            return None
+        options = dict(COG_OPTIONS, **profile)
+        options['NUM_THREADS'] = num_threads or self.num_threads
+        return options
+    
+    @contextmanager
+    def _open_output(self, dst_path, out_kwargs, cog_options=None, timings=None):
+        """
+        Mở ảnh đích để ghi
+        
+        Với cog_options (chỉ áp dụng cho driver GTiff), dữ liệu được ghi vào file tạm
+        rồi sao chép sang COG khi khối with kết thúc: tile, nén, overview bên trong
+        và BigTIFF khi cần do driver COG của GDAL đảm nhận; tùy chọn tạo file trong
+        out_kwargs được áp dụng cho bản COG (xem _split_cog_options). Thời gian sao
+        chép được cộng vào giai đoạn "encode" của timings (ImageTimings).
+        """
+        if not cog_options or out_kwargs.get('driver') != 'GTiff':
+            with rasterio.open(dst_path, 'w', **out_kwargs) as dst:
+                yield dst
+            return
+        
+        out_kwargs, cog_options = self._split_cog_options(out_kwargs, cog_options)
+        staging_path = dst_path + COG_STAGING_SUFFIX
+        try:
+            with rasterio.open(staging_path, 'w', **dict(out_kwargs, **COG_STAGING_OPTIONS)) as dst:
+                yield dst
+            with timings.measure("encode") if timings is not None else nullcontext():
+                rasterio.shutil.copy(staging_path, dst_path, driver='COG', **cog_options)
+        finally:
+            if os.path.exists(staging_path):
+                os.remove(staging_path)
+    
+    def _split_cog_options(self, out_kwargs, cog_options):
+        """
+        Tách out_kwargs thành tham số của file tạm và tùy chọn của driver COG
+        
+        Tùy chọn tạo file của người dùng (compress, predictor, zlevel, blockxsize...)
+        ghi đè tùy chọn của chế độ ghi; khi đổi bộ nén, LEVEL và PREDICTOR của chế độ
+        ghi bị bỏ vì thuộc về bộ nén cũ. Tùy chọn driver COG không nhận được bỏ qua
+        kèm cảnh báo.
+        
+        Trả về:
+            tuple: (tham số rasterio.open của file tạm, tùy chọn driver COG)
+        """
+        dataset = {key: value for key, value in out_kwargs.items() if key in DATASET_KEYS}
+        creation = {key.upper(): value for key, value in out_kwargs.items() if key not in DATASET_KEYS}
+        user, ignored = {}, []
+        
+        # COG luôn chia tile vuông
+        blocks = {creation.pop('BLOCKXSIZE', None), creation.pop('BLOCKYSIZE', None)} - {None}
+        if len(blocks) == 1:
+            user['BLOCKSIZE'] = blocks.pop()
+        elif blocks:
+            ignored.append('BLOCKXSIZE/BLOCKYSIZE')
+        if str(creation.pop('TILED', True)).upper() not in ('TRUE', 'YES', '1'):
+            ignored.append('TILED')
+            
+        for key, value in creation.items():
+            key = COG_OPTION_ALIASES.get(key, key)
+            if key not in COG_CREATION_OPTIONS:
+                ignored.append(key)
+                continue
+            if key in ('PREDICTOR', 'OVERVIEW_PREDICTOR'):
+                value = COG_PREDICTORS.get(str(value), value)
+            user[key] = value
             
+        options = dict(cog_options)
+        if 'COMPRESS' in user and str(user['COMPRESS']).upper() != str(options.get('COMPRESS', '')).upper():
+            options.pop('LEVEL', None)
+            options.pop('PREDICTOR', None)
+        options.update(user)
+        
+        if ignored:
+            self.log(f"⚠️ {self._('warning_prefix')}: {self._('cog_option_ignored')} - {', '.join(ignored)}")
+        return dataset, options
+    
+    def plan_parallelism(self, file_count, max_workers=None):
+        """
+        Số file chạy song song và số luồng warp GDAL cho mỗi file
+        
+        Song song lồng nhau: số file × số luồng GDAL không vượt số lõi CPU. Lô nhiều
+        file dùng hết lõi cho các file (1 luồng GDAL mỗi file), lô ít file chia số lõi
+        còn lại cho bộ warp của từng file (tối đa num_threads).
+        
+        Trả về:
+            tuple: (số file đồng thời, số luồng GDAL mỗi file)
+        """
+        cores = os.cpu_count() or 1
+        workers = max(1, min(max_workers or cores, file_count))
+        threads = max(1, min(self.num_threads, cores // workers))
+        return workers, threads
+    
+    def _warped_vrt(self, src, dst, dst_transform, dst_crs, num_threads=None):
+        """
+        Nguồn warp khi sai số xấp xỉ khác mặc định
+        
+        rasterio.warp.reproject luôn dùng sai số 0.125 pixel; chỉ WarpedVRT nhận tham
+        số này (GDAL không chấp nhận 0 nên giá trị rất nhỏ được dùng thay cho phép
+        chiếu chính xác).
+        """
+        return WarpedVRT(
+            src, crs=dst_crs, transform=dst_transform, width=dst.width, height=dst.height,
+            resampling=Resampling.nearest, tolerance=max(self.error_threshold, 1e-6),
+            warp_mem_limit=self.warp_mem_limit_mb,
+            warp_extras={'NUM_THREADS': num_threads or self.num_threads}
+        )
+    
+    def use_default_threshold(self):
+        """Sai số xấp xỉ là mặc định của rasterio.warp.reproject"""
+        return self.error_threshold == REPROJECT_ERROR_THRESHOLD
+    
+    def reproject_jobs(self, input_files, output_dir, output_ext=None, driver=None):
+        """
+        Tạo danh sách ReprojectJob cho các file đầu vào
+        
+        Tham số:
+            input_files (list): Đường dẫn ảnh nguồn (hoặc ReprojectJob, giữ nguyên)
+            output_dir (str): Thư mục đầu ra
+            output_ext (str): Đuôi file đầu ra (None: giữ đuôi file nguồn)
+            driver (str): Driver GDAL (None: theo đuôi file đầu ra)
+        """
+        jobs = []
+        for item in input_files:
+            if isinstance(item, ReprojectJob):
+                jobs.append(item)
+                continue
+            name = os.path.basename(item)
+            if output_ext:
+                name = os.path.splitext(name)[0] + output_ext
+            jobs.append(ReprojectJob(item, os.path.join(output_dir, name), driver))
+        return jobs
+    
+    def batch_reproject(self, input_files, output_dir, dst_crs, options=None,
+                        schedule_order="largest_first", memory_budget_mb=None, max_workers=None,
+                        output_ext=None, driver=None, progress=None, incremental=False, use_hash=False,
+                        write_profile=None, overviews=None, stats_report=False):
+        """
+        Chuyển đổi hệ tọa độ hàng loạt sử dụng đa luồng
+        
+        Các file được sắp xếp theo chi phí ước tính từ header và chỉ chạy đồng thời
+        khi tổng bộ nhớ còn trong ngân sách (xem BatchScheduler). Số file đồng thời và
+        số luồng warp GDAL của mỗi file được chia theo số lõi CPU (plan_parallelism).
+        
+        Tham số:
+            input_files (list): Đường dẫn ảnh nguồn hoặc ReprojectJob (đích, driver riêng)
+            output_dir (str): Thư mục đầu ra
+            dst_crs (str): Hệ tọa độ đích
+            options (dict): Tùy chọn tạo file bổ sung (xem reproject_raster)
+            output_ext (str), driver (str): Định dạng đầu ra mặc định của các file
+            progress (callable): Nhận ReprojectEvent khi một file bắt đầu, hoàn thành,
+                được bỏ qua hoặc lỗi (gọi từ luồng gọi batch_reproject)
+            incremental (bool): Bỏ qua các file không đổi theo manifest trong thư mục đầu ra
+            use_hash (bool): So sánh cả hash nội dung khi mtime thay đổi
+            write_profile (str): Chế độ ghi GeoTIFF (None: write_profile của bộ xử lý)
+            overviews (dict): Tạo overview cho ảnh đầu ra sau khi chuyển đổi, giá trị là
+                tham số của build_overviews ({"resampling": "average", "external": True});
+                None: không tạo
+            stats_report (bool): Ghi báo cáo thời gian và tỷ lệ trúng bộ nhớ đệm
+                (tiftiff_stats.json) vào thư mục đầu ra
+        
+        Trả về:
+            BatchResult: Đường dẫn các ảnh đã chuyển đổi (kể cả ảnh được bỏ qua vì không
+                đổi), thống kê của các ảnh đã chuyển đổi ở thuộc tính stats
+        """
+        jobs = self.reproject_jobs(input_files, output_dir, output_ext, driver)
+        if not jobs:
+            return BatchResult()
+        write_profile = write_profile or self.write_profile
+        
+        os.makedirs(output_dir, exist_ok=True)
+        total = len(jobs)
+        done = 0
+        results = []
+        notify = progress or (lambda event: None)
+        # Mọi tùy chọn ảnh hưởng đến pixel hoặc bố cục file đầu ra, kể cả của bộ xử lý
+        # (sai số phép chiếu xấp xỉ, bộ nhớ warp quyết định cách GDAL chia khối)
+        job_options = lambda job: {
+            'dst_crs': str(dst_crs), 'driver': job.driver,
+            'ext': os.path.splitext(job.dst_path)[1].lower(), 'options': options,
+            'write_profile': write_profile, 'overviews': overviews,
+            'error_threshold': self.error_threshold, 'warp_mem_limit_mb': self.warp_mem_limit_mb
+        }
+        
+        manifest = None
+        if incremental:
+            manifest = BatchManifest(output_dir, use_hash)
+            pending = []
+            for job in jobs:
+                if manifest.is_up_to_date(job.src_path, job_options(job)):
+                    done += 1
+                    results.extend(manifest.outputs(job.src_path))
+                    notify(ReprojectEvent("skipped", job, done, total))
+                else:
+                    pending.append(job)
+            if len(pending) < total:
+                self.log(f"⏭️ {self._('info_prefix')}: {self._('skipped_unchanged')} - {total - len(pending)}")
+            jobs = pending
+        
+        by_path = {job.src_path: job for job in jobs}
+        job_timings = {job.src_path: ImageTimings() for job in jobs}
+        stats = BatchStats()
+        cache_before = self.cache_stats()
+        start_time = time.perf_counter()
+        workers, threads = self.plan_parallelism(len(jobs), max_workers)
+        if jobs:
+            self.log(f"⚙️ {self._('info_prefix')}: {self._('reproject_plan')} - {workers} × {threads} GDAL")
+        scheduler = BatchScheduler(self.estimate_reproject_memory, memory_budget_mb, schedule_order, workers)
+        
+        def submit(src_path):
+            job = by_path[src_path]
+            notify(ReprojectEvent("started", job, done, total))
+            return executor.submit(self._run_job, job, dst_crs, options, threads, write_profile, overviews,
+                                   job_timings[src_path])
+        
+        # Sử dụng ThreadPoolExecutor để xử lý đa luồng
+        with concurrent.futures.ThreadPoolExecutor(max_workers=scheduler.max_workers) as executor:
             # Thu thập kết quả
-            results = []
-            for future in concurrent.futures.as_completed(future_to_file):
-                src_path = future_to_file[future]
+            for task, future in scheduler.run(submit, list(by_path)):
+                job = by_path[task.path]
+                done += 1
                 try:
-                    result = future.result()
-                    if result:
-                        results.append(result)
+                    status = future.result()
                 except Exception as e:
-                    self.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} {os.path.basename(src_path)} - {str(e)}")
-            
-            return results
+                    status = None
+                    self.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} {os.path.basename(task.path)} - {str(e)}")
+                    notify(ReprojectEvent("failed", job, done, total, str(e)))
+                else:
+                    notify(ReprojectEvent(status or "failed", job, done, total))
+                
+                if status:
+                    results.append(job.dst_path)
+                    stats.add(job.src_path, job_timings[job.src_path])
+                    if manifest:
+                        manifest.record(job.src_path, job_options(job), [job.dst_path])
+                elif manifest:
+                    manifest.forget(job.src_path)
+        
+        if manifest:
+            manifest.save()
+        
+        if jobs:
+            stats.elapsed = time.perf_counter() - start_time
+            cache_after = self.cache_stats()
+            stats.extra.update({
+                name: stats_delta(cache_before[name], cache_after[name]) for name in cache_after
+            })
+            self._report_batch_stats(stats, output_dir, stats_report)
+        return BatchResult(results, stats if jobs else None)
     
-    def reproject_raster(self, src_path, dst_path, dst_crs, options=None):
+    def cache_stats(self):
+        """Số lần trúng/trượt của bộ nhớ đệm transform và lưới warp (KeyedCache.stats)"""
+        caches = {"transform_cache": self.transform_cache, "warp_grid_cache": self.warp_grid_cache}
+        return {name: cache.stats() for name, cache in caches.items() if cache is not None}
+    
+    def _report_batch_stats(self, stats, output_dir, stats_report=False):
+        """Lưu thống kê của lô vào self.batch_stats, ghi log tóm tắt và báo cáo JSON"""
+        self.batch_stats = stats
+        for stage, entry in stats.summary().items():
+            self.log(
+                f"⏱️ {self._('info_prefix')}: {self._('pipeline_stage')} {stage} - "
+                f"p50 {entry['p50_s'] * 1000:.1f} ms, p90 {entry['p90_s'] * 1000:.1f} ms, "
+                f"{entry['total_s']:.2f} s ({entry['share'] * 100:.0f}%)"
+            )
+        for name in ("transform_cache", "warp_grid_cache"):
+            entry = stats.extra.get(name)
+            if entry and entry["hit_rate"] is not None:
+                self.log(
+                    f"♻️ {self._('info_prefix')}: {self._(name)} - {entry['hits']}/"
+                    f"{entry['hits'] + entry['misses']} ({entry['hit_rate'] * 100:.0f}%)"
+                )
+        
+        if stats_report and stats.images:
+            try:
+                path = stats.save(output_dir)
+                self.log(f"📄 {self._('info_prefix')}: {self._('stats_report_saved')} {path}")
+            except OSError as e:
+                self.log(f"⚠️ {self._('warning_prefix')}: {self._('stats_report_saved')} - {e}")
+    
+    def _run_job(self, job, dst_crs, options=None, num_threads=None, write_profile=None, overviews=None,
+                 timings=None):
+        """
+        Chuyển đổi một file của lô; file đã ở hệ tọa độ đích và cùng định dạng được sao
+        chép (trừ khi phải ghi lại thành COG); sau đó tạo overview nếu được yêu cầu
+        
+        Trả về:
+            str: "completed", "copied" hoặc None nếu lỗi
+        """
+        status = None
+        same_format = os.path.splitext(job.src_path)[1].lower() == os.path.splitext(job.dst_path)[1].lower()
+        keep_layout = self.cog_options(write_profile) is None or self._get_driver_from_path(job.dst_path) != 'GTiff'
+        if same_format and keep_layout and not options and job.driver in (None, self._get_driver_from_path(job.src_path)):
+            source_crs = self.detect_crs(job.src_path)
+            if source_crs and CRS.from_user_input(source_crs) == CRS.from_user_input(dst_crs):
+                os.makedirs(os.path.dirname(job.dst_path) or ".", exist_ok=True)
+                shutil.copy2(job.src_path, job.dst_path)
+                self.log(f"✅ {self._('success_prefix')}: {self._('same_crs_copied')} - {os.path.basename(job.dst_path)}")
+                status = "copied"
+        
+        if status is None:
+            result = self.reproject_raster(
+                job.src_path, job.dst_path, dst_crs, options, driver=job.driver,
+                num_threads=num_threads, write_profile=write_profile, timings=timings
+            )
+            if not result:
+                return None
+            status = "completed"
+        
+        # Bước sau chuyển đổi: overview (ảnh COG đã có overview hợp lệ nên được bỏ qua)
+        if overviews is not None and self._get_driver_from_path(job.dst_path) == 'GTiff':
+            with timings.measure("overviews") if timings is not None else nullcontext():
+                self.build_overviews(job.dst_path, num_threads=num_threads, **overviews)
+        return status
+    
+    def reproject_raster(self, src_path, dst_path, dst_crs, options=None, windowed="auto",
+                         driver=None, num_threads=None, write_profile=None, timings=None):
         """
         Chuyển đổi hệ tọa độ của một ảnh GeoTIFF
         
@@ -72,13 +488,22 @@ class GeoProcessor:
             dst_path (str): Đường dẫn đến ảnh đích
             dst_crs (str): Hệ tọa độ đích (e.g., 'EPSG:4326')
             options (dict): Các tùy chọn bổ sung
+            windowed (bool | str): Chuyển đổi theo khối (True), cả band một lúc (False)
+                hoặc tự chọn theo giới hạn bộ nhớ ("auto")
+            driver (str): Driver GDAL của ảnh đích (None: theo đuôi file)
+            num_threads (int): Số luồng warp GDAL và nén COG (None: num_threads của bộ xử lý)
+            write_profile (str): Chế độ ghi GeoTIFF, "source" giữ bố cục file nguồn, "cog_*"
+                ghi Cloud-Optimized GeoTIFF (None: write_profile của bộ xử lý)
+            timings (ImageTimings): Nhận thời gian của các giai đoạn geometry (tính lưới
+                đích), decode, warp và encode
         
         Trả về:
             str: Đường dẫn đến ảnh đã chuyển đổi hoặc None nếu có lỗi
         """
+        timings = timings if timings is not None else ImageTimings()
         try:
             # Đảm bảo thư mục đích tồn tại
-            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+            os.makedirs(os.path.dirname(dst_path) or ".", exist_ok=True)
             
             with rasterio.open(src_path) as src:
                 # Kiểm tra xem file có hệ tọa độ không
@@ -86,9 +511,10 @@ class GeoProcessor:
                     self.log(f"⚠️ {self._('warning_prefix')}: {os.path.basename(src_path)} {self._('missing_crs')}")
                     return None
                 
-                # Tính toán transformation
-                transform, width, height = calculate_default_transform(
-                    src.crs, dst_crs, src.width, src.height, *src.bounds)
+                # Tính toán transformation (dùng lại cho các file cùng hệ tọa độ, kích thước và khung bao)
+                with timings.measure("geometry"):
+                    transform, width, height = self.transform_cache.calculate(
+                        src.crs, dst_crs, src.width, src.height, src.bounds)
                 
                 # Cập nhật metadata cho ảnh đầu ra
                 out_kwargs = src.meta.copy()
@@ -97,7 +523,7 @@ class GeoProcessor:
                     'transform': transform,
                     'width': width,
                     'height': height,
-                    'driver': self._get_driver_from_path(dst_path)
+                    'driver': driver or self._get_driver_from_path(dst_path)
                 })
                 
                 # Thêm các tùy chọn bổ sung nếu có
@@ -105,28 +531,14 @@ class GeoProcessor:
                     out_kwargs.update(options)
                 
                 # Tạo file đầu ra và thực hiện reproject
-                with rasterio.open(dst_path, 'w', **out_kwargs) as dst:
-                    # Reproject từng band
-                    for i in range(1, src.count + 1):
-                        # Đọc dữ liệu từ band gốc
-                        source = src.read(i)
-                        
-                        # Chuẩn bị một mảng rỗng cho dữ liệu đầu ra
-                        destination = np.zeros((height, width), dtype=source.dtype)
-                        
-                        # Thực hiện reproject
-                        reproject(
-                            source,
-                            destination,
-                            src_transform=src.transform,
-                            src_crs=src.crs,
-                            dst_transform=transform,
-                            dst_crs=dst_crs,
-                            resampling=Resampling.nearest
-                        )
-                        
-                        # Ghi dữ liệu vào band trong file đầu ra
-                        dst.write(destination, i)
+                cog_options = self.cog_options(write_profile, num_threads)
+                with self._open_output(dst_path, out_kwargs, cog_options, timings) as dst:
+                    if self.use_windowed(src, windowed):
+                        with timings.measure("warp", os.path.getsize(src_path)):
+                            self._reproject_windowed(src, dst, transform, dst_crs, num_threads=num_threads)
+                    else:
+                        self._reproject_full(src, dst, transform, dst_crs, num_threads, timings)
+                timings.add("encode", nbytes=os.path.getsize(dst_path))
                 
                 self.log(f"✅ {self._('success_prefix')}: {self._('reprojected')} {src.crs} → {dst_crs} {self._('for')} {os.path.basename(dst_path)}")
                 return dst_path
@@ -138,6 +550,233 @@ class GeoProcessor:
             self.log(f"❌ {self._('error_prefix')}: {self._('unknown_error')} - {str(e)}")
             return None
     
+    def _reproject_full(self, src, dst, dst_transform, dst_crs, num_threads=None, timings=None):
+        """
+        Chuyển đổi mọi band trong một lần gọi trên mảng 3 chiều (band, hàng, cột)
+        
+        GDAL tính phép chiếu một lần cho mọi band thay vì lặp lại theo từng band, bộ
+        nhớ khoảng 2 lần kích thước ảnh. Bộ warp được cấp đủ bộ nhớ cho cả ảnh nguồn và
+        đích để GDAL không chia ảnh thành các khối hẹp (chia theo cột làm đổi cách xấp
+        xỉ phép chiếu trên từng dòng).
+        
+        Khi cùng một hình học nguồn/đích xuất hiện lần thứ hai, lưới pixel nguồn mà
+        GDAL chọn được lưu lại (xem warp_cache.build_warp_grid); các file sau cùng hình
+        học chỉ cần lấy pixel theo lưới, kết quả trùng khớp với warp của GDAL.
+        """
+        timings = timings if timings is not None else ImageTimings()
+        if not self.use_default_threshold():
+            with timings.measure("warp", src.width * src.height * src.count * np.dtype(src.dtypes[0]).itemsize):
+                with self._warped_vrt(src, dst, dst_transform, dst_crs, num_threads) as vrt:
+                    destination = vrt.read()
+            with timings.measure("encode"):
+                dst.write(destination)
+            return
+        
+        # Chuẩn bị mảng rỗng cho dữ liệu đầu ra
+        destination = np.zeros((dst.count, dst.height, dst.width), dtype=dst.dtypes[0])
+        
+        with timings.measure("decode", os.path.getsize(src.name)):
+            source = src.read()
+        
+        # Warp dữ liệu và warp ảnh chỉ số (tạo lưới) dùng cùng tham số, bộ nhớ đủ cho cả
+        # hai để GDAL không chia khối ở lần nào: lưới khớp với kết quả warp dữ liệu
+        warp_bytes = max(source.nbytes + destination.nbytes,
+                         index_warp_nbytes(src.width, src.height, dst.width, dst.height))
+        options = self.warp_options(warp_bytes * 2 // (1024 * 1024) + 1, num_threads)
+        
+        with timings.measure("warp", source.nbytes):
+            grid = self._warp_grid(src, dst, dst_transform, dst_crs, options)
+            if grid is not None:
+                apply_warp_grid(source, grid, destination)
+            else:
+                reproject(
+                    source,
+                    destination,
+                    src_transform=src.transform,
+                    src_crs=src.crs,
+                    dst_transform=dst_transform,
+                    dst_crs=dst_crs,
+                    **options
+                )
+        with timings.measure("encode"):
+            dst.write(destination)
+    
+    def _warp_grid(self, src, dst, dst_transform, dst_crs, options):
+        """
+        Lưới warp của hình học nguồn/đích từ warp_grid_cache, được tạo khi hình học này
+        xuất hiện lần thứ hai (lưới vượt dung lượng bộ nhớ đệm không được tạo)
+        
+        Tham số:
+            options (dict): Tham số warp của dữ liệu (warp_options), dùng lại khi tạo lưới
+        
+        Trả về:
+            WarpGrid: hoặc None nếu chưa có lưới (warp bằng GDAL như bình thường)
+        """
+        if self.warp_grid_cache is None:
+            return None
+        key = WarpGridCache.key(src, dst_crs, dst_transform, dst.width, dst.height)
+        grid, build = self.warp_grid_cache.lookup(key, grid_size_estimate(dst.width, dst.height))
+        if grid is None and build:
+            grid = build_warp_grid(src, dst_crs, dst_transform, dst.width, dst.height, **options)
+            self.warp_grid_cache.store(key, grid)
+        return grid
+    
+    def _reproject_windowed(self, src, dst, dst_transform, dst_crs, block_mb=REPROJECT_BLOCK_MB,
+                            num_threads=None):
+        """
+        Chuyển đổi theo từng dải đích, bộ nhớ giới hạn bởi kích thước dải
+        
+        Mỗi dải trải hết chiều rộng ảnh đích (chiều cao là bội số chiều cao khối của
+        file đích) và được warp trực tiếp từ file nguồn, mọi band trong một lần gọi:
+        GDAL chỉ đọc cửa sổ nguồn mà dải cần. Dải đủ chiều rộng (bộ warp đủ bộ nhớ cho
+        cả dải và cửa sổ nguồn nên không chia tiếp) giữ nguyên cách GDAL xấp xỉ phép
+        chiếu trên từng dòng, kết quả trùng với cách chuyển đổi cả ảnh.
+        """
+        dtype = np.dtype(dst.dtypes[0])
+        row_bytes = dst.width * dst.count * dtype.itemsize
+        rows = max(1, int(block_mb * 1024 * 1024 // row_bytes))
+        block_rows = dst.block_shapes[0][0]
+        if rows >= block_rows:
+            rows -= rows % block_rows
+        
+        if not self.use_default_threshold():
+            with self._warped_vrt(src, dst, dst_transform, dst_crs, num_threads) as vrt:
+                for row in range(0, dst.height, rows):
+                    window = Window(0, row, dst.width, min(rows, dst.height - row))
+                    dst.write(vrt.read(window=window), window=window)
+            return
+        
+        bands = rasterio.band(src, list(range(1, src.count + 1)))
+        for row in range(0, dst.height, rows):
+            count = min(rows, dst.height - row)
+            block = np.zeros((dst.count, count, dst.width), dtype=dtype)
+            # Gốc của dải tính từ transform đích (cùng phép tính GDAL dùng cho cả ảnh)
+            block_transform = dst_transform * dst_transform.translation(0, row)
+            reproject(
+                bands,
+                block,
+                dst_transform=block_transform,
+                dst_crs=dst_crs,
+                **self.warp_options(block_mb * REPROJECT_BAND_FACTOR, num_threads)
+            )
+            dst.write(block, window=Window(0, row, dst.width, count))
+    
+    def overview_levels(self, width, height, min_size=OVERVIEW_MIN_SIZE):
+        """Hệ số thu nhỏ (2, 4, 8...) đến khi mức nhỏ nhất không lớn hơn min_size pixel"""
+        levels = []
+        factor = 2
+        while max(width, height) / (factor // 2) > min_size:
+            levels.append(factor)
+            factor *= 2
+        return levels
+    
+    def has_valid_overviews(self, src, levels):
+        """
+        Ảnh đã có overview dùng được: mọi band có đủ các mức trong levels (bên trong
+        hoặc trong file .ovr) và file .ovr, nếu có, không cũ hơn ảnh
+        """
+        if not levels:
+            return True
+        if any(not set(levels) <= set(src.overviews(i)) for i in src.indexes):
+            return False
+        ovr_path = src.name + ".ovr"
+        return not os.path.exists(ovr_path) or os.path.getmtime(ovr_path) >= os.path.getmtime(src.name)
+    
+    def build_overviews(self, path, resampling=DEFAULT_OVERVIEW_RESAMPLING, external=False,
+                        levels=None, num_threads=None, force=False):
+        """
+        Tạo overview cho một ảnh GeoTIFF
+        
+        GDAL tính các mức song song theo từng khối OVERVIEW_BLOCK_SIZE (GDAL_NUM_THREADS)
+        và nén overview giống ảnh gốc. Ảnh đã có overview hợp lệ được bỏ qua.
+        
+        Tham số:
+            path (str): Đường dẫn ảnh GeoTIFF
+            resampling (str): Phương pháp lấy mẫu (OVERVIEW_RESAMPLING)
+            external (bool): Ghi overview ra file .ovr riêng thay vì vào trong ảnh
+            levels (list): Hệ số thu nhỏ (None: theo overview_levels)
+            num_threads (int): Số luồng GDAL (None: num_threads của bộ xử lý)
+            force (bool): Tạo lại kể cả khi đã có overview hợp lệ
+        
+        Trả về:
+            str: "built", "valid" (đã có, bỏ qua) hoặc None nếu lỗi
+        """
+        if resampling not in OVERVIEW_RESAMPLING:
+            raise ValueError(f"Phương pháp lấy mẫu overview không hỗ trợ: {resampling}")
+        
+        try:
+            with rasterio.open(path) as src:
+                if src.driver != 'GTiff':
+                    self.log(f"⚠️ {self._('warning_prefix')}: {self._('overview_unsupported')} - {os.path.basename(path)}")
+                    return None
+                levels = levels or self.overview_levels(src.width, src.height)
+                if not force and self.has_valid_overviews(src, levels):
+                    self.log(f"⏭️ {self._('info_prefix')}: {self._('overview_valid')} - {os.path.basename(path)}")
+                    return "valid"
+                structure = src.tags(ns='IMAGE_STRUCTURE')
+            
+            config = {
+                'GDAL_NUM_THREADS': num_threads or self.num_threads,
+                'GDAL_TIFF_OVR_BLOCKSIZE': OVERVIEW_BLOCK_SIZE,
+                'TIFF_USE_OVR': bool(external),
+            }
+            if structure.get('COMPRESSION'):
+                config['COMPRESS_OVERVIEW'] = structure['COMPRESSION']
+            if structure.get('PREDICTOR'):
+                config['PREDICTOR_OVERVIEW'] = structure['PREDICTOR']
+            
+            with rasterio.Env(**config):
+                with rasterio.open(path, 'r+') as dst:
+                    dst.build_overviews(levels, Resampling[resampling])
+            
+            self.log(f"✅ {self._('success_prefix')}: {self._('overview_built')} {levels} ({resampling}) - {os.path.basename(path)}")
+            return "built"
+        except Exception as e:
+            self.log(f"❌ {self._('error_prefix')}: {self._('overview_error')} {os.path.basename(path)} - {str(e)}")
+            return None
+    
+    def batch_build_overviews(self, paths, resampling=DEFAULT_OVERVIEW_RESAMPLING, external=False,
+                              max_workers=None, progress=None, force=False):
+        """
+        Tạo overview cho nhiều ảnh song song (số file × số luồng GDAL không vượt số lõi)
+        
+        Tham số:
+            progress (callable): Nhận ReprojectEvent ("started", "built", "valid", "failed")
+        
+        Trả về:
+            list: Các ảnh đã có overview (vừa tạo hoặc sẵn có)
+        """
+        if not paths:
+            return []
+        
+        notify = progress or (lambda event: None)
+        workers, threads = self.plan_parallelism(len(paths), max_workers)
+        total = len(paths)
+        results = []
+        
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for path in paths:
+                job = ReprojectJob(path, path)
+                notify(ReprojectEvent("started", job, 0, total))
+                futures[executor.submit(self.build_overviews, path, resampling, external,
+                                        None, threads, force)] = job
+            
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                job = futures[future]
+                try:
+                    status = future.result()
+                except Exception as e:
+                    status = None
+                    self.log(f"❌ {self._('error_prefix')}: {self._('overview_error')} {os.path.basename(job.src_path)} - {str(e)}")
+                    notify(ReprojectEvent("failed", job, done, total, str(e)))
+                else:
+                    notify(ReprojectEvent(status or "failed", job, done, total))
+                if status:
+                    results.append(job.dst_path)
+        
+        return results
+    
     def _get_driver_from_path(self, file_path):
         """Xác định GDAL driver dựa trên phần mở rộng của file"""
         _, ext = os.path.splitext(file_path)
@@ -162,8 +801,8 @@ class GeoProcessor:
         
         return drivers.get(ext, 'GTiff')  # Mặc định là GTiff
             
-    def save_with_geospatial(self, image, output_path, geo_metadata):
-        """Lưu ảnh PIL với thông tin địa lý"""
+    def save_with_geospatial(self, image, output_path, geo_metadata, write_profile=None):
+        """Lưu ảnh PIL với thông tin địa lý (GeoTIFF theo chế độ ghi, xem reproject_raster)"""
         try:
             # Chuyển đổi từ PIL Image sang numpy array để sử dụng với rasterio
             array = np.array(image)
@@ -173,16 +812,16 @@ class GeoProcessor:
             driver = self._get_driver_from_path(output_path)
             
             # Tạo file raster mới với thông tin địa lý
-            with rasterio.open(
-                output_path, 'w', 
-                driver=driver,
-                width=geo_metadata['width'], 
-                height=geo_metadata['height'],
-                count=array.shape[2], 
-                dtype=array.dtype,
-                crs=geo_metadata['crs'], 
-                transform=geo_metadata['transform']
-            ) as dst:
+            out_kwargs = {
+                'driver': driver,
+                'width': geo_metadata['width'],
+                'height': geo_metadata['height'],
+                'count': array.shape[2],
+                'dtype': array.dtype,
+                'crs': geo_metadata['crs'],
+                'transform': geo_metadata['transform']
+            }
+            with self._open_output(output_path, out_kwargs, self.cog_options(write_profile)) as dst:
                 # Ghi từng kênh màu (RGBA hoặc RGB)
                 for i in range(array.shape[2]):
                     dst.write(array[:, :, i], i+1)
@@ -208,8 +847,8 @@ class GeoProcessor:
                     return None
                     
                 # Tính toán transform cho hệ tọa độ đích
-                transform, width, height = calculate_default_transform(
-                    src_crs, dst_crs, src.width, src.height, *src.bounds
+                transform, width, height = self.transform_cache.calculate(
+                    src_crs, dst_crs, src.width, src.height, src.bounds
                 )
                 
                 # Tạo metadata
@@ -4,10 +4,26 @@ Xử lý hình ảnh cơ bản
 
 import os
 import time
-import numpy as np
-from PIL import Image, ImageEnhance
+from PIL import Image
 import multiprocessing
-from resources.constants import RESAMPLE
+import rasterio
+from rasterio.enums import Resampling
+from resources.constants import (
+    RESAMPLE, REDUCING_GAP, OUTPUT_MODES, DEFAULT_OUTPUT_MODES, PIPELINE_WORKERS, PIPELINE_QUEUE_DEPTH
+)
+from resources.translations import get_translation
+from processing.adjustments import apply_adjustments
+from processing.background import remove_key_colors, remove_edge_background, key_colors, BLACK, WHITE
+from processing.tiled_processor import TiledProcessor, can_read_rgba, image_from_bands
+from processing.batch_engine import iter_batch, make_scheduler, normalize_options
+from processing.scheduler import MemoryBudget
+from processing.manifest import BatchManifest
+from processing.pipeline import StagedPipeline, Stage
+from processing.png_writer import can_write_parallel, save_png_parallel
+from processing.timing import ImageTimings, BatchStats, BatchResult, image_bytes
+from processing.outputs import (
+    parse_output_specs, output_name, working_format, save_options, encoder_options, cascade_source
+)
 
 try:
     RESAMPLE = Image.Resampling.LANCZOS
@@ -17,65 +33,144 @@ except AttributeError:
 class ImageProcessor:
     """Lớp xử lý hình ảnh cơ bản"""
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, language="en"):
         """Khởi tạo bộ xử lý hình ảnh"""
-        from utils.logger import logger as default_logger
-        self.logger = logger or default_logger
+        if logger is None:
+            from utils.logger import logger
+        self.logger = logger
+        self.language = language
         self.num_cores = multiprocessing.cpu_count()
+        self.pipeline_stats = None
+        self.batch_stats = None
+        
+        # Bảng tra độ sáng/độ tương phản dùng chung cho mọi ảnh xử lý bởi processor này
+        self.lut_cache = {}
+        
+    def _(self, key):
+        """Dịch thông điệp log theo ngôn ngữ của bộ xử lý"""
+        return get_translation(key, self.language) or key
         
     def _apply_adjustments(self, img, brightness=1.0, contrast=1.0, saturation=1.0):
-        """Áp dụng các điều chỉnh cho ảnh"""
+        """Áp dụng các điều chỉnh cho ảnh (bảng tra 8-bit hoặc một lượt NumPy hợp nhất)"""
         try:
-            # Điều chỉnh độ sáng
-            brightness = float(brightness)
-            if brightness != 1.0:
-                img = ImageEnhance.Brightness(img).enhance(brightness)
-                
-            # Điều chỉnh độ tương phản
-            contrast = float(contrast)
-            if contrast != 1.0:
-                img = ImageEnhance.Contrast(img).enhance(contrast)
-                
-            # Điều chỉnh độ bão hòa
-            saturation = float(saturation)
-            if saturation != 1.0:
-                img = ImageEnhance.Color(img).enhance(saturation)
-                
+            img = apply_adjustments(img, brightness, contrast, saturation, lut_cache=self.lut_cache)
         except Exception as e:
             if self.logger:
                 self.logger.log(f"❌ {self._('error_prefix')}: {self._('adjustment_error')} - {e}")
             
         return img
         
-    def remove_background(self, img, remove_black=False, remove_white=False):
-        """Xử lý nền ảnh (loại bỏ màu đen hoặc trắng)"""
+    def remove_background(self, img, remove_black=False, remove_white=False, tolerance=0, colors=None,
+                          edge_only=False):
+        """
+        Xử lý nền ảnh (loại bỏ màu đen, trắng hoặc các màu khóa tùy chọn)
+        
+        Tham số:
+            img (PIL.Image): Ảnh đầu vào
+            remove_black (bool): Xóa nền đen
+            remove_white (bool): Xóa nền trắng
+            tolerance (int): Sai khác tối đa trên mỗi kênh (0: khớp chính xác)
+            colors (list): Các màu khóa (r, g, b) bổ sung
+            edge_only (bool): Chỉ xóa vùng nền liên thông với biên ảnh, giữ pixel
+                cùng màu nằm bên trong nội dung
+        """
         try:
-            if not (remove_black or remove_white):
+            colors = key_colors(remove_black, remove_white) + list(colors or [])
+            if not colors:
                 return img
                 
-            data = np.array(img)
-            mask = np.zeros(data.shape[:2], bool)
-            
-            if remove_white:
-                mask |= np.all(data[..., :3] == 255, axis=-1)
-                
-            if remove_black:
-                mask |= np.all(data[..., :3] == 0, axis=-1)
-                
-            data[mask] = (0, 0, 0, 0)
-            return Image.fromarray(data)
+            if edge_only:
+                return remove_edge_background(img, colors, tolerance)
+            return remove_key_colors(img, colors, tolerance)
         except Exception as e:
             if self.logger:
                 self.logger.log(f"❌ {self._('error_prefix')}: {self._('background_error')} - {e}")
             return img
             
-    def resize_image(self, img, scale_ratio):
-        """Thay đổi kích thước ảnh"""
+    def _working_mode(self, mode, output_format, remove_background=False, adjusting=False, transparency=False):
+        """
+        Chế độ pixel tối thiểu mà các bước xử lý và định dạng đầu ra cần
+        
+        Ảnh chỉ được nâng lên RGBA khi cần xóa nền hoặc khi có kênh trong suốt mà
+        định dạng đầu ra lưu được; ảnh xám, RGB và 16-bit giữ nguyên chế độ gốc.
+        
+        Tham số:
+            mode (str): Chế độ hiện tại của ảnh
+            output_format (str): Định dạng đầu ra (".png", ".jpg"...)
+            remove_background (bool): Có xóa nền hay không
+            adjusting (bool): Có điều chỉnh độ sáng/độ tương phản/độ bão hòa hay không
+            transparency (bool): Ảnh có màu trong suốt trong img.info (tRNS, GIF...)
+            
+        Trả về:
+            str: Chế độ ảnh (L, LA, RGB, RGBA hoặc I;16)
+        """
+        if remove_background:
+            return "RGBA"
+            
+        allowed = OUTPUT_MODES.get(output_format.lower(), DEFAULT_OUTPUT_MODES)
+        
+        # Ảnh 16-bit chỉ giữ nguyên khi không điều chỉnh (bảng tra chỉ dành cho 8-bit)
+        if mode.startswith("I;16") and not adjusting and "I;16" in allowed:
+            return "I;16"
+            
+        has_alpha = mode in ("LA", "La", "PA", "RGBA", "RGBa") or transparency
+        keep_alpha = has_alpha and ("LA" in allowed or "RGBA" in allowed)
+        gray = mode in ("1", "L", "LA", "La", "I", "F") or mode.startswith("I;16")
+        
+        if gray and not transparency:
+            target = "LA" if keep_alpha else "L"
+        else:
+            target = "RGBA" if keep_alpha else "RGB"
+            
+        if target not in allowed:
+            target = "RGBA" if keep_alpha and "RGBA" in allowed else "RGB"
+        return target
+        
+    def _open_reduced(self, image_path, scale):
+        """
+        Mở ảnh để thu nhỏ, yêu cầu bộ giải mã trả về ảnh nhỏ hơn khi có thể
+        
+        JPEG dùng Image.draft (thu nhỏ trong miền DCT); GeoTIFF 8-bit được đọc với
+        out_shape của rasterio (dùng overview nếu có). Ảnh trả về vẫn lớn hơn kích
+        thước đích ít nhất REDUCING_GAP lần.
+        
+        Trả về:
+            tuple: (ảnh ở chế độ gốc, kích thước đích tính theo ảnh gốc)
+        """
+        with Image.open(image_path) as img:
+            width, height = img.size
+            size = (int(width * scale), int(height * scale))
+            
+            if img.format == "JPEG":
+                img.draft(None, (int(size[0] * REDUCING_GAP), int(size[1] * REDUCING_GAP)))
+                img.load()
+                return img, size
+            
+            factor = int(1.0 / (scale * REDUCING_GAP))
+            if img.format != "TIFF" or factor < 2 or not can_read_rgba(image_path):
+                img.load()
+                return img, size
+        
+        with rasterio.open(image_path) as src:
+            out_shape = (src.count, -(-height // factor), -(-width // factor))
+            data = src.read(out_shape=out_shape, resampling=Resampling.average)
+        return image_from_bands(data), size
+        
+    def resize_image(self, img, scale_ratio, size=None, reducing_gap=None):
+        """
+        Thay đổi kích thước ảnh
+        
+        Tham số:
+            img (PIL.Image): Ảnh đầu vào
+            scale_ratio (float): Tỷ lệ thay đổi kích thước
+            size (tuple): Kích thước đích khi img đã được giải mã ở độ phân giải thấp hơn
+            reducing_gap (float): Cho phép Image.reduce trước khi nội suy (xem Image.resize)
+        """
         try:
             scale = float(scale_ratio)
             if scale > 0 and scale != 1.0:
-                new_size = (int(img.width * scale), int(img.height * scale))
-                img = img.resize(new_size, RESAMPLE)
+                new_size = size or (int(img.width * scale), int(img.height * scale))
+                img = img.resize(new_size, RESAMPLE, reducing_gap=reducing_gap)
                 if self.logger:
                     self.logger.log(f"ℹ️ {self._('info_prefix')}: {self._('resized')} {new_size[0]}x{new_size[1]}")
         except Exception as e:
@@ -85,7 +180,9 @@ class ImageProcessor:
         
     def process_image(self, image_path, output_folder, output_format=None, 
                       scale_ratio=None, remove_black=False, remove_white=False,
-                      brightness=None, contrast=None, saturation=None, **kwargs):
+                      brightness=None, contrast=None, saturation=None,
+                      tiled="auto", memory_limit_mb=None, edge_only=False, timings=None,
+                      outputs=None, encoder_profile=None, fast_downscale=False, **kwargs):
         """
         Xử lý ảnh với các tùy chọn cơ bản
         
@@ -99,91 +196,385 @@ class ImageProcessor:
             brightness (float): Điều chỉnh độ sáng
             contrast (float): Điều chỉnh độ tương phản
             saturation (float): Điều chỉnh độ bão hòa
+            tiled (bool | str): Xử lý theo dải (True, False hoặc "auto" khi ảnh vượt giới hạn bộ nhớ)
+            memory_limit_mb (int): Giới hạn bộ nhớ cho một ảnh (MB)
+            edge_only (bool): Chỉ xóa nền liên thông với biên ảnh
+            timings (ImageTimings): Nhận thời gian và số byte của từng giai đoạn
+            outputs (list): Nhiều đầu ra (OutputSpec hoặc dict format/scale/quality) tạo
+                từ một lần giải mã và điều chỉnh; khi có, output_format và scale_ratio
+                bị bỏ qua và hàm trả về danh sách đường dẫn
+            encoder_profile (str): Chế độ nén "default", "fast", "balanced" hoặc "small" (xem ENCODER_PROFILES)
+            fast_downscale (bool): Khi thu nhỏ, giải mã ở độ phân giải thấp hơn và thu nhỏ
+                trước khi điều chỉnh (nhanh hơn nhưng gần đúng, xem _read_job)
             **kwargs: Các tham số bổ sung, có thể là một đối tượng options
+            
+        Trả về:
+            str | list: Đường dẫn ảnh đầu ra (None nếu lỗi)
         """
         try:
-            # Kiểm tra có đối tượng options được truyền vào hay không
-            options = kwargs.get('options', None)
-            
-            # Nếu có options, sử dụng các giá trị từ options
-            if options and isinstance(options, object):
-                output_format = getattr(options, 'export_format', output_format)
-                scale_ratio = getattr(options, 'scale_ratio', scale_ratio)
-                remove_black = getattr(options, 'remove_black', remove_black)
-                remove_white = getattr(options, 'remove_white', remove_white)
-                brightness = getattr(options, 'brightness', brightness)
-                contrast = getattr(options, 'contrast', contrast)
-                saturation = getattr(options, 'saturation', saturation)
-            
-            # Thiết lập giá trị mặc định
-            output_format = output_format or ".png"
-            scale_ratio = scale_ratio or "1.0"
-            brightness = brightness or "1.0"
-            contrast = contrast or "1.0"
-            saturation = saturation or "1.0"
-            
-            # Mở ảnh
-            img = Image.open(image_path).convert("RGBA")
+            job = self._prepare_job(
+                image_path, output_folder, output_format, scale_ratio, remove_black, remove_white,
+                brightness, contrast, saturation, tiled, memory_limit_mb, edge_only, timings,
+                outputs, encoder_profile, fast_downscale, **kwargs
+            )
+            return self._write_job(self._transform_job(self._read_job(job)))
             
-            # Áp dụng các điều chỉnh
-            img = self._apply_adjustments(img, brightness, contrast, saturation)
+        except Exception as e:
+            if self.logger:
+                self.logger.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} {os.path.basename(image_path)} - {e}")
+            return None
             
-            # Xử lý nền
-            img = self.remove_background(img, remove_black, remove_white)
+    def _prepare_job(self, image_path, output_folder, output_format=None,
+                     scale_ratio=None, remove_black=False, remove_white=False,
+                     brightness=None, contrast=None, saturation=None,
+                     tiled="auto", memory_limit_mb=None, edge_only=False, timings=None,
+                     outputs=None, encoder_profile=None, fast_downscale=False, **kwargs):
+        """
+        Chuẩn hóa tùy chọn và tạo tác vụ xử lý một ảnh (xem process_image)
+        
+        Trả về:
+            dict: Tác vụ được các giai đoạn đọc, biến đổi và ghi dùng chung
+        """
+        # Kiểm tra có đối tượng options được truyền vào hay không
+        options = kwargs.get('options', None)
+        
+        # Nếu có options (dict hoặc đối tượng), sử dụng các giá trị từ options
+        if options:
+            values = normalize_options(options)
+            output_format = values.get('output_format', output_format)
+            scale_ratio = values.get('scale_ratio', scale_ratio)
+            remove_black = values.get('remove_black', remove_black)
+            remove_white = values.get('remove_white', remove_white)
+            brightness = values.get('brightness', brightness)
+            contrast = values.get('contrast', contrast)
+            saturation = values.get('saturation', saturation)
+            tiled = values.get('tiled', tiled)
+            memory_limit_mb = values.get('memory_limit_mb', memory_limit_mb)
+            edge_only = values.get('edge_only', edge_only)
+            outputs = values.get('outputs', outputs)
+            encoder_profile = values.get('encoder_profile', encoder_profile)
+            fast_downscale = values.get('fast_downscale', fast_downscale)
+        
+        # Nhiều đầu ra: giải mã và điều chỉnh một lần ở tỷ lệ lớn nhất (không vượt quá
+        # ảnh gốc), các đầu ra nhỏ hơn được thu nhỏ dần từ kết quả lớn hơn gần nhất
+        specs = parse_output_specs(outputs) if outputs else None
+        if specs:
+            output_format = working_format(specs)
+            scale_ratio = specs[0].scale if float(specs[0].scale) < 1.0 else "1.0"
+        
+        # Thiết lập giá trị mặc định
+        output_format = output_format or ".png"
+        scale_ratio = scale_ratio or "1.0"
+        brightness = brightness or "1.0"
+        contrast = contrast or "1.0"
+        saturation = saturation or "1.0"
+        
+        # Tạo tên file đầu ra
+        base_name = os.path.splitext(os.path.basename(image_path))[0]
+        scale_prefix = f"{scale_ratio}x-" if float(scale_ratio) != 1.0 else ""
+        
+        # Đảm bảo định dạng đầu ra có dấu chấm
+        if not output_format.startswith('.'):
+            output_format = '.' + output_format
             
-            # Thay đổi kích thước
-            img = self.resize_image(img, scale_ratio)
+        # Kiểm tra chế độ nén trước khi giải mã
+        encoder_options(output_format, encoder_profile)
+        
+        if specs:
+            output_path = [os.path.join(output_folder, output_name(image_path, spec)) for spec in specs]
+        else:
+            output_path = os.path.join(output_folder, f"{scale_prefix}{base_name}{output_format}")
             
-            # Chuyển đổi sang RGB nếu định dạng đầu ra là JPG
-            if output_format.lower() == ".jpg" or output_format.lower() == "jpg":
-                img = img.convert("RGB")
-                
-            # Tạo tên file đầu ra
-            base_name = os.path.splitext(os.path.basename(image_path))[0]
-            scale_prefix = f"{scale_ratio}x-" if float(scale_ratio) != 1.0 else ""
+        return {
+            "image_path": image_path,
+            "output_path": output_path,
+            "output_format": output_format,
+            "scale_ratio": scale_ratio,
+            "remove_black": remove_black,
+            "remove_white": remove_white,
+            "brightness": brightness,
+            "contrast": contrast,
+            "saturation": saturation,
+            "tiled": tiled,
+            "memory_limit_mb": memory_limit_mb,
+            "edge_only": edge_only,
+            "img": None,
+            "size": None,
+            "tiled_processor": None,
+            "timings": timings if timings is not None else ImageTimings(),
+            "outputs": specs,
+            "encoder_profile": encoder_profile,
+            "fast_downscale": bool(fast_downscale),
+            "source_size": None,
+            "writes": [],
+        }
+        
+    def _read_job(self, job):
+        """
+        Giai đoạn đọc: mở và giải mã ảnh
+        
+        Ảnh vượt giới hạn bộ nhớ không được giải mã ở đây; TiledProcessor đọc, xử lý
+        và ghi từng dải trong giai đoạn biến đổi.
+        """
+        image_path, output_format, timings = job["image_path"], job["output_format"], job["timings"]
+        
+        # Ảnh vượt giới hạn bộ nhớ được xử lý theo dải (mọi đầu ra phải ghi được theo dải)
+        tiled_processor = TiledProcessor(self, job["memory_limit_mb"])
+        formats = [spec.format for spec in job["outputs"]] if job["outputs"] else [output_format]
+        if all(tiled_processor.should_tile(image_path, fmt, job["tiled"]) for fmt in formats):
+            job["tiled_processor"] = tiled_processor
+            return job
+        
+        # fast_downscale: thu nhỏ trước khi điều chỉnh và giải mã ở độ phân giải thấp
+        # hơn (JPEG draft, GeoTIFF đọc 1/factor). Kết quả gần đúng, không trùng với thứ
+        # tự gốc: độ sáng/độ tương phản bị cắt ở 0/255 và độ tương phản dùng mức xám
+        # trung bình của ảnh, nên chỉ dùng khi được yêu cầu. Xóa nền so khớp màu chính
+        # xác nên luôn chạy trên ảnh gốc. Ảnh vượt giới hạn bộ nhớ vẫn được xử lý theo
+        # dải ở độ phân giải gốc (chính xác), nên giải mã rút gọn chỉ áp dụng cho ảnh
+        # xử lý trong bộ nhớ.
+        scale = float(job["scale_ratio"])
+        reduce = (
+            job["fast_downscale"] and 0 < scale < 1.0
+            and not (job["remove_black"] or job["remove_white"])
+        )
+        with timings.measure("decode", os.path.getsize(image_path)):
+            if reduce:
+                if job["outputs"]:
+                    with Image.open(image_path) as header:
+                        job["source_size"] = header.size
+                job["img"], job["size"] = self._open_reduced(image_path, scale)
+            else:
+                # Giải mã ngay để giai đoạn đọc gánh toàn bộ I/O
+                img = Image.open(image_path)
+                img.load()
+                job["img"] = img
+                job["source_size"] = img.size
+        return job
+        
+    def _transform_job(self, job):
+        """Giai đoạn biến đổi: điều chỉnh, xóa nền, thay đổi kích thước và chuyển chế độ pixel"""
+        if job["tiled_processor"] is not None:
+            if self.logger:
+                self.logger.log(f"ℹ️ {self._('info_prefix')}: {self._('tiled_processing')} {os.path.basename(job['image_path'])}")
+            # Mỗi đầu ra là một lượt xử lý theo dải riêng (ảnh không vừa bộ nhớ)
+            specs = job["outputs"] or [None]
+            paths = job["output_path"] if job["outputs"] else [job["output_path"]]
+            results = [
+                job["tiled_processor"].process(
+                    job["image_path"], path, spec.scale if spec else job["scale_ratio"],
+                    job["remove_black"], job["remove_white"],
+                    job["brightness"], job["contrast"], job["saturation"], job["edge_only"],
+                    timings=job["timings"], encoder_profile=job["encoder_profile"]
+                )
+                for spec, path in zip(specs, paths)
+            ]
+            job["output_path"] = results if job["outputs"] else results[0]
+            return job
+        
+        img, output_format, timings = job["img"], job["output_format"], job["timings"]
+        brightness, contrast, saturation = job["brightness"], job["contrast"], job["saturation"]
+        remove_bg = bool(job["remove_black"] or job["remove_white"])
+        adjusting = any(float(v) != 1.0 for v in (brightness, contrast, saturation))
+        
+        # Chỉ chuyển sang RGBA khi cần kênh alpha
+        mode = self._working_mode(img.mode, output_format, remove_bg, adjusting, "transparency" in img.info)
+        if img.mode != mode:
+            with timings.measure("convert", image_bytes(img)):
+                img = img.convert(mode)
             
-            # Đảm bảo định dạng đầu ra có dấu chấm
-            if not output_format.startswith('.'):
-                output_format = '.' + output_format
-                
-            output_path = os.path.join(output_folder, f"{scale_prefix}{base_name}{output_format}")
+        if job["size"] is not None:
+            # Ảnh đã giải mã ở độ phân giải thấp hơn: thu nhỏ trước rồi điều chỉnh
+            with timings.measure("resize", image_bytes(img)):
+                img = self.resize_image(img, job["scale_ratio"], size=job["size"], reducing_gap=REDUCING_GAP)
+            with timings.measure("adjust", image_bytes(img)):
+                img = self._apply_adjustments(img, brightness, contrast, saturation)
+        else:
+            # Áp dụng các điều chỉnh
+            with timings.measure("adjust", image_bytes(img)):
+                img = self._apply_adjustments(img, brightness, contrast, saturation)
             
-            # Lưu ảnh
-            img.save(output_path)
-            return output_path
+            # Xử lý nền
+            with timings.measure("background", image_bytes(img)):
+                img = self.remove_background(img, job["remove_black"], job["remove_white"], edge_only=job["edge_only"])
             
-        except Exception as e:
-            if self.logger:
-                self.logger.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} {os.path.basename(image_path)} - {e}")
-            return None
+            # Thay đổi kích thước
+            with timings.measure("resize", image_bytes(img)):
+                img = self.resize_image(img, job["scale_ratio"])
+        
+        job["img"] = None
+        if job["outputs"]:
+            job["writes"] = self._fan_out(img, job)
+            return job
+        
+        # Chuyển đổi nếu định dạng đầu ra không lưu được chế độ hiện tại (RGBA → JPG...)
+        mode = self._working_mode(img.mode, output_format)
+        if img.mode != mode:
+            with timings.measure("convert", image_bytes(img)):
+                img = img.convert(mode)
+        job["writes"] = [(img, job["output_path"], encoder_options(output_format, job["encoder_profile"]))]
+        return job
+        
+    def _fan_out(self, img, job):
+        """
+        Tạo các ảnh đầu ra từ ảnh đã điều chỉnh (và xóa nền)
+        
+        Các đầu ra được xử lý theo tỷ lệ giảm dần; mỗi đầu ra được thu nhỏ từ kết
+        quả lớn hơn gần nhất đã có, các đầu ra cùng kích thước dùng chung một ảnh.
+        
+        Trả về:
+            list: Các bộ (ảnh, đường dẫn, tham số lưu) cho giai đoạn ghi
+        """
+        timings = job["timings"]
+        width, height = job["source_size"]
+        candidates = [img]
+        writes = []
+        
+        for spec, path in zip(job["outputs"], job["output_path"]):
+            size = (int(width * float(spec.scale)), int(height * float(spec.scale)))
+            out = next((c for c in candidates if c.size == size), None)
+            if out is None:
+                source = cascade_source(candidates, size)
+                with timings.measure("resize", image_bytes(source)):
+                    out = self.resize_image(source, spec.scale, size=size)
+                candidates.append(out)
+                
+            mode = self._working_mode(out.mode, spec.format)
+            if out.mode != mode:
+                with timings.measure("convert", image_bytes(out)):
+                    out = out.convert(mode)
+            writes.append((out, path, save_options(spec, job["encoder_profile"])))
+        return writes
+        
+    def _write_job(self, job):
+        """
+        Giai đoạn ghi: nén và lưu các ảnh đầu ra
+        
+        PNG lớn được lọc và nén song song trên nhiều luồng; ảnh nhỏ dùng Pillow.
+        
+        Trả về:
+            str | list: Đường dẫn file đầu ra (danh sách khi có nhiều đầu ra)
+        """
+        for img, path, save_kwargs in job["writes"]:
+            with job["timings"].measure("encode"):
+                if path.lower().endswith(".png") and can_write_parallel(img):
+                    save_png_parallel(img, path, save_kwargs.get("compress_level", 6))
+                else:
+                    img.save(path, **save_kwargs)
+            job["timings"].add("encode", nbytes=os.path.getsize(path))
+        job["writes"] = []
+        return job["output_path"]
+        
+    def batch_process(self, files, output_folder, schedule_order="largest_first",
+                      incremental=False, use_hash=False, stage_workers=None, queue_depth=None,
+                      stats_report=False, memory_budget_mb=None, **kwargs):
+        """
+        Xử lý hàng loạt ảnh trong một tiến trình, theo thứ tự của bộ xếp lịch
+        
+        Việc đọc/giải mã, biến đổi và nén/ghi chạy chồng lên nhau trong một
+        StagedPipeline: trong lúc ảnh này đang được biến đổi, ảnh sau đã được đọc và
+        ảnh trước đang được ghi. Thống kê từng giai đoạn được lưu ở self.pipeline_stats.
+        Giai đoạn đọc chỉ nhận thêm ảnh khi tổng bộ nhớ ước tính của các ảnh đang trong
+        pipeline (từ lúc đọc đến khi ghi xong) còn trong memory_budget_mb.
+        
+        Thời gian từng bước xử lý của mọi ảnh được gom vào BatchStats, trả về cùng danh
+        sách đầu ra (BatchResult.stats) và lưu ở self.batch_stats; báo cáo JSON trong
+        thư mục đầu ra chỉ được ghi khi stats_report=True.
+        
+        Với incremental=True, manifest trong thư mục đầu ra ghi lại đầu vào và bộ
+        tùy chọn của mỗi file; các file không đổi và có đầu ra còn nguyên được bỏ qua.
+        
+        Tham số:
+            stage_workers (dict): Số luồng cho các giai đoạn "read", "transform", "write"
+            queue_depth (int | list): Sức chứa hàng đợi vào của mỗi giai đoạn
+            stats_report (bool): Ghi báo cáo thời gian (tiftiff_stats.json) vào thư mục đầu ra
+            memory_budget_mb (int): Tổng bộ nhớ cho các ảnh đang trong pipeline (MB)
             
-    def batch_process(self, files, output_folder, **kwargs):
-        """Xử lý hàng loạt ảnh"""
+        Trả về:
+            BatchResult: Đường dẫn các ảnh đã xử lý (list), thống kê ở thuộc tính stats
+        """
         if not files:
             if self.logger:
                 self.logger.log(f"⚠️ {self._('warning_prefix')}: {self._('no_files_selected')}")
-            return []
+            return BatchResult()
             
         start_time = time.time()
         processed_files = []
-        total = len(files)
+        options = normalize_options(kwargs.get('options')) or kwargs
+        os.makedirs(output_folder, exist_ok=True)
+        stats = BatchStats()
+        
+        manifest = None
+        if incremental:
+            manifest = BatchManifest(output_folder, use_hash)
+            files, skipped = manifest.filter(files, options)
+            for path in skipped:
+                processed_files.extend(manifest.outputs(path))
+            if skipped and self.logger:
+                self.logger.log(f"⏭️ {self._('info_prefix')}: {self._('skipped_unchanged')} - {len(skipped)}")
         
+        total = len(files)
         if self.logger:
             self.logger.log(f"📊 {self._('info_prefix')}: {self._('total_images')} - {total}")
             
-        for idx, path in enumerate(files, 1):
-            try:
-                output_path = self.process_image(path, output_folder, **kwargs)
-                if output_path:
-                    processed_files.append(output_path)
+        # Sắp xếp theo chi phí ước tính (đọc header, không giải mã ảnh)
+        scheduler = make_scheduler(self, options, schedule_order, memory_budget_mb)
+        tasks = scheduler.plan(files)
+        files = [task.path for task in tasks]
+        memory = {task.path: task.memory for task in tasks}
+        budget = MemoryBudget(scheduler.memory_budget)
+        
+        def read(path):
+            # Bộ nhớ được trả lại khi ảnh ra khỏi pipeline (kể cả khi lỗi ở giai đoạn nào đó)
+            budget.acquire(memory[path])
+            return self._read_job(self._prepare_job(path, output_folder, **kwargs))
+            
+        workers = dict(PIPELINE_WORKERS, **(stage_workers or {}))
+        pipeline = StagedPipeline([
+            Stage("read", read, workers["read"]),
+            Stage("transform", self._transform_job, workers["transform"]),
+            Stage("write", lambda job: (self._write_job(job), job["timings"]), workers["write"]),
+        ], queue_depth or PIPELINE_QUEUE_DEPTH)
+            
+        try:
+            for idx, (path, result, error) in enumerate(pipeline.run(files), 1):
+                budget.release(memory[path])
+                if error:
+                    if self.logger:
+                        self.logger.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} {os.path.basename(path)} - {error}")
+                    continue
                     
+                output_path, timings = result
+                stats.add(path, timings)
+                if output_path:
+                    paths = output_path if isinstance(output_path, list) else [output_path]
+                    processed_files.extend(paths)
+                    if manifest:
+                        manifest.record(path, options, paths)
+                        
                 if self.logger:
                     pct = (idx / total) * 100
                     self.logger.log(f"✅ {self._('success_prefix')}: [{idx}/{total}] {self._('completed')} ({pct:.2f}%)")
-            except Exception as e:
-                if self.logger:
-                    self.logger.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} {os.path.basename(path)} - {e}")
+        finally:
+            budget.close()
                     
+        if manifest:
+            manifest.save()
+            
+        self.pipeline_stats = pipeline.report()
+        if self.logger and total:
+            for stage in self.pipeline_stats["stages"]:
+                self.logger.log(
+                    f"📈 {self._('info_prefix')}: {self._('pipeline_stage')} {stage['name']} "
+                    f"x{stage['workers']} - {stage['utilization'] * 100:.0f}% busy, "
+                    f"queue {stage['occupancy']:.1f}/{stage['queue_depth']}, "
+                    f"wait in {stage['starved_s']:.2f}s, wait out {stage['blocked_s']:.2f}s"
+                )
+            self.logger.log(f"📈 {self._('info_prefix')}: {self._('pipeline_bottleneck')} - {self.pipeline_stats['bottleneck']}")
+            
+        stats.elapsed = time.time() - start_time
+        stats.extra["pipeline"] = self.pipeline_stats
+        self._report_batch_stats(stats, output_folder, stats_report)
+            
         # Thống kê thời gian
         elapsed = time.time() - start_time
         mins, secs = divmod(elapsed, 60)
@@ -192,74 +583,109 @@ class ImageProcessor:
             self.logger.log(f"🎉 {self._('success_prefix')}: {self._('all_completed')}")
             self.logger.log(f"⏱️ {self._('info_prefix')}: {self._('processing_time')} - {int(mins)} {self._('minutes')} {secs:.2f} {self._('seconds')}")
             
-        return processed_files
+        return BatchResult(processed_files, stats)
 
-    def process_batch(self, image_files, output_dir, options):
-        """Xử lý hàng loạt ảnh sử dụng đa luồng"""
-        if not image_files:
-            return []
-            
-        # Tính toán số luồng phù hợp dựa trên số lượng ảnh và cores
-        n_threads = min(self.num_cores, len(image_files))
+    def process_batch(self, image_files, output_dir, options=None, max_workers=None,
+                      schedule_order="largest_first", memory_budget_mb=None,
+                      incremental=False, use_hash=False, stats_report=False):
+        """
+        Xử lý hàng loạt ảnh sử dụng nhiều tiến trình
         
-        if n_threads > 1 and len(image_files) > 1:
-            # Chia nhỏ công việc
-            chunk_size = max(1, len(image_files) // n_threads)
-            chunks = [image_files[i:i + chunk_size] for i in range(0, len(image_files), chunk_size)]
-            
-            # Sử dụng Pool để xử lý song song
-            with multiprocessing.Pool(processes=n_threads) as pool:
-                results = pool.starmap(
-                    self._process_image_batch,
-                    [(chunk, output_dir, options) for chunk in chunks]
-                )
+        Mỗi ảnh được gửi riêng cho một tiến trình con (khởi tạo một lần với bộ xử lý
+        nhẹ); kết quả, log và lỗi của từng ảnh được gửi về ngay khi ảnh hoàn thành.
+        
+        Tham số:
+            image_files (list): Danh sách đường dẫn ảnh
+            output_dir (str): Thư mục đầu ra
+            options (dict | object): Các tùy chọn xử lý
+            max_workers (int): Số tiến trình con (None: số lõi CPU)
+            schedule_order (str): Thứ tự xử lý "largest_first" hoặc "shortest_first"
+            memory_budget_mb (int): Tổng bộ nhớ cho các ảnh xử lý đồng thời (MB)
+            incremental (bool): Bỏ qua các file không đổi theo manifest trong thư mục đầu ra
+            use_hash (bool): So sánh cả hash nội dung khi mtime thay đổi
+            stats_report (bool): Ghi báo cáo thời gian từng bước (xem batch_process)
             
-            # Kết hợp các kết quả
-            processed_files = []
-            for result in results:
-                processed_files.extend(result)
+        Trả về:
+            BatchResult: Đường dẫn các ảnh đã xử lý thành công (list), thống kê ở
+                thuộc tính stats
+        """
+        if not image_files:
+            return BatchResult()
             
-            return processed_files
-        else:
-            # Xử lý tuần tự
-            return self._process_image_batch(image_files, output_dir, options)
-    
-    def _process_image_batch(self, image_files, output_dir, options):
-        """Xử lý một nhóm ảnh (được gọi bởi từng thread)"""
+        os.makedirs(output_dir, exist_ok=True)
+        kwargs = normalize_options(options)
         processed_files = []
+        start_time = time.time()
+        stats = BatchStats()
         
-        for image_path in image_files:
-            try:
-                output_path = self.process_image(image_path, output_dir, options=options)
-                if output_path:
-                    processed_files.append(output_path)
-            except Exception as e:
-                self.logger.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} {os.path.basename(image_path)} - {e}")
+        manifest = None
+        if incremental:
+            manifest = BatchManifest(output_dir, use_hash)
+            image_files, skipped = manifest.filter(image_files, kwargs)
+            for path in skipped:
+                processed_files.extend(manifest.outputs(path))
+            if skipped and self.logger:
+                self.logger.log(f"⏭️ {self._('info_prefix')}: {self._('skipped_unchanged')} - {len(skipped)}")
+            if not image_files:
+                return BatchResult(processed_files)
+                
+        total = len(image_files)
+        results = iter_batch(
+            self, image_files, output_dir, kwargs, max_workers or self.num_cores,
+            schedule_order, memory_budget_mb
+        )
+        for idx, result in enumerate(results, 1):
+            if self.logger:
+                for message in result.messages:
+                    self.logger.log(message)
+                    
+            if result.error:
+                if self.logger:
+                    self.logger.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} {os.path.basename(result.image_path)} - {result.error}")
+            elif result.output_path:
+                stats.add(result.image_path, result.timings)
+                paths = result.output_path if isinstance(result.output_path, list) else [result.output_path]
+                processed_files.extend(paths)
+                if manifest:
+                    manifest.record(result.image_path, kwargs, paths)
+                if self.logger:
+                    pct = (idx / total) * 100
+                    self.logger.log(f"✅ {self._('success_prefix')}: [{idx}/{total}] {self._('completed')} ({pct:.2f}%)")
+        
+        if manifest:
+            manifest.save()
+            
+        stats.elapsed = time.time() - start_time
+        self._report_batch_stats(stats, output_dir, stats_report)
+        return BatchResult(processed_files, stats)
         
-        return processed_files
+    def _report_batch_stats(self, stats, output_dir, stats_report=False):
+        """Lưu thống kê của lô vào self.batch_stats, ghi log tóm tắt và báo cáo JSON"""
+        self.batch_stats = stats
+        summary = stats.summary()
+        if not summary:
+            return
+            
+        if self.logger:
+            for stage, entry in summary.items():
+                self.logger.log(
+                    f"⏱️ {self._('info_prefix')}: {self._('pipeline_stage')} {stage} - "
+                    f"p50 {entry['p50_s'] * 1000:.1f} ms, p90 {entry['p90_s'] * 1000:.1f} ms, "
+                    f"{entry['total_s']:.2f} s ({entry['share'] * 100:.0f}%)"
+                )
+                
+        if stats_report:
+            try:
+                path = stats.save(output_dir)
+                if self.logger:
+                    self.logger.log(f"📄 {self._('info_prefix')}: {self._('stats_report_saved')} {path}")
+            except OSError as e:
+                if self.logger:
+                    self.logger.log(f"⚠️ {self._('warning_prefix')}: {self._('stats_report_saved')} - {e}")
     
     def _remove_background(self, img, is_black=True):
-        """Loại bỏ nền đen hoặc trắng khỏi ảnh (tối ưu hóa)"""
-        # Chuyển đổi thành RGBA nếu cần
-        if img.mode != 'RGBA':
-            img = img.convert('RGBA')
-        
-        # Chuyển sang numpy array để xử lý nhanh hơn
-        data = np.array(img)
-        
-        # Tạo mặt nạ alpha dựa trên màu nền
-        if is_black:
-            # Tìm các pixel đen (R, G, B đều gần 0)
-            mask = (data[:,:,0] < 10) & (data[:,:,1] < 10) & (data[:,:,2] < 10)
-        else:
-            # Tìm các pixel trắng (R, G, B đều gần 255)
-            mask = (data[:,:,0] > 245) & (data[:,:,1] > 245) & (data[:,:,2] > 245)
-        
-        # Đặt alpha = 0 cho các pixel nền
-        data[:,:,3][mask] = 0
-        
-        # Tạo ảnh mới từ mảng đã xử lý
-        return Image.fromarray(data) 
+        """Loại bỏ nền đen hoặc trắng khỏi ảnh (ngưỡng <10 / >245, chỉ đặt alpha = 0)"""
+        return remove_key_colors(img, [BLACK if is_black else WHITE], tolerance=9, clear_color=False)
 
     def adjust_image(self, image, brightness=1.0, contrast=1.0, saturation=1.0):
         """Điều chỉnh độ sáng, độ tương phản và độ bão hòa"""
@@ -273,20 +699,8 @@ class ImageProcessor:
             if brightness == 1.0 and contrast == 1.0 and saturation == 1.0:
                 return image
             
-            # Tạo enhancer và áp dụng
-            if brightness != 1.0:
-                enhancer = ImageEnhance.Brightness(image)
-                image = enhancer.enhance(brightness)
-                
-            if contrast != 1.0:
-                enhancer = ImageEnhance.Contrast(image)
-                image = enhancer.enhance(contrast)
-                
-            if saturation != 1.0:
-                enhancer = ImageEnhance.Color(image)
-                image = enhancer.enhance(saturation)
-                
-            return image
+            # Áp dụng cả ba điều chỉnh trong một lượt
+            return apply_adjustments(image, brightness, contrast, saturation, lut_cache=self.lut_cache)
         except Exception as e:
             self.logger.log(f"❌ {self._('error_prefix')}: {self._('adjustment_error')} - {e}")
             return image
@@ -304,7 +718,7 @@ class ImageProcessor:
             options = {}
             
         try:
-            return self.process_batch(file_paths, output_dir, **options)
+            return self.process_batch(file_paths, output_dir, options)
         except Exception as e:
-            self.logger.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} {os.path.basename(image_path)} - {e}")
+            self.logger.log(f"❌ {self._('error_prefix')}: {self._('processing_error')} - {e}")
             return [] 
\ No newline at end of file
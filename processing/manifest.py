@@ -0,0 +1,147 @@
+"""
+Manifest cho xử lý hàng loạt tăng dần: bỏ qua các file đầu vào không thay đổi
+"""
+
+import os
+import json
+import hashlib
+
+# Tên file manifest trong thư mục đầu ra
+MANIFEST_FILE = ".tiftiff_manifest.json"
+MANIFEST_VERSION = 1
+
+# Ghi manifest ra đĩa sau mỗi số lần cập nhật này (và khi kết thúc lô)
+MANIFEST_SAVE_EVERY = 200
+
+# Kích thước khối đọc khi tính hash
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_hash(path):
+    """Hash BLAKE2b của nội dung file (đọc theo khối)"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def canonical_options(options):
+    """Dạng chuẩn (có thể so sánh, ghi JSON) của bộ tùy chọn xử lý"""
+    return json.loads(json.dumps(options or {}, sort_keys=True, default=str))
+
+
+class BatchManifest:
+    """
+    Ghi lại đầu vào (đường dẫn, kích thước, mtime, hash tùy chọn), bộ tùy chọn và
+    các file đầu ra của mỗi lần xử lý để lần chạy sau chỉ xử lý file mới hoặc đã đổi
+    """
+
+    def __init__(self, output_dir, use_hash=False):
+        """
+        Khởi tạo manifest
+
+        Tham số:
+            output_dir (str): Thư mục đầu ra (nơi lưu manifest)
+            use_hash (bool): Lưu và so sánh hash nội dung; file có mtime thay đổi
+                nhưng nội dung giữ nguyên sẽ không bị xử lý lại
+        """
+        self.path = os.path.join(output_dir, MANIFEST_FILE)
+        self.use_hash = use_hash
+        self.entries = {}
+        self._pending = 0
+        self.load()
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    def load(self):
+        """Đọc manifest từ thư mục đầu ra (bỏ qua nếu thiếu hoặc hỏng)"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == MANIFEST_VERSION:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """Ghi manifest (ghi file tạm rồi thay thế để không hỏng khi bị dừng giữa chừng)"""
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._pending = 0
+
+    def is_up_to_date(self, path, options):
+        """
+        Kiểm tra file đã được xử lý với cùng bộ tùy chọn và chưa thay đổi kể từ đó
+
+        Trả về:
+            bool: True nếu có thể bỏ qua file
+        """
+        entry = self.entries.get(self._key(path))
+        if not entry or entry.get("options") != canonical_options(options):
+            return False
+        if not entry.get("outputs") or not all(os.path.exists(p) for p in entry["outputs"]):
+            return False
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        if stat.st_size != entry.get("size"):
+            return False
+        if stat.st_mtime_ns == entry.get("mtime_ns"):
+            return True
+
+        # mtime đổi (sao chép, touch...): so sánh nội dung nếu có hash
+        if self.use_hash and entry.get("hash") and file_hash(path) == entry["hash"]:
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._touch()
+            return True
+        return False
+
+    def record(self, path, options, outputs):
+        """Ghi nhận một file đã xử lý thành công"""
+        stat = os.stat(path)
+        entry = {
+            "path": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "options": canonical_options(options),
+            "outputs": [os.path.abspath(p) for p in outputs],
+        }
+        if self.use_hash:
+            entry["hash"] = file_hash(path)
+        self.entries[self._key(path)] = entry
+        self._touch()
+
+    def outputs(self, path):
+        """Các file đầu ra đã ghi nhận cho một file đầu vào"""
+        entry = self.entries.get(self._key(path))
+        return list(entry["outputs"]) if entry else []
+
+    def forget(self, path):
+        """Xóa mục của một file (ví dụ khi xử lý thất bại)"""
+        if self.entries.pop(self._key(path), None) is not None:
+            self._touch()
+
+    def _touch(self):
+        self._pending += 1
+        if self._pending >= MANIFEST_SAVE_EVERY:
+            self.save()
+
+    def filter(self, paths, options):
+        """
+        Tách danh sách file thành (cần xử lý, bỏ qua)
+
+        Trả về:
+            tuple: (list đường dẫn cần xử lý, list đường dẫn không thay đổi)
+        """
+        todo, skipped = [], []
+        for path in paths:
+            (skipped if self.is_up_to_date(path, options) else todo).append(path)
+        return todo, skipped
@@ -0,0 +1,113 @@
+"""
+Mô tả nhiều ảnh đầu ra (định dạng, tỷ lệ, chất lượng) tạo từ một lần giải mã
+"""
+
+import os
+from collections import namedtuple
+
+from resources.constants import OUTPUT_MODES, DEFAULT_OUTPUT_MODES, ENCODER_PROFILES, DEFAULT_ENCODER_PROFILE
+
+# Một ảnh đầu ra: định dạng (".png"...), tỷ lệ so với ảnh gốc và chất lượng nén
+# (JPEG/WebP, None: theo chế độ nén)
+OutputSpec = namedtuple("OutputSpec", ["format", "scale", "quality"], defaults=(".png", "1.0", None))
+
+# Các định dạng nhận tham số quality khi lưu
+QUALITY_FORMATS = (".jpg", ".jpeg", ".webp")
+
+# Đuôi file dùng chung cấu hình bộ mã hóa
+FORMAT_ALIASES = {".jpeg": ".jpg", ".tiff": ".tif"}
+
+
+def parse_output_specs(outputs):
+    """
+    Chuẩn hóa danh sách đầu ra
+
+    Tham số:
+        outputs (list): Các phần tử OutputSpec, tuple (format, scale, quality) hoặc
+            dict với khóa format/output_format, scale/scale_ratio và quality
+
+    Trả về:
+        list: Các OutputSpec với định dạng có dấu chấm, sắp xếp theo tỷ lệ giảm dần
+    """
+    specs = []
+    for output in outputs:
+        if isinstance(output, dict):
+            output = OutputSpec(
+                output.get("format", output.get("output_format", ".png")),
+                output.get("scale", output.get("scale_ratio", "1.0")),
+                output.get("quality"),
+            )
+        elif not isinstance(output, OutputSpec):
+            output = OutputSpec(*output)
+
+        fmt = (output.format or ".png").lower()
+        if not fmt.startswith("."):
+            fmt = "." + fmt
+        scale = output.scale or "1.0"
+        if float(scale) <= 0:
+            raise ValueError(f"Tỷ lệ đầu ra không hợp lệ: {scale}")
+        specs.append(OutputSpec(fmt, scale, output.quality))
+
+    if not specs:
+        raise ValueError("Cần ít nhất một đầu ra")
+    return sorted(specs, key=lambda s: float(s.scale), reverse=True)
+
+
+def output_name(image_path, spec):
+    """Tên file đầu ra, cùng quy ước với process_image ("0.5x-ten.jpg")"""
+    base_name = os.path.splitext(os.path.basename(image_path))[0]
+    scale_prefix = f"{spec.scale}x-" if float(spec.scale) != 1.0 else ""
+    return f"{scale_prefix}{base_name}{spec.format}"
+
+
+def working_format(specs):
+    """Định dạng đầu ra lưu được nhiều chế độ pixel nhất (quyết định chế độ làm việc chung)"""
+    return max(
+        (s.format for s in specs),
+        key=lambda fmt: len(OUTPUT_MODES.get(fmt, DEFAULT_OUTPUT_MODES))
+    )
+
+
+def encoder_options(output_format, profile=None, quality=None):
+    """
+    Tham số cho Image.save theo định dạng và chế độ nén
+
+    Tham số:
+        output_format (str): Định dạng đầu ra (".png", ".jpg"...)
+        profile (str): "default", "fast", "balanced" hoặc "small" (None: DEFAULT_ENCODER_PROFILE)
+        quality (int): Chất lượng JPEG/WebP, ghi đè giá trị của chế độ nén
+
+    Trả về:
+        dict: Tham số từ khóa cho Image.save
+    """
+    profile = profile or DEFAULT_ENCODER_PROFILE
+    if profile not in ENCODER_PROFILES:
+        raise ValueError(f"Chế độ nén không hỗ trợ: {profile}")
+
+    output_format = output_format.lower()
+    options = dict(ENCODER_PROFILES[profile].get(FORMAT_ALIASES.get(output_format, output_format), {}))
+    if quality is not None and output_format in QUALITY_FORMATS:
+        options["quality"] = int(quality)
+    return options
+
+
+def save_options(spec, profile=None):
+    """Tham số cho Image.save theo đầu ra"""
+    return encoder_options(spec.format, profile, spec.quality)
+
+
+def cascade_source(candidates, size):
+    """
+    Chọn ảnh nguồn cho một lần thay đổi kích thước trong chuỗi đầu ra
+
+    Ảnh nhỏ nhất trong các ảnh đã có mà vẫn không nhỏ hơn kích thước đích được
+    chọn (thu nhỏ dần từ kết quả lớn hơn gần nhất); khi phóng to, dùng ảnh lớn nhất.
+
+    Tham số:
+        candidates (list): Các ảnh PIL đã tạo (ảnh gốc đã xử lý và các kết quả)
+        size (tuple): Kích thước đích (width, height)
+    """
+    larger = [img for img in candidates if img.width >= size[0] and img.height >= size[1]]
+    if larger:
+        return min(larger, key=lambda img: img.width * img.height)
+    return max(candidates, key=lambda img: img.width * img.height)
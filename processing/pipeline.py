@@ -0,0 +1,218 @@
+"""
+Pipeline xử lý theo giai đoạn (đọc → biến đổi → ghi) nối với nhau bằng hàng đợi có giới hạn
+"""
+
+import queue
+import threading
+import time
+from collections import namedtuple
+
+# Một giai đoạn: tên, hàm xử lý (nhận kết quả của giai đoạn trước) và số luồng
+Stage = namedtuple("Stage", ["name", "func", "workers"])
+
+# Thời gian chờ tối đa mỗi lần get/put để luồng kiểm tra tín hiệu dừng (giây)
+POLL_INTERVAL = 0.1
+
+# Đánh dấu hết dữ liệu trong hàng đợi
+_DONE = object()
+
+
+class StageStats:
+    """Thống kê của một giai đoạn: thời gian bận, thời gian chờ và độ đầy hàng đợi vào"""
+
+    def __init__(self, name, workers, queue_depth):
+        self.name = name
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0       # thời gian chạy hàm xử lý
+        self.starved = 0.0    # thời gian chờ dữ liệu từ giai đoạn trước
+        self.blocked = 0.0    # thời gian chờ chỗ trống ở hàng đợi của giai đoạn sau
+        self._occupancy_sum = 0
+        self.occupancy_max = 0
+        self._lock = threading.Lock()
+
+    def add(self, busy=0.0, starved=0.0, blocked=0.0, occupancy=None, error=False):
+        with self._lock:
+            self.busy += busy
+            self.starved += starved
+            self.blocked += blocked
+            if occupancy is not None:
+                self.items += 1
+                self._occupancy_sum += occupancy
+                self.occupancy_max = max(self.occupancy_max, occupancy)
+            if error:
+                self.errors += 1
+
+    @property
+    def occupancy(self):
+        """Số phần tử trung bình đang chờ trong hàng đợi vào khi một luồng lấy việc"""
+        return self._occupancy_sum / self.items if self.items else 0.0
+
+    def utilization(self, elapsed):
+        """Tỷ lệ thời gian các luồng của giai đoạn bận xử lý (0..1)"""
+        return self.busy / (elapsed * self.workers) if elapsed > 0 else 0.0
+
+    def as_dict(self, elapsed):
+        return {
+            "name": self.name,
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "items": self.items,
+            "errors": self.errors,
+            "busy_s": round(self.busy, 4),
+            "starved_s": round(self.starved, 4),
+            "blocked_s": round(self.blocked, 4),
+            "utilization": round(self.utilization(elapsed), 4),
+            "occupancy": round(self.occupancy, 3),
+            "occupancy_max": self.occupancy_max,
+        }
+
+
+class StagedPipeline:
+    """
+    Chạy các giai đoạn chồng lên nhau: mỗi giai đoạn có nhóm luồng riêng, lấy việc
+    từ hàng đợi vào và đẩy kết quả sang hàng đợi của giai đoạn sau. Hàng đợi có
+    giới hạn nên giai đoạn nhanh phải chờ (không tích lũy ảnh đã giải mã trong bộ
+    nhớ), còn thời gian chờ I/O của giai đoạn đọc/ghi được che bởi giai đoạn tính toán.
+
+    Pillow và numpy nhả GIL khi giải mã, nén và tính toán nên luồng là đủ.
+    """
+
+    def __init__(self, stages, queue_depth=2):
+        """
+        Khởi tạo pipeline
+
+        Tham số:
+            stages (list): Danh sách Stage theo thứ tự
+            queue_depth (int | list): Sức chứa hàng đợi vào của mỗi giai đoạn
+                (một số cho tất cả hoặc danh sách theo từng giai đoạn)
+        """
+        if not stages:
+            raise ValueError("Pipeline cần ít nhất một giai đoạn")
+        if isinstance(queue_depth, int):
+            queue_depth = [queue_depth] * len(stages)
+        if len(queue_depth) != len(stages):
+            raise ValueError("Số độ sâu hàng đợi phải bằng số giai đoạn")
+
+        self.stages = [Stage(s.name, s.func, max(1, int(s.workers))) for s in stages]
+        self.queue_depths = [max(1, int(d)) for d in queue_depth]
+        self.stats = [StageStats(s.name, s.workers, d) for s, d in zip(self.stages, self.queue_depths)]
+        self.elapsed = 0.0
+
+    def run(self, items):
+        """
+        Đưa các phần tử qua mọi giai đoạn
+
+        Lỗi ở một giai đoạn không dừng pipeline: phần tử lỗi được chuyển thẳng ra đầu
+        ra cùng thông báo lỗi, các giai đoạn sau bỏ qua nó. Lỗi khi lấy phần tử từ
+        items được ném lại cho bên gọi sau khi các phần tử đã đưa vào hoàn thành.
+
+        Trả về (generator):
+            tuple: (phần tử, kết quả của giai đoạn cuối, lỗi hoặc None) theo thứ tự hoàn thành
+        """
+        stop = threading.Event()
+        queues = [queue.Queue(maxsize=d) for d in self.queue_depths]
+        queues.append(queue.Queue(maxsize=self.queue_depths[-1]))
+        remaining = [s.workers for s in self.stages]
+        lock = threading.Lock()
+        feed_error = []
+
+        def put(q, entry):
+            # Trả về thời gian bị chặn; dừng chờ nếu pipeline bị hủy
+            start = time.perf_counter()
+            while not stop.is_set():
+                try:
+                    q.put(entry, timeout=POLL_INTERVAL)
+                    break
+                except queue.Full:
+                    continue
+            return time.perf_counter() - start
+
+        def feed():
+            # Luôn báo hết dữ liệu, kể cả khi items lỗi, để bên nhận kết quả không chờ mãi
+            try:
+                for item in items:
+                    if stop.is_set():
+                        return
+                    put(queues[0], (item, item, None))
+            except Exception as e:
+                feed_error.append(e)
+            finally:
+                for _ in range(self.stages[0].workers):
+                    put(queues[0], _DONE)
+
+        def work(index):
+            stage, stats = self.stages[index], self.stats[index]
+            q_in, q_out = queues[index], queues[index + 1]
+            while not stop.is_set():
+                start = time.perf_counter()
+                try:
+                    entry = q_in.get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    stats.add(starved=time.perf_counter() - start)
+                    continue
+                starved = time.perf_counter() - start
+
+                if entry is _DONE:
+                    stats.add(starved=starved)
+                    with lock:
+                        remaining[index] -= 1
+                        last = remaining[index] == 0
+                    # Luồng cuối của giai đoạn báo hết dữ liệu cho giai đoạn sau
+                    if last:
+                        next_workers = self.stages[index + 1].workers if index + 1 < len(self.stages) else 1
+                        for _ in range(next_workers):
+                            put(q_out, _DONE)
+                    return
+
+                occupancy = q_in.qsize() + 1
+                item, value, error = entry
+                busy = 0.0
+                if error is None:
+                    start = time.perf_counter()
+                    try:
+                        value = stage.func(value)
+                    except Exception as e:
+                        value, error = None, str(e) or e.__class__.__name__
+                    busy = time.perf_counter() - start
+
+                blocked = put(q_out, (item, value, error))
+                stats.add(busy, starved, blocked, occupancy, error is not None and busy > 0)
+
+        threads = [threading.Thread(target=feed, daemon=True)]
+        for index, stage in enumerate(self.stages):
+            threads.extend(
+                threading.Thread(target=work, args=(index,), daemon=True, name=f"{stage.name}-{n}")
+                for n in range(stage.workers)
+            )
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                entry = queues[-1].get()
+                if entry is _DONE:
+                    break
+                yield entry
+            if feed_error:
+                raise feed_error[0]
+        finally:
+            self.elapsed = time.perf_counter() - started
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    def bottleneck(self):
+        """Giai đoạn có tỷ lệ bận cao nhất"""
+        return max(self.stats, key=lambda s: s.utilization(self.elapsed)).name
+
+    def report(self):
+        """Thống kê của lần chạy gần nhất (có thể ghi JSON)"""
+        return {
+            "elapsed_s": round(self.elapsed, 4),
+            "bottleneck": self.bottleneck(),
+            "stages": [s.as_dict(self.elapsed) for s in self.stats],
+        }
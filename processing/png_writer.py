@@ -0,0 +1,342 @@
+"""
+Ghi file PNG theo từng dải hàng mà không cần giữ toàn bộ ảnh trong bộ nhớ
+"""
+
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Chữ ký 8 byte của mọi file PNG
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Color type PNG tương ứng với chế độ ảnh Pillow (độ sâu 8 bit)
+PNG_COLOR_TYPES = {
+    "L": 0,
+    "RGB": 2,
+    "LA": 4,
+    "RGBA": 6,
+}
+
+# Kích thước tối đa của một chunk IDAT
+IDAT_CHUNK_SIZE = 1 << 20
+
+# Ảnh từ số pixel này trở lên được nén song song (nhỏ hơn: Pillow đủ nhanh)
+PARALLEL_MIN_PIXELS = 16_000_000
+
+# Số byte dữ liệu hàng chưa lọc trong mỗi khối nén song song
+PARALLEL_CHUNK_BYTES = 1 << 21
+
+# Cửa sổ của DEFLATE: mỗi khối được mồi bằng 32 KB dữ liệu đã lọc đứng trước nó
+DEFLATE_WINDOW = 32768
+
+# Modulo của Adler-32
+_ADLER_BASE = 65521
+
+
+def _chunk(chunk_type, data):
+    """Đóng gói một chunk PNG (độ dài, loại, dữ liệu, CRC)"""
+    crc = zlib.crc32(data, zlib.crc32(chunk_type)) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", crc)
+
+
+def filter_rows(rows, prev_row, bpp):
+    """
+    Lọc các hàng PNG bằng bộ lọc thích ứng (None/Sub/Up/Average/Paeth)
+
+    Với mỗi hàng, bộ lọc có tổng trị tuyệt đối (theo byte có dấu) nhỏ nhất được
+    chọn, giống heuristic của libpng. Mọi phép tính được vector hóa trên cả dải.
+
+    Tham số:
+        rows (np.ndarray): Dữ liệu dải, shape (số hàng, số byte mỗi hàng), uint8
+        prev_row (np.ndarray): Hàng ngay phía trên dải (None nếu là dải đầu tiên)
+        bpp (int): Số byte mỗi pixel
+
+    Trả về:
+        bytes: Dữ liệu đã lọc, mỗi hàng bắt đầu bằng byte loại bộ lọc
+    """
+    x = rows.astype(np.int16)
+    n_rows, stride = x.shape
+
+    # Hàng phía trên (b), pixel bên trái (a) và pixel trên-trái (c)
+    up = np.empty_like(x)
+    up[0] = prev_row if prev_row is not None else 0
+    up[1:] = x[:-1]
+    left = np.zeros_like(x)
+    left[:, bpp:] = x[:, :-bpp]
+    up_left = np.zeros_like(x)
+    up_left[:, bpp:] = up[:, :-bpp]
+
+    # Bộ dự đoán Paeth
+    p = left + up - up_left
+    pa = np.abs(p - left)
+    pb = np.abs(p - up)
+    pc = np.abs(p - up_left)
+    paeth = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, up, up_left))
+
+    candidates = np.stack([
+        x,
+        x - left,
+        x - up,
+        x - ((left + up) >> 1),
+        x - paeth,
+    ]).astype(np.uint8)
+
+    # Chọn bộ lọc cho từng hàng theo tổng trị tuyệt đối của byte có dấu
+    cost = np.abs(candidates.view(np.int8).astype(np.int32)).sum(axis=2)
+    choice = np.argmin(cost, axis=0)
+
+    out = np.empty((n_rows, stride + 1), dtype=np.uint8)
+    out[:, 0] = choice
+    out[:, 1:] = candidates[choice, np.arange(n_rows)]
+    return out.tobytes()
+
+
+def adler32_combine(adler1, adler2, len2):
+    """Adler-32 của dữ liệu nối (A + B) từ Adler-32 của A, của B và độ dài B (như zlib)"""
+    rem = len2 % _ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1) % _ADLER_BASE
+    sum1 = (sum1 + (adler2 & 0xFFFF) + _ADLER_BASE - 1) % _ADLER_BASE
+    sum2 = (sum2 + ((adler1 >> 16) & 0xFFFF) + ((adler2 >> 16) & 0xFFFF) + _ADLER_BASE - rem) % _ADLER_BASE
+    return sum1 | (sum2 << 16)
+
+
+def zlib_header(level):
+    """Hai byte đầu luồng zlib (CMF, FLG) cho mức nén đã cho"""
+    cmf = 0x78  # DEFLATE, cửa sổ 32 KB
+    flevel = 0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3
+    flg = flevel << 6
+    flg += 31 - (cmf * 256 + flg) % 31
+    return bytes((cmf, flg))
+
+
+def _compress_chunk(rows, context, from_start, bpp, level):
+    """
+    Lọc và nén một khối hàng thành các khối DEFLATE thô, kết thúc bằng sync flush
+
+    Tham số:
+        rows (np.ndarray): Các hàng của khối (uint8, shape (số hàng, số byte mỗi hàng))
+        context (np.ndarray): Các hàng ngay phía trên khối (có thể rỗng)
+        from_start (bool): context bắt đầu từ hàng đầu tiên của ảnh
+        bpp (int): Số byte mỗi pixel
+        level (int): Mức nén zlib
+
+    Trả về:
+        tuple: (dữ liệu nén, Adler-32 và độ dài của dữ liệu đã lọc)
+    """
+    zdict = None
+    prev_row = None
+    if len(context):
+        prev_row = context[-1]
+        # Dữ liệu đã lọc của các hàng phía trên chỉ phụ thuộc vào chính các hàng đó
+        # nên mỗi luồng tự tính lại được từ điển mà không chờ khối trước
+        if from_start:
+            above = filter_rows(context, None, bpp)
+        else:
+            above = filter_rows(context[1:], context[0], bpp) if len(context) > 1 else b""
+        zdict = above[-DEFLATE_WINDOW:] or None
+
+    filtered = filter_rows(rows, prev_row, bpp)
+    if zdict:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    data = compressor.compress(filtered) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    return data, zlib.adler32(filtered), len(filtered)
+
+
+class PngStripWriter:
+    """Ghi ảnh PNG 8-bit theo từng dải hàng từ trên xuống dưới"""
+
+    def __init__(self, path, width, height, mode="RGBA", compress_level=6):
+        """
+        Khởi tạo writer
+
+        Tham số:
+            path (str): Đường dẫn file PNG đầu ra
+            width (int): Chiều rộng ảnh
+            height (int): Chiều cao ảnh
+            mode (str): Chế độ ảnh ("L", "LA", "RGB", "RGBA")
+            compress_level (int): Mức nén zlib (0-9)
+        """
+        if mode not in PNG_COLOR_TYPES:
+            raise ValueError(f"Chế độ ảnh không hỗ trợ: {mode}")
+
+        self.path = path
+        self.width = width
+        self.height = height
+        self.mode = mode
+        self.bpp = len(mode)
+        self.rows_written = 0
+        self._prev_row = None
+        self._pending = b""
+        self._compressor = zlib.compressobj(compress_level)
+        self._file = open(path, "wb")
+
+        ihdr = struct.pack(">IIBBBBB", width, height, 8, PNG_COLOR_TYPES[mode], 0, 0, 0)
+        self._file.write(PNG_SIGNATURE)
+        self._file.write(_chunk(b"IHDR", ihdr))
+
+    def write(self, rows):
+        """Ghi một dải hàng (np.ndarray shape (h, w) hoặc (h, w, kênh), uint8)"""
+        rows = np.ascontiguousarray(rows, dtype=np.uint8).reshape(len(rows), self.width * self.bpp)
+        if not len(rows):
+            return
+
+        self._emit(self._compressor.compress(filter_rows(rows, self._prev_row, self.bpp)))
+        self._prev_row = rows[-1].astype(np.int16)
+        self.rows_written += len(rows)
+
+    def _emit(self, data, final=False):
+        """Gom dữ liệu nén thành các chunk IDAT"""
+        self._pending += data
+        while len(self._pending) >= IDAT_CHUNK_SIZE or (final and self._pending):
+            self._file.write(_chunk(b"IDAT", self._pending[:IDAT_CHUNK_SIZE]))
+            self._pending = self._pending[IDAT_CHUNK_SIZE:]
+
+    def close(self):
+        """Kết thúc luồng nén và ghi chunk IEND"""
+        if self._file is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Đã ghi {self.rows_written}/{self.height} hàng")
+            self._emit(self._compressor.flush(), final=True)
+            self._file.write(_chunk(b"IEND", b""))
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParallelPngWriter(PngStripWriter):
+    """
+    Ghi PNG với bước lọc và nén chạy song song trên nhiều luồng (zlib nhả GIL)
+
+    Dữ liệu được chia thành các khối độc lập, mỗi khối được nén thành các khối
+    DEFLATE thô kết thúc bằng sync flush (căn theo byte) nên có thể nối liền nhau
+    thành một luồng zlib hợp lệ, giống pigz. Mỗi khối dùng 32 KB dữ liệu đứng
+    trước làm từ điển nên tỷ lệ nén gần như không đổi; Adler-32 của cả luồng
+    được ghép từ Adler-32 của từng khối.
+    """
+
+    def __init__(self, path, width, height, mode="RGBA", compress_level=6, workers=None,
+                 chunk_bytes=PARALLEL_CHUNK_BYTES):
+        """
+        Khởi tạo writer
+
+        Tham số:
+            workers (int): Số luồng nén (None: số lõi CPU)
+            chunk_bytes (int): Số byte dữ liệu hàng trong mỗi khối nén
+            (các tham số khác như PngStripWriter)
+        """
+        super().__init__(path, width, height, mode, compress_level)
+        stride = width * self.bpp
+        workers = max(1, workers or os.cpu_count() or 1)
+
+        self.compress_level = compress_level
+        self.chunk_rows = max(1, chunk_bytes // stride)
+        # Số hàng phía trên cần giữ: đủ 32 KB dữ liệu đã lọc, cộng một hàng làm hàng trên
+        self.context_rows = -(-DEFLATE_WINDOW // (stride + 1)) + 1
+        self._context = np.empty((0, stride), dtype=np.uint8)
+        self._submitted = 0
+        self._adler = 1
+        self._futures = deque()
+        self._max_pending = 2 * workers
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._emit(zlib_header(compress_level))
+
+    def write(self, rows):
+        """Ghi một dải hàng (np.ndarray shape (h, w) hoặc (h, w, kênh), uint8)"""
+        rows = np.ascontiguousarray(rows, dtype=np.uint8).reshape(len(rows), self.width * self.bpp)
+        for start in range(0, len(rows), self.chunk_rows):
+            chunk = rows[start:start + self.chunk_rows]
+            from_start = self._submitted == len(self._context)
+            self._futures.append(self._executor.submit(
+                _compress_chunk, chunk, self._context, from_start, self.bpp, self.compress_level
+            ))
+            self._submitted += len(chunk)
+            # Sao chép để không giữ cả dải trong bộ nhớ sau khi các khối đã nén xong
+            self._context = np.concatenate([self._context, chunk])[-self.context_rows:].copy()
+
+            while len(self._futures) >= self._max_pending:
+                self._collect()
+        self.rows_written += len(rows)
+
+    def _collect(self):
+        """Ghi kết quả của khối cũ nhất theo đúng thứ tự"""
+        data, adler, length = self._futures.popleft().result()
+        self._adler = adler32_combine(self._adler, adler, length)
+        self._emit(data)
+
+    def close(self):
+        """Ghi các khối còn lại, khối DEFLATE cuối, Adler-32 và chunk IEND"""
+        if self._file is None:
+            return
+        try:
+            if self.rows_written != self.height:
+                raise ValueError(f"Đã ghi {self.rows_written}/{self.height} hàng")
+            while self._futures:
+                self._collect()
+            # Khối rỗng có cờ BFINAL kết thúc luồng DEFLATE
+            final = zlib.compressobj(self.compress_level, zlib.DEFLATED, -15).flush(zlib.Z_FINISH)
+            self._emit(final + struct.pack(">I", self._adler & 0xFFFFFFFF), final=True)
+            self._file.write(_chunk(b"IEND", b""))
+        finally:
+            self._shutdown()
+
+    def _shutdown(self):
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._futures.clear()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._shutdown()
+
+
+def can_write_parallel(img):
+    """
+    Kiểm tra ảnh PIL có nên ghi bằng ParallelPngWriter không
+
+    Chỉ ảnh lớn, chế độ 8-bit hỗ trợ, không có ICC profile hoặc màu trong suốt
+    (Pillow ghi thêm các chunk này) và khi có nhiều lõi CPU.
+    """
+    return (
+        img.width * img.height >= PARALLEL_MIN_PIXELS
+        and img.mode in PNG_COLOR_TYPES
+        and not any(key in img.info for key in ("icc_profile", "transparency"))
+        and (os.cpu_count() or 1) > 1
+    )
+
+
+def open_png_writer(path, width, height, mode="RGBA", compress_level=6):
+    """Writer theo dải: song song cho ảnh lớn khi có nhiều lõi CPU, tuần tự cho ảnh nhỏ"""
+    if width * height >= PARALLEL_MIN_PIXELS and (os.cpu_count() or 1) > 1:
+        return ParallelPngWriter(path, width, height, mode, compress_level)
+    return PngStripWriter(path, width, height, mode, compress_level)
+
+
+def save_png_parallel(img, path, compress_level=6, workers=None):
+    """Ghi ảnh PIL ra PNG bằng ParallelPngWriter, đọc ảnh theo từng dải hàng"""
+    strip_rows = max(1, (PARALLEL_CHUNK_BYTES * 16) // (img.width * len(img.mode)))
+    with ParallelPngWriter(path, img.width, img.height, img.mode, compress_level, workers) as writer:
+        for y0 in range(0, img.height, strip_rows):
+            y1 = min(img.height, y0 + strip_rows)
+            writer.write(np.asarray(img.crop((0, y0, img.width, y1))))
@@ -0,0 +1,151 @@
+"""
+Xem trước điều chỉnh ảnh trên bản thu nhỏ (proxy) chỉ giải mã một lần
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+from resources.constants import RESAMPLE, REDUCING_GAP, PREVIEW_MAX_SIZE
+
+# Số proxy (ảnh đã giải mã) và số kết quả xem trước được giữ trong bộ nhớ
+PROXY_CACHE_SIZE = 4
+RESULT_CACHE_SIZE = 16
+
+
+class PreviewEngine:
+    """
+    Tạo ảnh xem trước cho các thanh trượt điều chỉnh
+
+    Ảnh nguồn được giải mã một lần ở độ phân giải không vượt quá màn hình (giảm
+    kích thước ngay lúc giải mã như đường thu nhỏ của ImageProcessor), sau đó mỗi
+    lần kéo thanh trượt chỉ chạy điều chỉnh và xóa nền trên bản thu nhỏ vừa khung
+    xem trước, nên thời gian không phụ thuộc kích thước file gốc.
+    """
+
+    def __init__(self, image_processor, max_size=PREVIEW_MAX_SIZE):
+        """
+        Khởi tạo bộ xem trước
+
+        Tham số:
+            image_processor (ImageProcessor): Bộ xử lý dùng chung bảng tra và logic xóa nền
+            max_size (tuple): Kích thước tối đa của proxy (thường là độ phân giải màn hình)
+        """
+        self.image_processor = image_processor
+        self.max_size = max_size
+        self.last_render_ms = 0.0
+        self._proxies = OrderedDict()
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(path):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+    @staticmethod
+    def _remember(cache, key, value, limit):
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def proxy(self, path):
+        """
+        Proxy của ảnh: ảnh gốc thu nhỏ vừa max_size, kèm kích thước gốc
+
+        Lần đầu gọi sẽ giải mã (có thể chạy ở luồng nền); các lần sau dùng bộ nhớ đệm.
+
+        Trả về:
+            tuple: (PIL.Image, (width, height) của ảnh gốc)
+        """
+        key = self._key(path)
+        with self._lock:
+            if key in self._proxies:
+                self._proxies.move_to_end(key)
+                return self._proxies[key]
+
+        proxy = self._decode(path)
+        with self._lock:
+            self._remember(self._proxies, key, proxy, PROXY_CACHE_SIZE)
+        return proxy
+
+    def _decode(self, path):
+        """Giải mã ảnh ở độ phân giải thấp nhất đủ cho proxy"""
+        with Image.open(path) as header:
+            source_size = header.size
+
+        scale = min(1.0, self.max_size[0] / source_size[0], self.max_size[1] / source_size[1])
+        if scale < 1.0:
+            img, size = self.image_processor._open_reduced(path, scale)
+            img = img.resize(size, RESAMPLE, reducing_gap=REDUCING_GAP)
+        else:
+            img = Image.open(path)
+            img.load()
+
+        # Chế độ 8-bit tối thiểu cho các bước điều chỉnh (RGBA chỉ khi ảnh có kênh alpha)
+        mode = self.image_processor._working_mode(img.mode, ".png", adjusting=True,
+                                                  transparency="transparency" in img.info)
+        if img.mode != mode:
+            img = img.convert(mode)
+        return img, source_size
+
+    def render(self, path, brightness=1.0, contrast=1.0, saturation=1.0,
+               remove_black=False, remove_white=False, edge_only=False, size=None):
+        """
+        Áp dụng điều chỉnh và xóa nền lên proxy
+
+        Tham số:
+            path (str): Ảnh nguồn
+            brightness, contrast, saturation (float): Các hệ số điều chỉnh
+            remove_black, remove_white, edge_only (bool): Tùy chọn xóa nền
+            size (tuple): Khung hiển thị; proxy được thu nhỏ vừa khung trước khi xử lý
+
+        Trả về:
+            PIL.Image: Ảnh xem trước
+        """
+        start = time.perf_counter()
+        params = (float(brightness), float(contrast), float(saturation),
+                  bool(remove_black), bool(remove_white), bool(edge_only))
+        key = (self._key(path), tuple(size) if size else None, params)
+
+        with self._lock:
+            cached = self._results.get(key)
+        if cached is None:
+            img = self._display_proxy(path, size)
+            if remove_black or remove_white:
+                if img.mode != "RGBA":
+                    img = img.convert("RGBA")
+            img = self.image_processor._apply_adjustments(img, *params[:3])
+            cached = self.image_processor.remove_background(img, remove_black, remove_white, edge_only=edge_only)
+            with self._lock:
+                self._remember(self._results, key, cached, RESULT_CACHE_SIZE)
+
+        self.last_render_ms = (time.perf_counter() - start) * 1000
+        return cached
+
+    def _display_proxy(self, path, size):
+        """Proxy thu nhỏ vừa khung hiển thị (được lưu như một kết quả không điều chỉnh)"""
+        img, _ = self.proxy(path)
+        if not size or (img.width <= size[0] and img.height <= size[1]):
+            return img
+
+        key = (self._key(path), tuple(size), None)
+        with self._lock:
+            display = self._results.get(key)
+        if display is None:
+            display = img.copy()
+            display.thumbnail(size, RESAMPLE)
+            with self._lock:
+                self._remember(self._results, key, display, RESULT_CACHE_SIZE)
+        return display
+
+    def output_size(self, path, scale_ratio):
+        """Kích thước ảnh đầu ra với tỷ lệ đã cho"""
+        _, (width, height) = self.proxy(path)
+        scale = float(scale_ratio)
+        if scale <= 0 or scale == 1.0:
+            return width, height
+        return int(width * scale), int(height * scale)
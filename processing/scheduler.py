@@ -0,0 +1,172 @@
+"""
+Xếp lịch xử lý hàng loạt theo mô hình chi phí (số pixel, bộ nhớ ước tính)
+"""
+
+import os
+import threading
+import warnings
+from collections import namedtuple
+from concurrent.futures import wait, FIRST_COMPLETED
+import numpy as np
+import rasterio
+from PIL import Image
+
+from resources.constants import DEFAULT_BATCH_MEMORY_MB, SCHEDULE_ORDERS
+
+# Số byte mỗi mẫu theo chế độ ảnh Pillow (khi GDAL không đọc được file)
+PIL_SAMPLE_BYTES = {
+    "1": 1, "L": 1, "P": 1, "LA": 1, "RGB": 1, "RGBA": 1, "CMYK": 1, "YCbCr": 1,
+    "I;16": 2, "I;16B": 2, "I;16L": 2, "I": 4, "F": 4,
+}
+
+# Thông tin header và chi phí ước tính của một tác vụ
+BatchTask = namedtuple("BatchTask", ["path", "width", "height", "bands", "sample_bytes", "memory"])
+
+
+def read_header(path):
+    """
+    Đọc kích thước, số band và số byte mỗi mẫu từ header (không giải mã dữ liệu ảnh)
+
+    Trả về:
+        tuple: (width, height, bands, sample_bytes), toàn 0 nếu không đọc được
+    """
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            with rasterio.open(path) as src:
+                sample_bytes = max(np.dtype(dt).itemsize for dt in src.dtypes)
+                return src.width, src.height, src.count, sample_bytes
+    except Exception:
+        pass
+
+    try:
+        with Image.open(path) as img:
+            return img.width, img.height, len(img.getbands()), PIL_SAMPLE_BYTES.get(img.mode, 1)
+    except Exception:
+        return 0, 0, 0, 0
+
+
+def decoded_bytes(task):
+    """Số byte của ảnh nguồn sau khi giải mã"""
+    return task.width * task.height * task.bands * task.sample_bytes
+
+
+class BatchScheduler:
+    """Sắp xếp và cấp phát tác vụ sao cho tổng bộ nhớ ước tính không vượt ngân sách"""
+
+    def __init__(self, estimate, memory_budget_mb=None, order="largest_first", max_workers=None):
+        """
+        Khởi tạo bộ xếp lịch
+
+        Tham số:
+            estimate (callable): Hàm nhận BatchTask (memory=0) và trả về bộ nhớ đỉnh (byte)
+            memory_budget_mb (int): Tổng bộ nhớ cho các tác vụ chạy đồng thời (MB)
+            order (str): "largest_first" hoặc "shortest_first"
+            max_workers (int): Số tác vụ chạy đồng thời tối đa
+        """
+        if order not in SCHEDULE_ORDERS:
+            raise ValueError(f"Thứ tự xếp lịch không hỗ trợ: {order}")
+
+        self.estimate = estimate
+        self.memory_budget = int(float(memory_budget_mb or DEFAULT_BATCH_MEMORY_MB) * 1024 * 1024)
+        self.order = order
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+
+    def plan(self, paths):
+        """
+        Đọc header của từng file, ước tính chi phí và sắp xếp theo thứ tự đã chọn
+
+        Trả về:
+            list: Danh sách BatchTask
+        """
+        tasks = []
+        for path in paths:
+            task = BatchTask(path, *read_header(path), 0)
+            tasks.append(task._replace(memory=int(self.estimate(task))))
+
+        # Sắp xếp ổn định: các file cùng chi phí giữ thứ tự ban đầu
+        tasks.sort(key=lambda t: (t.memory, t.width * t.height), reverse=self.order == "largest_first")
+        return tasks
+
+    def run(self, submit, paths):
+        """
+        Cấp phát tác vụ cho executor trong giới hạn ngân sách bộ nhớ
+
+        Một tác vụ chỉ được gửi đi khi tổng bộ nhớ của các tác vụ đang chạy cộng với
+        nó không vượt ngân sách; tác vụ đầu tiên trong hàng đợi vừa với phần còn lại
+        được chọn, nên các file nhỏ lấp chỗ trống bên cạnh file lớn. Tác vụ lớn hơn
+        cả ngân sách được chạy một mình.
+
+        Tham số:
+            submit (callable): Hàm nhận đường dẫn và trả về Future
+            paths (list): Danh sách file
+
+        Trả về (generator):
+            tuple: (BatchTask, Future) theo thứ tự hoàn thành
+        """
+        pending = self.plan(paths)
+        running = {}
+        used = 0
+
+        while pending or running:
+            while pending and len(running) < self.max_workers:
+                task = self._next_task(pending, used, bool(running))
+                if task is None:
+                    break
+                running[submit(task.path)] = task
+                used += task.memory
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                used -= task.memory
+                yield task, future
+
+    def _next_task(self, pending, used, busy):
+        """Lấy tác vụ đầu tiên vừa với ngân sách còn lại (None nếu phải chờ)"""
+        if not busy:
+            return pending.pop(0)
+        for i, task in enumerate(pending):
+            if used + task.memory <= self.memory_budget:
+                return pending.pop(i)
+        return None
+
+
+class MemoryBudget:
+    """
+    Ngân sách bộ nhớ cho các tác vụ đang nằm trong pipeline (đã giải mã, chưa ghi xong)
+
+    acquire chặn cho đến khi tổng bộ nhớ ước tính của các tác vụ đang giữ cộng với
+    tác vụ mới không vượt ngân sách; tác vụ lớn hơn cả ngân sách chạy một mình
+    (giống BatchScheduler).
+    """
+
+    def __init__(self, memory_budget):
+        """
+        Tham số:
+            memory_budget (int): Ngân sách (byte), ví dụ BatchScheduler.memory_budget
+        """
+        self.memory_budget = memory_budget
+        self.used = 0
+        self.closed = False
+        self._condition = threading.Condition()
+
+    def acquire(self, nbytes):
+        """Giữ nbytes, chờ khi ngân sách còn lại không đủ"""
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.closed or self.used == 0 or self.used + nbytes <= self.memory_budget
+            )
+            self.used += nbytes
+
+    def release(self, nbytes):
+        """Trả lại nbytes khi tác vụ đã ra khỏi pipeline (hoàn thành hoặc lỗi)"""
+        with self._condition:
+            self.used -= nbytes
+            self._condition.notify_all()
+
+    def close(self):
+        """Không chặn nữa (khi lô bị dừng giữa chừng) để các luồng đang chờ kết thúc"""
+        with self._condition:
+            self.closed = True
+            self._condition.notify_all()
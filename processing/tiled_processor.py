@@ -0,0 +1,436 @@
+"""
+Xử lý ảnh rất lớn theo từng dải hàng (cửa sổ rasterio) với giới hạn bộ nhớ
+"""
+
+import math
+import os
+import time
+import numpy as np
+import rasterio
+from rasterio.enums import ColorInterp
+from rasterio.windows import Window
+from PIL import Image
+
+from resources.constants import RESAMPLE, DEFAULT_MEMORY_LIMIT_MB
+from processing.adjustments import apply_adjustments, contrast_mean
+from processing.png_writer import open_png_writer
+from processing.background import key_colors, background_runs, concat_runs, edge_connected, clear_runs
+from processing.timing import ImageTimings, image_bytes
+from processing.outputs import encoder_options
+
+# Số byte ước tính cho mỗi pixel nguồn khi xử lý toàn ảnh trong bộ nhớ
+# (ảnh RGBA, các ảnh trung gian khi điều chỉnh, bản sao khi xóa nền)
+IN_MEMORY_BYTES_PER_PIXEL = 24
+
+# Số byte ước tính cho mỗi pixel nguồn của một dải (RGBA, bộ đệm float32, ảnh resize)
+STRIP_BYTES_PER_PIXEL = 48
+
+# Trình điều khiển nguồn mà rasterio giải mã giống hệt Pillow
+TILED_SOURCE_DRIVERS = ("GTiff", "PNG")
+
+# Định dạng đầu ra có thể ghi tuần tự theo dải
+TILED_OUTPUT_FORMATS = (".png", ".tif", ".tiff")
+
+# Tên kiểu nén TIFF của Pillow (ENCODER_PROFILES) và của GDAL tương ứng
+GDAL_COMPRESSION = {"tiff_lzw": "lzw", "tiff_adobe_deflate": "deflate"}
+
+# Bán kính bộ lọc Lanczos (pixel nguồn khi phóng to, nhân với tỷ lệ khi thu nhỏ)
+LANCZOS_SUPPORT = 3.0
+
+# Số bit phần thập phân của hệ số nội suy 8-bit trong Pillow (32 - 8 - 2)
+PRECISION_BITS = 22
+
+
+def _sinc(x):
+    """Hàm sinc chuẩn hóa sin(πx)/(πx)"""
+    if x == 0.0:
+        return 1.0
+    x = x * math.pi
+    return math.sin(x) / x
+
+
+def _lanczos(x):
+    """Nhân Lanczos-3 (sinc cắt cụt), giống lanczos_filter của Pillow"""
+    if -LANCZOS_SUPPORT <= x < LANCZOS_SUPPORT:
+        return _sinc(x) * _sinc(x / LANCZOS_SUPPORT)
+    return 0.0
+
+
+def lanczos_coeffs(in_size, out_size):
+    """
+    Hệ số nội suy Lanczos theo một trục, tính giống hệt precompute_coeffs và
+    normalize_coeffs_8bpc của Pillow để các dải cho kết quả trùng với ảnh đầy đủ
+
+    Trả về:
+        tuple: (bounds (out_size, 2) int: hàng bắt đầu và số hàng,
+                kk (out_size, ksize) int32: hệ số dấu phẩy tĩnh)
+    """
+    scale = filterscale = in_size / out_size
+    if filterscale < 1.0:
+        filterscale = 1.0
+    support = LANCZOS_SUPPORT * filterscale
+    ksize = int(math.ceil(support)) * 2 + 1
+
+    bounds = np.zeros((out_size, 2), dtype=np.int64)
+    kk = np.zeros((out_size, ksize), dtype=np.int32)
+    ss = 1.0 / filterscale
+    one = 1 << PRECISION_BITS
+
+    for xx in range(out_size):
+        center = (xx + 0.5) * scale
+        xmin = max(0, int(center - support + 0.5))
+        xmax = min(in_size, int(center + support + 0.5)) - xmin
+
+        weights = [_lanczos((x + xmin - center + 0.5) * ss) for x in range(xmax)]
+        total = sum(weights)
+        for x, w in enumerate(weights):
+            if total != 0.0:
+                w /= total
+            kk[xx, x] = int(-0.5 + w * one) if w < 0 else int(0.5 + w * one)
+
+        bounds[xx] = (xmin, xmax)
+
+    return bounds, kk
+
+
+def resample_vertical(rows, row_offset, bounds, kk):
+    """
+    Lượt nội suy theo chiều dọc của Pillow (8-bit) cho một nhóm hàng đầu ra
+
+    Tham số:
+        rows (np.ndarray): Các hàng nguồn (h, w, kênh) uint8, bắt đầu từ hàng row_offset
+        row_offset (int): Chỉ số của rows[0] trong ảnh nguồn đầy đủ
+        bounds, kk: Các hàng lấy từ lanczos_coeffs cho những hàng đầu ra cần tính
+    """
+    acc = np.full((len(bounds),) + rows.shape[1:], 1 << (PRECISION_BITS - 1), dtype=np.int32)
+    start = bounds[:, 0] - row_offset
+    last = len(rows) - 1
+
+    for j in range(kk.shape[1]):
+        weight = kk[:, j]
+        if not weight.any():
+            continue
+        index = np.minimum(start + j, last)
+        acc += rows[index].astype(np.int32) * weight[:, None, None]
+
+    np.right_shift(acc, PRECISION_BITS, out=acc)
+    np.clip(acc, 0, 255, out=acc)
+    return acc.astype(np.uint8)
+
+
+def can_read_rgba(image_path):
+    """Kiểm tra rasterio có giải mã ảnh giống hệt Image.open(...).convert("RGBA") không"""
+    try:
+        with rasterio.open(image_path) as src:
+            if src.driver not in TILED_SOURCE_DRIVERS:
+                return False
+            if src.count not in (1, 2, 3, 4) or any(dt != 'uint8' for dt in src.dtypes):
+                return False
+            # Ảnh 1-bit được GDAL trả về 0/1 còn Pillow trả về 0/255
+            nbits = src.tags(1, 'IMAGE_STRUCTURE').get('NBITS')
+            if nbits and int(nbits) != 8:
+                return False
+            # Ảnh bảng màu
+            try:
+                src.colormap(1)
+                return False
+            except ValueError:
+                pass
+            # PNG có tRNS được GDAL đọc thành nodata, Pillow đọc thành alpha
+            if src.driver == 'PNG' and src.nodata is not None:
+                return False
+            # 4 band phải là RGBA (không phải CMYK...)
+            if src.count == 4 and src.colorinterp[3] != ColorInterp.alpha:
+                return False
+            return True
+    except Exception:
+        return False
+
+
+def image_from_bands(data):
+    """Chuyển mảng band (count, h, w) uint8 sang ảnh L, LA, RGB hoặc RGBA theo số band"""
+    if data.shape[0] == 1:
+        return Image.fromarray(data[0])
+    return Image.fromarray(np.ascontiguousarray(np.moveaxis(data, 0, 2)))
+
+
+def rgba_from_bands(data):
+    """Chuyển mảng band (count, h, w) uint8 sang ảnh RGBA giống Image.convert("RGBA")"""
+    count, rows, cols = data.shape
+    rgba = np.empty((rows, cols, 4), dtype=np.uint8)
+
+    if count <= 2:
+        rgba[..., :3] = data[0][..., None]
+    else:
+        rgba[..., :3] = np.moveaxis(data[:3], 0, 2)
+
+    if count in (2, 4):
+        rgba[..., 3] = data[-1]
+    else:
+        rgba[..., 3] = 255
+
+    return Image.fromarray(rgba, "RGBA")
+
+
+class _RasterStripWriter:
+    """Ghi ảnh 8-bit (L, LA, RGB, RGBA) ra GeoTIFF theo từng dải bằng cửa sổ rasterio"""
+
+    def __init__(self, path, width, height, mode="RGBA", compression=None):
+        options = {}
+        if mode.endswith("A"):
+            options['alpha'] = 'YES'
+        if GDAL_COMPRESSION.get(compression):
+            options['compress'] = GDAL_COMPRESSION[compression]
+        self.dataset = rasterio.open(
+            path, 'w',
+            driver='GTiff',
+            width=width,
+            height=height,
+            count=len(mode),
+            dtype='uint8',
+            photometric='RGB' if mode.startswith("RGB") else 'MINISBLACK',
+            BIGTIFF='IF_SAFER',
+            **options
+        )
+        self.row = 0
+
+    def write(self, rows):
+        """Ghi một dải (np.ndarray shape (h, w) hoặc (h, w, kênh))"""
+        if rows.ndim == 2:
+            rows = rows[..., None]
+        window = Window(0, self.row, rows.shape[1], rows.shape[0])
+        self.dataset.write(np.moveaxis(rows, 2, 0), window=window)
+        self.row += rows.shape[0]
+
+    def close(self):
+        self.dataset.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class TiledProcessor:
+    """Xử lý ảnh theo dải hàng để bộ nhớ không phụ thuộc kích thước ảnh"""
+
+    def __init__(self, image_processor, memory_limit_mb=DEFAULT_MEMORY_LIMIT_MB):
+        """
+        Khởi tạo bộ xử lý theo dải
+
+        Tham số:
+            image_processor (ImageProcessor): Bộ xử lý dùng chung logger, bảng tra, xóa nền
+            memory_limit_mb (int): Giới hạn bộ nhớ cho một ảnh (MB)
+        """
+        self.image_processor = image_processor
+        self.memory_limit_mb = memory_limit_mb or DEFAULT_MEMORY_LIMIT_MB
+
+    @property
+    def memory_limit(self):
+        """Giới hạn bộ nhớ tính bằng byte"""
+        return int(float(self.memory_limit_mb) * 1024 * 1024)
+
+    def estimate_memory(self, image_path):
+        """Ước tính bộ nhớ (byte) cần để xử lý toàn ảnh trong bộ nhớ"""
+        try:
+            with Image.open(image_path) as img:
+                width, height = img.size
+        except Image.DecompressionBombError:
+            # Pillow từ chối mở ảnh quá lớn: chắc chắn phải xử lý theo dải
+            return float("inf")
+        return width * height * IN_MEMORY_BYTES_PER_PIXEL
+
+    def peak_memory(self, task, output_format=".png", tiled="auto"):
+        """
+        Bộ nhớ đỉnh (byte) ước tính cho một tác vụ của bộ xếp lịch (BatchTask)
+
+        Ảnh sẽ được xử lý theo dải chỉ chiếm khoảng giới hạn bộ nhớ của một ảnh.
+        """
+        pixels = task.width * task.height
+        in_memory = pixels * (IN_MEMORY_BYTES_PER_PIXEL + task.bands * task.sample_bytes)
+        if tiled and (tiled != "auto" or in_memory > self.memory_limit) and self.can_tile(task.path, output_format):
+            return min(in_memory, self.memory_limit)
+        return in_memory
+
+    def can_tile(self, image_path, output_format):
+        """Kiểm tra ảnh và định dạng đầu ra có thể xử lý theo dải cho kết quả giống hệt không"""
+        if output_format.lower() not in TILED_OUTPUT_FORMATS:
+            return False
+        return can_read_rgba(image_path)
+
+    def should_tile(self, image_path, output_format, tiled="auto"):
+        """Quyết định có xử lý theo dải hay không (tiled: True, False hoặc "auto")"""
+        if not tiled:
+            return False
+        if tiled == "auto" and self.estimate_memory(image_path) <= self.memory_limit:
+            return False
+        return self.can_tile(image_path, output_format)
+
+    def process(self, image_path, output_path, scale_ratio=1.0, remove_black=False, remove_white=False,
+                brightness=1.0, contrast=1.0, saturation=1.0, edge_only=False, timings=None,
+                encoder_profile=None):
+        """
+        Xử lý một ảnh theo dải: đọc, điều chỉnh, xóa nền, thay đổi kích thước và ghi
+
+        Kết quả giống hệt đường xử lý toàn ảnh trong bộ nhớ: độ tương phản dùng mức
+        xám trung bình của cả ảnh, và mỗi dải được đọc thêm các hàng biên đủ cho bộ
+        lọc Lanczos khi thay đổi kích thước. Khi chỉ xóa nền liên thông với biên
+        (edge_only), một lượt đọc trước thu thập các đoạn nền của mọi dải để tìm
+        thành phần liên thông trên toàn ảnh; chỉ các đoạn (không phải mặt nạ) được
+        giữ trong bộ nhớ.
+
+        Tham số:
+            timings (ImageTimings): Nhận thời gian từng giai đoạn, cộng dồn qua các dải
+            encoder_profile (str): Chế độ nén (xem ENCODER_PROFILES)
+
+        Trả về:
+            str: Đường dẫn ảnh đầu ra
+        """
+        timings = timings if timings is not None else ImageTimings()
+        timings.add("decode", nbytes=os.path.getsize(image_path))
+
+        with rasterio.open(image_path) as src:
+            width, height = src.width, src.height
+
+            scale = float(scale_ratio)
+            if scale > 0 and scale != 1.0:
+                out_width, out_height = int(width * scale), int(height * scale)
+            else:
+                out_width, out_height = width, height
+
+            mean = None
+            if float(contrast) != 1.0:
+                rows = self._source_rows(width)
+                strips = (
+                    self._timed_read(timings, src, y0, min(height, y0 + rows))
+                    for y0 in range(0, height, rows)
+                )
+                decode_time = timings.stages["decode"][0]
+                start = time.perf_counter()
+                mean = contrast_mean(strips, brightness)
+                # Thời gian đọc các dải đã được tính vào decode
+                timings.add("adjust", time.perf_counter() - start - (timings.stages["decode"][0] - decode_time))
+
+            background = None
+            colors = key_colors(remove_black, remove_white)
+            if edge_only and colors:
+                rows = self._source_rows(width)
+                parts = []
+                for y0 in range(0, height, rows):
+                    strip = self._timed_read(timings, src, y0, min(height, y0 + rows))
+                    with timings.measure("adjust", image_bytes(strip)):
+                        strip = apply_adjustments(
+                            strip, brightness, contrast, saturation,
+                            lut_cache=self.image_processor.lut_cache, mean=mean
+                        )
+                    with timings.measure("background", image_bytes(strip)):
+                        parts.append(background_runs(strip, colors, row_offset=y0))
+                with timings.measure("background"):
+                    background = edge_connected(concat_runs(parts), height, width)
+
+            resize_vertical = None
+            if out_height != height:
+                resize_vertical = lanczos_coeffs(height, out_height)
+
+            # Các dải được xử lý ở RGBA rồi chuyển về cùng chế độ với đường xử lý trong bộ nhớ
+            adjusting = any(float(v) != 1.0 for v in (brightness, contrast, saturation))
+            mode = self.image_processor._working_mode(
+                ("L", "LA", "RGB", "RGBA")[src.count - 1], os.path.splitext(output_path)[1],
+                remove_black or remove_white, adjusting
+            )
+
+            with self._open_writer(output_path, out_width, out_height, mode, encoder_profile) as writer:
+                for out_y0, out_y1, src_y0, src_y1 in self._plan_strips(width, height, out_height):
+                    strip = self._timed_read(timings, src, src_y0, src_y1)
+                    with timings.measure("adjust", image_bytes(strip)):
+                        strip = apply_adjustments(
+                            strip, brightness, contrast, saturation,
+                            lut_cache=self.image_processor.lut_cache, mean=mean
+                        )
+                    with timings.measure("background", image_bytes(strip)):
+                        if background is not None:
+                            strip = clear_runs(strip, background, src_y0)
+                        else:
+                            strip = self.image_processor.remove_background(strip, remove_black, remove_white)
+
+                    if (out_width, out_height) != (width, height):
+                        with timings.measure("resize", image_bytes(strip)):
+                            strip = self._resize_strip(strip, out_width, src_y0, out_y0, out_y1, resize_vertical)
+
+                    if strip.mode != mode:
+                        with timings.measure("convert", image_bytes(strip)):
+                            strip = strip.convert(mode)
+                    with timings.measure("encode"):
+                        writer.write(np.asarray(strip))
+
+        timings.add("encode", nbytes=os.path.getsize(output_path))
+        return output_path
+
+    def _timed_read(self, timings, src, y0, y1):
+        """Đọc một dải và cộng thời gian vào giai đoạn decode"""
+        with timings.measure("decode"):
+            return self._read_strip(src, y0, y1)
+
+    def _resize_strip(self, strip, out_width, src_y0, out_y0, out_y1, resize_vertical):
+        """
+        Thay đổi kích thước một dải giống Image.resize trên toàn ảnh
+
+        Lượt ngang dùng Pillow (các hàng độc lập với nhau); lượt dọc dùng hệ số của
+        toàn ảnh nên không phụ thuộc vị trí dải. Ảnh RGBA được nội suy ở dạng RGBa
+        (nhân trước alpha) như Pillow.
+        """
+        mode = strip.mode
+        if mode == "RGBA":
+            strip = strip.convert("RGBa")
+
+        if out_width != strip.width:
+            strip = strip.resize((out_width, strip.height), RESAMPLE)
+
+        if resize_vertical is not None:
+            bounds, kk = resize_vertical
+            data = resample_vertical(np.asarray(strip), src_y0, bounds[out_y0:out_y1], kk[out_y0:out_y1])
+            strip = Image.frombuffer(strip.mode, (out_width, out_y1 - out_y0), data.tobytes(), "raw", strip.mode, 0, 1)
+
+        return strip.convert(mode) if strip.mode != mode else strip
+
+    def _source_rows(self, width):
+        """Số hàng nguồn trong một dải theo giới hạn bộ nhớ"""
+        return max(1, self.memory_limit // max(1, width * STRIP_BYTES_PER_PIXEL))
+
+    def _plan_strips(self, width, height, out_height):
+        """
+        Chia ảnh đầu ra thành các dải và tính các hàng nguồn cần đọc cho mỗi dải
+
+        Trả về (generator): (out_y0, out_y1, src_y0, src_y1)
+        """
+        source_rows = self._source_rows(width)
+
+        if out_height == height:
+            for y0 in range(0, height, source_rows):
+                y1 = min(height, y0 + source_rows)
+                yield y0, y1, y0, y1
+            return
+
+        scale_y = height / out_height
+        support = LANCZOS_SUPPORT * max(scale_y, 1.0)
+        halo = int(math.ceil(support)) + 2
+        out_rows = max(1, int((source_rows - 2 * halo) / scale_y))
+
+        for out_y0 in range(0, out_height, out_rows):
+            out_y1 = min(out_height, out_y0 + out_rows)
+            src_y0 = max(0, int(math.floor(out_y0 * scale_y - support)) - 2)
+            src_y1 = min(height, int(math.ceil(out_y1 * scale_y + support)) + 2)
+            yield out_y0, out_y1, src_y0, src_y1
+
+    def _read_strip(self, src, y0, y1):
+        """Đọc các hàng [y0, y1) và chuyển sang ảnh RGBA giống Image.convert("RGBA")"""
+        return rgba_from_bands(src.read(window=Window(0, y0, src.width, y1 - y0)))
+
+    def _open_writer(self, output_path, width, height, mode="RGBA", encoder_profile=None):
+        """Mở writer theo dải phù hợp với định dạng đầu ra và chế độ nén"""
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        options = encoder_options(os.path.splitext(output_path)[1], encoder_profile)
+        if output_path.lower().endswith(".png"):
+            return open_png_writer(output_path, width, height, mode, options.get("compress_level", 6))
+        return _RasterStripWriter(output_path, width, height, mode, options.get("compression"))
@@ -0,0 +1,165 @@
+"""
+Đo thời gian và dung lượng dữ liệu của từng giai đoạn xử lý ảnh
+"""
+
+import os
+import json
+import time
+from contextlib import contextmanager
+import numpy as np
+
+from processing.scheduler import PIL_SAMPLE_BYTES
+
+# Các giai đoạn của process_image theo thứ tự
+STAGES = ("decode", "adjust", "background", "resize", "convert", "encode")
+
+# Các giai đoạn của GeoProcessor.reproject_raster theo thứ tự (decode, encode dùng chung)
+GEO_STAGES = ("geometry", "decode", "warp", "encode", "overviews")
+
+# Thứ tự các giai đoạn trong báo cáo
+STAGE_ORDER = STAGES + tuple(s for s in GEO_STAGES if s not in STAGES)
+
+# Các phân vị được tính cho mỗi giai đoạn trong báo cáo của lô
+PERCENTILES = (50, 90, 99)
+
+# Tên báo cáo JSON ghi cạnh các ảnh đầu ra
+STATS_REPORT_FILE = "tiftiff_stats.json"
+
+
+def image_bytes(img):
+    """Số byte pixel của một ảnh PIL hoặc mảng numpy"""
+    if isinstance(img, np.ndarray):
+        return img.nbytes
+    return img.width * img.height * len(img.getbands()) * PIL_SAMPLE_BYTES.get(img.mode, 1)
+
+
+class ImageTimings:
+    """
+    Thời gian (wall) và số byte của từng giai đoạn khi xử lý một ảnh
+
+    Với decode và encode, số byte là kích thước file đọc/ghi (đo I/O); với các giai
+    đoạn tính toán là số byte pixel đầu vào. Ảnh xử lý theo dải cộng dồn mọi dải.
+    """
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, seconds=0.0, nbytes=0):
+        """Cộng thêm thời gian và số byte cho một giai đoạn"""
+        entry = self.stages.setdefault(stage, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += int(nbytes)
+
+    @contextmanager
+    def measure(self, stage, nbytes=0):
+        """Đo thời gian của khối lệnh bên trong và cộng vào giai đoạn"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start, nbytes)
+
+    def total(self):
+        return sum(seconds for seconds, _ in self.stages.values())
+
+    def as_dict(self):
+        """Dạng có thể pickle/ghi JSON: {giai đoạn: {"seconds", "bytes"}}"""
+        return {
+            stage: {"seconds": seconds, "bytes": nbytes}
+            for stage, (seconds, nbytes) in self.stages.items()
+        }
+
+
+class BatchResult(list):
+    """
+    Đường dẫn các ảnh đầu ra của một lô (dùng như list) kèm thống kê của lô
+
+    Thuộc tính:
+        stats (BatchStats): Thời gian từng giai đoạn của các ảnh đã xử lý
+            (None khi lô không có ảnh nào cần xử lý)
+    """
+
+    def __init__(self, paths=(), stats=None):
+        super().__init__(paths)
+        self.stats = stats
+
+
+class BatchStats:
+    """Gom thời gian từng giai đoạn của mọi ảnh trong một lô và tính phân vị"""
+
+    def __init__(self):
+        self.images = []
+        self.elapsed = 0.0
+        self.extra = {}
+
+    def add(self, image_path, timings):
+        """Ghi nhận thời gian của một ảnh (ImageTimings hoặc dict từ as_dict)"""
+        if timings is None:
+            return
+        if isinstance(timings, ImageTimings):
+            timings = timings.as_dict()
+        self.images.append((image_path, timings))
+
+    def summary(self):
+        """
+        Thống kê theo giai đoạn
+
+        Trả về:
+            dict: {giai đoạn: số ảnh, tổng/trung bình/phân vị/lớn nhất (giây),
+                   tổng byte, MB/s và tỷ lệ trong tổng thời gian}
+        """
+        per_stage = {}
+        for _, timings in self.images:
+            for stage, entry in timings.items():
+                per_stage.setdefault(stage, []).append((entry["seconds"], entry["bytes"]))
+
+        grand_total = sum(seconds for values in per_stage.values() for seconds, _ in values)
+        order = [s for s in STAGE_ORDER if s in per_stage] + sorted(s for s in per_stage if s not in STAGE_ORDER)
+
+        summary = {}
+        for stage in order:
+            seconds = np.array([v[0] for v in per_stage[stage]])
+            nbytes = sum(v[1] for v in per_stage[stage])
+            total = float(seconds.sum())
+            entry = {
+                "count": len(seconds),
+                "total_s": round(total, 6),
+                "mean_s": round(total / len(seconds), 6),
+            }
+            for p, value in zip(PERCENTILES, np.percentile(seconds, PERCENTILES)):
+                entry[f"p{p}_s"] = round(float(value), 6)
+            entry["max_s"] = round(float(seconds.max()), 6)
+            entry["bytes"] = nbytes
+            entry["mb_per_s"] = round(nbytes / total / 1e6, 3) if total > 0 else None
+            entry["share"] = round(total / grand_total, 4) if grand_total > 0 else 0.0
+            summary[stage] = entry
+        return summary
+
+    def slowest_stage(self):
+        """Giai đoạn chiếm nhiều thời gian nhất (None nếu chưa có dữ liệu)"""
+        summary = self.summary()
+        return max(summary, key=lambda s: summary[s]["total_s"]) if summary else None
+
+    def as_dict(self):
+        return {
+            "images": len(self.images),
+            "elapsed_s": round(self.elapsed, 6),
+            "slowest_stage": self.slowest_stage(),
+            "stages": self.summary(),
+            **self.extra,
+            "per_image": [
+                {"path": path, "stages": timings} for path, timings in self.images
+            ],
+        }
+
+    def save(self, output_dir):
+        """
+        Ghi báo cáo JSON vào thư mục đầu ra
+
+        Trả về:
+            str: Đường dẫn báo cáo
+        """
+        path = os.path.join(output_dir, STATS_REPORT_FILE)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.as_dict(), f, ensure_ascii=False, indent=2)
+        return path
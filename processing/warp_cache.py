@@ -0,0 +1,230 @@
+"""
+Bộ nhớ đệm cho chuyển đổi hệ tọa độ: kết quả calculate_default_transform và lưới
+chỉ số pixel nguồn (warp grid) dùng lại cho các ảnh có cùng hình học
+"""
+
+import threading
+from collections import OrderedDict, namedtuple
+import numpy as np
+from rasterio.warp import calculate_default_transform, reproject, Resampling
+from resources.constants import WARP_GRID_CACHE_MB
+
+# Số kết quả calculate_default_transform được giữ lại
+TRANSFORM_CACHE_SIZE = 1024
+
+# Lưới warp của một cặp hình học nguồn/đích: với mỗi pixel đích (theo thứ tự hàng),
+# chỉ số phẳng của pixel nguồn được GDAL chọn (0 ở pixel không có nguồn) và vị trí
+# các pixel không có nguồn (được đặt về 0 như mảng đích ban đầu)
+WarpGrid = namedtuple("WarpGrid", ["indices", "empty"])
+
+
+def crs_key(crs):
+    """Dạng chuỗi ổn định của hệ tọa độ (CRS, mã EPSG hoặc WKT)"""
+    return crs.to_string() if hasattr(crs, "to_string") else str(crs)
+
+
+class KeyedCache:
+    """Bộ nhớ đệm LRU an toàn luồng, đếm số lần trúng/trượt"""
+
+    def __init__(self, max_items=None, max_bytes=None):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """Giá trị đã lưu (None nếu chưa có), cập nhật bộ đếm"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, nbytes=0):
+        """Lưu một giá trị, loại các mục dùng lâu nhất khi vượt giới hạn"""
+        if self.max_bytes is not None and nbytes > self.max_bytes:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self.entries[key] = (value, nbytes)
+            self.nbytes += nbytes
+            while self.entries and (
+                (self.max_items is not None and len(self.entries) > self.max_items)
+                or (self.max_bytes is not None and self.nbytes > self.max_bytes)
+            ):
+                _, (_, size) = self.entries.popitem(last=False)
+                self.nbytes -= size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.nbytes = 0
+
+    def stats(self):
+        """Số lần trúng/trượt, tỷ lệ trúng, số mục và dung lượng đang giữ"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "entries": len(self.entries),
+                "mb": round(self.nbytes / 1024 / 1024, 1),
+            }
+
+
+def stats_delta(before, after):
+    """Số lần trúng/trượt trong khoảng giữa hai lần gọi stats() (ví dụ trong một lô)"""
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "entries": after["entries"],
+        "mb": after["mb"],
+    }
+
+
+class TransformCache(KeyedCache):
+    """Kết quả calculate_default_transform theo (CRS nguồn, CRS đích, kích thước, khung bao)"""
+
+    def __init__(self, max_items=TRANSFORM_CACHE_SIZE):
+        super().__init__(max_items=max_items)
+
+    def calculate(self, src_crs, dst_crs, width, height, bounds):
+        """
+        Như calculate_default_transform(src_crs, dst_crs, width, height, *bounds)
+
+        Trả về:
+            tuple: (transform, width, height) của ảnh đích
+        """
+        key = (crs_key(src_crs), crs_key(dst_crs), width, height, tuple(bounds))
+        result = self.get(key)
+        if result is None:
+            result = calculate_default_transform(src_crs, dst_crs, width, height, *bounds)
+            self.put(key, result)
+        return result
+
+
+class WarpGridCache(KeyedCache):
+    """
+    Lưới warp theo hình học nguồn/đích (CRS, transform, kích thước)
+
+    Lưới chỉ được tạo từ lần thứ hai gặp cùng một hình học: lô mà mọi ảnh có hình
+    học khác nhau không tốn thêm một lần warp để tạo lưới không dùng lại. Hình học
+    có lưới lớn hơn giới hạn bộ nhớ đệm không bao giờ được tạo lưới.
+    """
+
+    def __init__(self, max_mb=WARP_GRID_CACHE_MB):
+        super().__init__(max_bytes=max_mb * 1024 * 1024)
+        self.seen = set()
+        self.oversized = set()
+
+    @staticmethod
+    def key(src, dst_crs, dst_transform, dst_width, dst_height):
+        return (
+            crs_key(src.crs), tuple(src.transform)[:6], src.width, src.height,
+            crs_key(dst_crs), tuple(dst_transform)[:6], dst_width, dst_height,
+        )
+
+    def lookup(self, key, nbytes=0):
+        """
+        Lưới đã lưu cho hình học key
+
+        Tham số:
+            nbytes (int): Dung lượng ước tính của lưới (grid_size_estimate)
+
+        Trả về:
+            tuple: (WarpGrid hoặc None, True nếu nên tạo lưới cho hình học này)
+        """
+        grid = self.get(key)
+        if grid is not None:
+            return grid, False
+        with self.lock:
+            if key in self.oversized or nbytes > self.max_bytes:
+                self.oversized.add(key)
+                return None, False
+            repeated = key in self.seen
+            self.seen.add(key)
+        return None, repeated
+
+    def store(self, key, grid):
+        """Lưu lưới vừa tạo; lưới vượt giới hạn được ghi nhận để không tạo lại"""
+        nbytes = grid_nbytes(grid)
+        if nbytes > self.max_bytes:
+            with self.lock:
+                self.oversized.add(key)
+            return
+        self.put(key, grid, nbytes)
+
+    def clear(self):
+        super().clear()
+        with self.lock:
+            self.seen.clear()
+            self.oversized.clear()
+
+
+def index_dtype(src_width, src_height):
+    """Kiểu dữ liệu của ảnh chỉ số pixel nguồn (int32 khi đủ, int64 với ảnh rất lớn)"""
+    return np.int32 if src_width * src_height < np.iinfo(np.int32).max else np.int64
+
+
+def index_warp_nbytes(src_width, src_height, dst_width, dst_height):
+    """Số byte của ảnh chỉ số nguồn và lưới đích khi warp để tạo lưới"""
+    itemsize = np.dtype(index_dtype(src_width, src_height)).itemsize
+    return (src_width * src_height + dst_width * dst_height) * itemsize
+
+
+def grid_size_estimate(dst_width, dst_height):
+    """Dung lượng tối thiểu (byte) của lưới warp: một chỉ số intp cho mỗi pixel đích"""
+    return dst_width * dst_height * np.dtype(np.intp).itemsize
+
+
+def build_warp_grid(src, dst_crs, dst_transform, dst_width, dst_height, **warp_options):
+    """
+    Tạo lưới warp bằng chính GDAL: warp (nearest) một ảnh chứa chỉ số phẳng của từng
+    pixel nguồn, nên lưới trùng khớp pixel với pixel mà GDAL chọn khi warp dữ liệu
+    với cùng tham số (bộ biến đổi xấp xỉ, cách chia khối). warp_options phải giống
+    hệt tham số của warp dữ liệu, với warp_mem_limit đủ cho cả hai lần warp (xem
+    index_warp_nbytes) để GDAL không chia khối ở lần nào.
+
+    Trả về:
+        WarpGrid
+    """
+    dtype = index_dtype(src.width, src.height)
+    source = np.arange(src.width * src.height, dtype=dtype).reshape(src.height, src.width)
+    grid = np.full((dst_height, dst_width), -1, dtype=dtype)
+    reproject(
+        source, grid,
+        src_transform=src.transform, src_crs=src.crs,
+        dst_transform=dst_transform, dst_crs=dst_crs, dst_nodata=-1,
+        **dict(warp_options, resampling=Resampling.nearest)
+    )
+    flat = grid.ravel()
+    empty = np.flatnonzero(flat < 0)
+    indices = np.where(flat < 0, 0, flat).astype(np.intp)
+    return WarpGrid(indices, empty)
+
+
+def grid_nbytes(grid):
+    return grid.indices.nbytes + grid.empty.nbytes
+
+
+def apply_warp_grid(source, grid, destination):
+    """Warp mảng nguồn (band, hàng, cột) vào mảng đích theo lưới, không tính lại phép chiếu"""
+    src_flat = source.reshape(source.shape[0], -1)
+    dst_flat = destination.reshape(destination.shape[0], -1)
+    for band in range(source.shape[0]):
+        src_flat[band].take(grid.indices, out=dst_flat[band])
+    if grid.empty.size:
+        dst_flat[:, grid.empty] = 0
+    return destination
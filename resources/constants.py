@@ -72,4 +72,114 @@ ICONS = {
 try:
     RESAMPLE = Image.Resampling.LANCZOS
 except AttributeError:
-    RESAMPLE = Image.ANTIALIAS 
\ No newline at end of file
+    RESAMPLE = Image.ANTIALIAS 
+
+# Giới hạn bộ nhớ mặc định (MB) cho một ảnh; ảnh vượt quá sẽ được xử lý theo dải
+DEFAULT_MEMORY_LIMIT_MB = 2048
+
+# Tổng bộ nhớ (MB) mà các tác vụ chạy đồng thời trong một lô được phép dùng
+DEFAULT_BATCH_MEMORY_MB = 8192
+
+# Định dạng xuất của chế độ nghiên cứu: tên hiển thị → (đuôi file, driver GDAL)
+GEO_OUTPUT_FORMATS = {
+    "GeoTIFF (.tif)": (".tif", "GTiff"),
+    "GeoJPEG2000 (.jp2)": (".jp2", "JP2OpenJPEG"),
+    "ERDAS Imagine (.img)": (".img", "HFA"),
+    "NetCDF (.nc)": (".nc", "netCDF"),
+    "ESRI Grid (.grd)": (".grd", "AIG"),
+    "MBTiles (.mbtiles)": (".mbtiles", "MBTiles"),
+    "GeoPackage (.gpkg)": (".gpkg", "GPKG"),
+    "ESRI Shapefile (.shp)": (".shp", "ESRI Shapefile"),
+}
+
+# Chế độ ghi GeoTIFF của chế độ nghiên cứu: "source" (mặc định) giữ bố cục của file
+# nguồn (thường chia dải, không nén); các chế độ "cog_*" phải được chọn trong tab Hệ
+# tọa độ hoặc --geo_write_profile và ghi Cloud-Optimized GeoTIFF với COG_OPTIONS và
+# bộ nén tương ứng (predictor tự chọn theo kiểu dữ liệu)
+COG_OPTIONS = {
+    "BLOCKSIZE": 512,
+    "BIGTIFF": "IF_SAFER",
+    "OVERVIEWS": "AUTO",
+    "OVERVIEW_RESAMPLING": "NEAREST",
+}
+GEO_WRITE_PROFILES = {
+    "source": None,
+    "cog_deflate": {"COMPRESS": "DEFLATE", "LEVEL": 6, "PREDICTOR": "YES"},
+    "cog_zstd": {"COMPRESS": "ZSTD", "LEVEL": 9, "PREDICTOR": "YES"},
+    "cog_lzw": {"COMPRESS": "LZW", "PREDICTOR": "YES"},
+}
+DEFAULT_GEO_WRITE_PROFILE = "source"
+
+# Overview (ảnh thu nhỏ nhiều mức) cho ảnh GeoTIFF: các phương pháp lấy mẫu cho phép
+# và kích thước (pixel) mà mức nhỏ nhất không còn lớn hơn (giống OVERVIEWS=AUTO của COG)
+OVERVIEW_RESAMPLING = ("nearest", "average", "bilinear", "cubic", "lanczos", "mode", "gauss")
+DEFAULT_OVERVIEW_RESAMPLING = "nearest"
+OVERVIEW_MIN_SIZE = 512
+
+# Tổng dung lượng (MB) các lưới warp được giữ lại để chuyển đổi nhanh các ảnh cùng
+# hình học (8 byte mỗi pixel đích); 0: không dùng lưới warp
+WARP_GRID_CACHE_MB = 512
+
+# Thứ tự xếp lịch cho lô: lớn trước (cân bằng tải) hoặc nhỏ trước (kết quả đầu tiên sớm)
+SCHEDULE_ORDERS = ("largest_first", "shortest_first")
+
+# Khi thu nhỏ ảnh, giảm kích thước lúc giải mã (draft/reduce) đến tối đa
+# REDUCING_GAP lần kích thước đích rồi mới nội suy Lanczos (giống Image.thumbnail)
+REDUCING_GAP = 3.0
+
+# Các chế độ pixel mà từng định dạng đầu ra lưu được; ảnh chỉ được chuyển sang
+# chế độ khác (RGB/RGBA) khi định dạng không hỗ trợ chế độ hiện tại
+OUTPUT_MODES = {
+    ".png": ("L", "LA", "RGB", "RGBA", "I;16"),
+    ".tif": ("L", "LA", "RGB", "RGBA", "I;16"),
+    ".tiff": ("L", "LA", "RGB", "RGBA", "I;16"),
+    ".jpg": ("L", "RGB"),
+    ".jpeg": ("L", "RGB"),
+    ".bmp": ("L", "RGB", "RGBA"),
+    ".webp": ("RGB", "RGBA"),
+}
+DEFAULT_OUTPUT_MODES = ("L", "RGB", "RGBA")
+
+# Pipeline xử lý hàng loạt tuần tự: số luồng của từng giai đoạn và sức chứa hàng
+# đợi giữa các giai đoạn (mỗi phần tử trong hàng đợi là một ảnh đã giải mã)
+PIPELINE_WORKERS = {"read": 1, "transform": 1, "write": 1}
+PIPELINE_QUEUE_DEPTH = 2
+
+# Tham số bộ mã hóa của Pillow theo định dạng đầu ra cho từng chế độ nén:
+# "default" giữ mặc định của Pillow (JPEG quality 75, PNG mức 6, TIFF không nén),
+# "fast" ưu tiên tốc độ ghi, "small" ưu tiên dung lượng file, "balanced" ở giữa
+ENCODER_PROFILES = {
+    "default": {},
+    "fast": {
+        ".png": {"compress_level": 1},
+        ".jpg": {"quality": 90, "subsampling": "4:2:0"},
+        ".webp": {"quality": 85, "method": 0},
+        ".tif": {"compression": "raw"},
+    },
+    "balanced": {
+        ".png": {"compress_level": 4},
+        ".jpg": {"quality": 90, "subsampling": "4:2:0", "optimize": True},
+        ".webp": {"quality": 85, "method": 4},
+        ".tif": {"compression": "tiff_adobe_deflate"},
+    },
+    "small": {
+        ".png": {"compress_level": 9, "optimize": True},
+        ".jpg": {"quality": 85, "subsampling": "4:2:0", "optimize": True, "progressive": True},
+        ".webp": {"quality": 80, "method": 6},
+        ".tif": {"compression": "tiff_adobe_deflate"},
+    },
+}
+DEFAULT_ENCODER_PROFILE = "default"
+
+# Xem trước điều chỉnh: proxy tối đa (mặc định khi không biết độ phân giải màn
+# hình), kích thước khung xem trước và thời gian chờ sau lần kéo thanh trượt cuối
+PREVIEW_MAX_SIZE = (1920, 1080)
+PREVIEW_SIZE = (480, 320)
+PREVIEW_DEBOUNCE_MS = 40
+
+# Ngân sách thời gian (giây) từ lúc chạy app.py đến khi cửa sổ chính hiện lên
+STARTUP_BUDGET_S = 1.0
+
+# Các module nặng không được import trước khi cửa sổ hiện lên (kiểm tra lúc khởi động)
+STARTUP_DEFERRED_MODULES = ("rasterio", "numpy", "processing.image_processor",
+                            "processing.geo_processor", "processing.metadata_processor")
@@ -122,7 +122,35 @@ TRANSLATIONS = {
         "feature_visualization": "Phân tích và trực quan hóa dữ liệu ảnh.",
         "developer_info": "Thông tin phát triển",
         "developed_by": "Phần mềm được phát triển bởi Đại học Thủy lợi, Việt Nam. Liên hệ: support@tlu.edu.vn",
-        "close": "Đóng"
+        "close": "Đóng",
+        "tiled_processing": "Ảnh vượt giới hạn bộ nhớ, xử lý theo dải",
+        "skipped_unchanged": "Bỏ qua các file không thay đổi",
+        "pipeline_stage": "Giai đoạn",
+        "pipeline_bottleneck": "Nút thắt",
+        "stats_report_saved": "Báo cáo thời gian xử lý",
+        "encoder_profile": "Chế độ nén",
+        "preview": "Xem trước",
+        "preview_loading": "Đang tải ảnh xem trước...",
+        "preview_no_image": "Chưa chọn ảnh để xem trước",
+        "preview_output_size": "Kích thước đầu ra",
+        "startup_time": "Thời gian khởi động",
+        "startup_over_budget": "Khởi động chậm hơn ngân sách",
+        "same_crs_copied": "Hệ tọa độ nguồn và đích giống nhau, đã sao chép",
+        "reproject_plan": "Chuyển đổi song song",
+        "geo_write_profile": "Chế độ ghi GeoTIFF",
+        "cog_option_ignored": "Tùy chọn không dùng được khi ghi COG, bỏ qua",
+        "build_overviews": "Tạo overview sau khi chuyển đổi",
+        "overview_resampling": "Lấy mẫu overview",
+        "overview_external": "Overview ra file .ovr riêng",
+        "build_overviews_inputs": "Tạo overview cho ảnh đầu vào",
+        "incremental_batch": "Bỏ qua file không đổi từ lần chạy trước",
+        "incremental_hash": "So sánh cả nội dung (hash) khi thời gian sửa thay đổi",
+        "overview_built": "Đã tạo overview",
+        "overview_valid": "Đã có overview hợp lệ, bỏ qua",
+        "overview_unsupported": "Chỉ tạo được overview cho GeoTIFF",
+        "overview_error": "Lỗi khi tạo overview",
+        "transform_cache": "Dùng lại lưới đích đã tính",
+        "warp_grid_cache": "Dùng lại lưới warp cùng hình học"
     },
     "en": {
         "app_title": "TifTiff - Image Processing Tool",
@@ -242,7 +270,35 @@ TRANSLATIONS = {
         "feature_visualization": "Analysis and visualization of image data.",
         "developer_info": "Development Information",
         "developed_by": "Software developed by Thuy Loi University, Vietnam. Contact: support@tlu.edu.vn",
-        "close": "Close"
+        "close": "Close",
+        "tiled_processing": "Image exceeds the memory limit, processing in strips",
+        "skipped_unchanged": "Skipped unchanged files",
+        "pipeline_stage": "Stage",
+        "pipeline_bottleneck": "Bottleneck",
+        "stats_report_saved": "Processing time report",
+        "encoder_profile": "Encoder profile",
+        "preview": "Preview",
+        "preview_loading": "Loading preview...",
+        "preview_no_image": "No image selected for preview",
+        "preview_output_size": "Output size",
+        "startup_time": "Startup time",
+        "startup_over_budget": "Startup exceeded its budget",
+        "same_crs_copied": "Source and target CRS match, copied",
+        "reproject_plan": "Parallel reprojection",
+        "geo_write_profile": "GeoTIFF layout",
+        "cog_option_ignored": "Options not supported for COG output, ignored",
+        "build_overviews": "Build overviews after reprojection",
+        "overview_resampling": "Overview resampling",
+        "overview_external": "External .ovr overviews",
+        "build_overviews_inputs": "Build overviews for input images",
+        "incremental_batch": "Skip files unchanged since the last run",
+        "incremental_hash": "Compare content hashes when modification times change",
+        "overview_built": "Built overviews",
+        "overview_valid": "Valid overviews already present, skipped",
+        "overview_unsupported": "Overviews can only be built for GeoTIFF",
+        "overview_error": "Error building overviews for",
+        "transform_cache": "Reused computed output grids",
+        "warp_grid_cache": "Reused same-geometry warp grids"
     }
 }
 
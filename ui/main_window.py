@@ -9,8 +9,6 @@ from tkinter import StringVar, BooleanVar, filedialog, Menu
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from tkinterdnd2 import DND_FILES
-import rasterio
-import numpy as np
 
 from ui.tabs.basic_tab import BasicTab
 from ui.tabs.geo_tab import GeoTab
@@ -19,13 +17,16 @@ from ui.tabs.options_tab import OptionsTab
 from ui.tabs.log_tab import LogTab
 from ui.tabs.coordinate_tab import CoordinateTab
 
-from resources.constants import ICONS, resource_path, COMMON_CRS, THEMES, LANGUAGES
+from resources.constants import (
+    ICONS, resource_path, COMMON_CRS, THEMES, LANGUAGES, DEFAULT_ENCODER_PROFILE, GEO_OUTPUT_FORMATS,
+    DEFAULT_GEO_WRITE_PROFILE, DEFAULT_OVERVIEW_RESAMPLING
+)
 from resources.translations import get_translation
 from utils.config import config_manager, get_config, set_config
 from utils.logger import logger
-from processing.image_processor import ImageProcessor
-from processing.geo_processor import GeoProcessor
-from processing.metadata_processor import MetadataProcessor
+
+# Các bộ xử lý (kéo theo rasterio/GDAL, numpy) chỉ được import ở lần dùng đầu tiên
+# để cửa sổ hiện ra nhanh; xem MainWindow._processor
 
 class MainWindow:
     """Cửa sổ chính của ứng dụng"""
@@ -53,6 +54,7 @@ class MainWindow:
         self.remove_white_bg = BooleanVar(value=False)
         self.remove_black_bg = BooleanVar(value=False)
         self.output_format_var = StringVar(value=".png")
+        self.encoder_profile_var = StringVar(value=DEFAULT_ENCODER_PROFILE)
         self.scale_ratio_var = StringVar(value="1.0")
         
         # Thêm biến cho chức năng chuyển đổi hệ tọa độ
@@ -64,6 +66,12 @@ class MainWindow:
         # Thêm biến cho việc xuất ảnh với hệ tọa độ
         self.preserve_geospatial = BooleanVar(value=True)
         self.geo_format_var = StringVar(value="GeoTIFF (.tif)")
+        self.geo_write_profile_var = StringVar(value=DEFAULT_GEO_WRITE_PROFILE)
+        self.build_overviews_var = BooleanVar(value=False)
+        self.overview_resampling_var = StringVar(value=DEFAULT_OVERVIEW_RESAMPLING)
+        self.overview_external_var = BooleanVar(value=False)
+        self.incremental_var = BooleanVar(value=False)
+        self.incremental_hash_var = BooleanVar(value=False)
         
         # Thêm biến cho điều chỉnh ảnh
         self.brightness_var = StringVar(value="1.0")
@@ -123,10 +131,9 @@ class MainWindow:
                 
         self.logger.set_log_callback(log_callback)
         
-        # Khởi tạo các processor
-        self.image_processor = ImageProcessor(self.logger)
-        self.geo_processor = GeoProcessor(self.logger)
-        self.metadata_processor = MetadataProcessor(self.logger)
+        # Các processor được khởi tạo khi dùng lần đầu (xem _processor)
+        self._processors = {}
+        self._processors_lock = threading.Lock()
         
         # Nạp cấu hình
         self._load_config()
@@ -147,7 +154,38 @@ class MainWindow:
     def _(self, key):
         """Hàm dịch ngôn ngữ dựa trên khóa"""
         return get_translation(key, self.language_var.get())
-        
+
+    def _processor(self, name):
+        """
+        Trả về processor theo tên, import và khởi tạo ở lần dùng đầu tiên
+
+        Có thể được gọi từ luồng nền (xem trước, chuyển đổi) nên được bảo vệ bằng khóa.
+        """
+        with self._processors_lock:
+            if name not in self._processors:
+                if name == "image":
+                    from processing.image_processor import ImageProcessor
+                    self._processors[name] = ImageProcessor(self.logger)
+                elif name == "geo":
+                    from processing.geo_processor import GeoProcessor
+                    self._processors[name] = GeoProcessor(self.logger)
+                else:
+                    from processing.metadata_processor import MetadataProcessor
+                    self._processors[name] = MetadataProcessor(self.logger)
+            return self._processors[name]
+
+    @property
+    def image_processor(self):
+        return self._processor("image")
+
+    @property
+    def geo_processor(self):
+        return self._processor("geo")
+
+    @property
+    def metadata_processor(self):
+        return self._processor("metadata")
+
     def _configure_master(self):
         """Thiết lập cửa sổ chính"""
         # Áp dụng chủ đề
@@ -630,6 +668,7 @@ class MainWindow:
             "presentation_contrast": self.presentation_settings['contrast'],
             "presentation_saturation": self.presentation_settings['saturation'],
             "presentation_scale_ratio": self.presentation_settings['scale_ratio'],
+            "presentation_encoder_profile": self.encoder_profile_var.get(),
             
             # Cài đặt cho mode research
             "research_output_format": self.research_settings['output_format'],
@@ -640,7 +679,13 @@ class MainWindow:
             "research_saturation": self.research_settings['saturation'],
             "research_scale_ratio": self.research_settings['scale_ratio'],
             "research_preserve_geospatial": self.research_settings['preserve_geospatial'],
-            "research_geo_format": self.research_settings['geo_format']
+            "research_geo_format": self.research_settings['geo_format'],
+            "research_geo_write_profile": self.geo_write_profile_var.get(),
+            "research_build_overviews": self.build_overviews_var.get(),
+            "research_overview_resampling": self.overview_resampling_var.get(),
+            "research_overview_external": self.overview_external_var.get(),
+            "research_incremental": self.incremental_var.get(),
+            "research_incremental_hash": self.incremental_hash_var.get()
         }
         
         # Cập nhật các cài đặt của mode hiện tại
@@ -689,7 +734,7 @@ class MainWindow:
         
     def browse_input(self):
         """Chọn file ảnh đầu vào"""
-        paths = filedialog.askopenfilenames(title="Chọn ảnh nguồn", filetypes=[("Images", "*.tif *.tiff *.png *.jpg *.jpeg *.bmp")])
+        paths = filedialog.askopenfilenames(title="Chọn ảnh nguồn", filetypes=[("Images", "*.tif *.tiff *.png *.jpg *.jpeg *.bmp *.webp")])
         if paths:
             self.input_files = list(paths)
             self.input_folder = os.path.dirname(paths[0])
@@ -795,6 +840,43 @@ class MainWindow:
             self.logger.log(self._("no_crs_info"))
             self.detected_crs_var.set(self._("no_crs_info"))
             
+    def _overview_options(self):
+        """Tham số tạo overview theo lựa chọn trong tab Hệ tọa độ"""
+        return {
+            'resampling': self.overview_resampling_var.get(),
+            'external': self.overview_external_var.get()
+        }
+        
+    def build_input_overviews(self):
+        """Tạo overview cho các ảnh GeoTIFF đầu vào (bỏ qua ảnh đã có overview hợp lệ)"""
+        files = self.input_files or ([
+            os.path.join(self.input_folder, f) for f in os.listdir(self.input_folder)
+        ] if self.input_folder else [])
+        tif_files = [f for f in files if f.lower().endswith(('.tif', '.tiff'))]
+        if not tif_files:
+            self.logger.log(f"{ICONS['warning']} {self._('no_tiff_found')}")
+            return
+        
+        self._save_config()
+        
+        def run():
+            self.is_processing = True
+            self.status_var.set(self._("processing"))
+            self.progress["maximum"] = len(tif_files)
+            
+            def on_progress(event):
+                if event.status != "started":
+                    self.progress["value"] = event.done
+                    self.master.update_idletasks()
+            
+            self.geo_processor.batch_build_overviews(tif_files, progress=on_progress, **self._overview_options())
+            self.logger.log(f"🎉 {self._('all_completed')}")
+            self.status_var.set(self._("completed"))
+            self.is_processing = False
+        
+        # Sử dụng luồng riêng để không treo giao diện
+        threading.Thread(target=run, daemon=True).start()
+        
     def export_metadata(self, format_type):
         """Xuất metadata từ các ảnh được chọn"""
         if not self.input_files and not self.input_folder:
@@ -805,7 +887,7 @@ class MainWindow:
         files = self.input_files or [
             os.path.join(self.input_folder, f)
             for f in os.listdir(self.input_folder)
-            if f.lower().endswith(('.tif', '.tiff', '.png', '.jpg', '.jpeg', '.bmp'))
+            if f.lower().endswith(('.tif', '.tiff', '.png', '.jpg', '.jpeg', '.bmp', '.webp'))
         ]
         
         if not files:
@@ -854,7 +936,7 @@ class MainWindow:
         files = self.input_files or [
             os.path.join(self.input_folder, f)
             for f in os.listdir(self.input_folder)
-            if f.lower().endswith(('.tif', '.tiff', '.png', '.jpg', '.jpeg', '.bmp'))
+            if f.lower().endswith(('.tif', '.tiff', '.png', '.jpg', '.jpeg', '.bmp', '.webp'))
         ]
         
         # Thiết lập thanh tiến trình
@@ -872,6 +954,7 @@ class MainWindow:
             # Sử dụng cài đặt dành riêng cho chế độ trình chiếu
             img_options = {
                 'output_format': self.output_format_var.get(),
+                'encoder_profile': self.encoder_profile_var.get(),
                 'scale_ratio': self.scale_ratio_var.get(),
                 'remove_black': self.remove_black_bg.get(),
                 'remove_white': self.remove_white_bg.get(),
@@ -919,14 +1002,10 @@ class MainWindow:
                 return
             
             self.logger.log(f"✅ Đã tìm thấy {len(tif_files)} file TIFF để xử lý")
+            self.progress["maximum"] = len(tif_files)
             
             # Xác định hệ tọa độ đích
-            dst_crs = ""
-            for name, code in COMMON_CRS.items():
-                if name == self.target_crs_var.get():
-                    dst_crs = code
-                    break
-            
+            dst_crs = COMMON_CRS.get(self.target_crs_var.get(), "")
             if not dst_crs:
                 self.logger.log(f"⚠️ Không thể xác định hệ tọa độ đích, sử dụng EPSG:4326 mặc định")
                 dst_crs = "EPSG:4326"
@@ -934,146 +1013,38 @@ class MainWindow:
             self.logger.log(f"🎯 Hệ tọa độ đích: {dst_crs}")
             
             # Chọn định dạng đầu ra
-            geo_ext = ".tif"
-            output_driver = "GTiff"
-            
-            if self.geo_format_var.get() != "GeoTIFF (.tif)":
-                if self.geo_format_var.get() == "GeoJPEG2000 (.jp2)":
-                    geo_ext = ".jp2"
-                    output_driver = "JP2OpenJPEG"
-                elif self.geo_format_var.get() == "ERDAS Imagine (.img)":
-                    geo_ext = ".img"
-                    output_driver = "HFA"
-                elif self.geo_format_var.get() == "NetCDF (.nc)":
-                    geo_ext = ".nc"
-                    output_driver = "netCDF"
-                elif self.geo_format_var.get() == "ESRI Grid (.grd)":
-                    geo_ext = ".grd"
-                    output_driver = "AIG"
-                elif self.geo_format_var.get() == "MBTiles (.mbtiles)":
-                    geo_ext = ".mbtiles"
-                    output_driver = "MBTiles"
-                elif self.geo_format_var.get() == "GeoPackage (.gpkg)":
-                    geo_ext = ".gpkg"
-                    output_driver = "GPKG"
-                elif self.geo_format_var.get() == "ESRI Shapefile (.shp)":
-                    geo_ext = ".shp"
-                    output_driver = "ESRI Shapefile"
-                    
+            geo_ext, output_driver = GEO_OUTPUT_FORMATS.get(self.geo_format_var.get(), (".tif", "GTiff"))
+            if output_driver != "GTiff":
                 self.logger.log(f"📄 Định dạng xuất: {self.geo_format_var.get()}")
             
-            # Xử lý từng file
-            for idx, path in enumerate(tif_files, 1):
-                self.progress["value"] = idx
+            # Bước 2: Chuyển đổi song song bằng GeoProcessor (khi bật tùy chọn bỏ qua file
+            # không đổi, manifest trong thư mục đầu ra bỏ qua các file của lần chạy trước)
+            self.logger.log(f"⚙️ Bước 2: Thực hiện chuyển đổi hệ tọa độ")
+            
+            def on_progress(event):
+                name = os.path.basename(event.job.src_path)
+                if event.status == "started":
+                    self.logger.log(f"🔄 Đang chuyển đổi hệ tọa độ: {name}")
+                    return
+                if event.status == "skipped":
+                    self.logger.log(f"⏭️ Bỏ qua (không thay đổi): {name}")
+                elif event.status == "failed":
+                    self.logger.log(f"❌ Lỗi khi xử lý {name}: {event.error or self._('processing_error')}")
+                else:
+                    self.logger.log(f"✅ Đã lưu file tại: {event.job.dst_path}")
+                self.progress["value"] = event.done
                 self.master.update_idletasks()
-                
-                try:
-                    # Tạo đường dẫn đầu ra
-                    base_name = os.path.splitext(os.path.basename(path))[0]
-                    output_path = os.path.join(self.output_folder, f"{base_name}{geo_ext}")
-                    
-                    # Bước 2: Đọc thông tin ảnh gốc
-                    self.logger.log(f"⚙️ Bước 2: Đọc thông tin ảnh gốc - {os.path.basename(path)}")
-                    
-                    try:
-                        with rasterio.open(path) as src:
-                            # Kiểm tra xem ảnh có thông tin hệ tọa độ không
-                            if not src.crs:
-                                self.logger.log(f"⚠️ File {os.path.basename(path)} không có thông tin hệ tọa độ")
-                                self.logger.log(f"❌ Không thể chuyển đổi hệ tọa độ cho file này")
-                                continue
-                                
-                            # Hiển thị thông tin về ảnh gốc
-                            source_crs = src.crs
-                            self.logger.log(f"ℹ️ Hệ tọa độ gốc: {source_crs}")
-                            self.logger.log(f"ℹ️ Kích thước: {src.width}x{src.height} pixels")
-                            self.logger.log(f"ℹ️ Số band: {src.count}")
-                            self.logger.log(f"ℹ️ Độ phân giải: {src.res}")
-                            
-                            # Kiểm tra xem có cần chuyển đổi không
-                            if str(source_crs) == str(dst_crs) and os.path.splitext(path)[1].lower() == geo_ext.lower():
-                                self.logger.log(f"ℹ️ Hệ tọa độ nguồn và đích giống nhau, sao chép file")
-                                import shutil
-                                shutil.copy2(path, output_path)
-                                self.logger.log(f"✅ Đã sao chép ảnh tại: {output_path}")
-                                processed_files.append(output_path)
-                                continue
-                            
-                            # Bước 3: Tính toán thông tin ảnh sau khi chuyển hệ tọa độ
-                            self.logger.log(f"⚙️ Bước 3: Tính toán thông tin ảnh sau khi chuyển hệ tọa độ")
-                            
-                            from rasterio.warp import calculate_default_transform, Resampling
-                            
-                            # Tính toán transformation mới
-                            transform, width, height = calculate_default_transform(
-                                source_crs, dst_crs, src.width, src.height, *src.bounds)
-                            
-                            self.logger.log(f"ℹ️ Kích thước mới: {width}x{height} pixels")
-                            
-                            # Chuẩn bị metadata cho ảnh đầu ra
-                            out_kwargs = src.meta.copy()
-                            out_kwargs.update({
-                                'crs': dst_crs,
-                                'transform': transform,
-                                'width': width,
-                                'height': height,
-                                'driver': output_driver
-                            })
-                            
-                            # Bước 4: Thực hiện chuyển đổi hệ tọa độ
-                            self.logger.log(f"⚙️ Bước 4: Thực hiện chuyển đổi hệ tọa độ")
-                            
-                            from rasterio.warp import reproject
-                            
-                            # Đảm bảo thư mục đầu ra tồn tại
-                            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-                            
-                            # Thực hiện reprojection
-                            with rasterio.open(output_path, 'w', **out_kwargs) as dst:
-                                for i in range(1, src.count + 1):
-                                    self.logger.log(f"🔄 Đang xử lý band {i}/{src.count}")
-                                    
-                                    # Đọc dữ liệu từ band gốc
-                                    source = src.read(i)
-                                    
-                                    # Chuẩn bị mảng đích
-                                    destination = np.zeros((height, width), dtype=source.dtype)
-                                    
-                                    # Thực hiện reprojection
-                                    reproject(
-                                        source,
-                                        destination,
-                                        src_transform=src.transform,
-                                        src_crs=source_crs,
-                                        dst_transform=transform,
-                                        dst_crs=dst_crs,
-                                        resampling=Resampling.nearest
-                                    )
-                                    
-                                    # Ghi dữ liệu vào band trong file đầu ra
-                                    dst.write(destination, i)
-                            
-                            # Bước 5: Ghi ảnh TIFF mới
-                            self.logger.log(f"⚙️ Bước 5: Hoàn tất ghi ảnh {geo_ext} mới")
-                            self.logger.log(f"✅ Đã lưu file tại: {output_path}")
-                            processed_files.append(output_path)
-                
-                            # Bước 6: Thông báo kết quả
-                            self.logger.log(f"⚙️ Bước 6: Kết quả chuyển đổi hệ tọa độ")
-                            self.logger.log(f"✅ Chuyển đổi thành công từ {source_crs} sang {dst_crs}")
-                            self.logger.log(f"ℹ️ Tổng quan: {src.width}x{src.height} → {width}x{height} pixels")
-                    
-                    except rasterio.errors.RasterioIOError as e:
-                        self.logger.log(f"❌ Lỗi khi mở file {os.path.basename(path)}: {str(e)}")
-                    except Exception as e:
-                        self.logger.log(f"❌ Lỗi khi xử lý {os.path.basename(path)}: {str(e)}")
-                    
-                    # Cập nhật tiến trình
-                    pct = (idx / len(tif_files)) * 100
-                    self.logger.log(f"✅ [{idx}/{len(tif_files)}] {self._('completed')} ({pct:.2f}%)")
-                
-                except Exception as e:
-                    self.logger.log(f"❌ Lỗi không xác định khi xử lý {os.path.basename(path)}: {str(e)}")
+                pct = (event.done / event.total) * 100
+                self.logger.log(f"✅ [{event.done}/{event.total}] {self._('completed')} ({pct:.2f}%)")
+            
+            processed_files = self.geo_processor.batch_reproject(
+                tif_files, self.output_folder, dst_crs,
+                output_ext=geo_ext, driver=output_driver, progress=on_progress,
+                write_profile=self.geo_write_profile_var.get(),
+                overviews=self._overview_options() if self.build_overviews_var.get() else None,
+                incremental=self.incremental_var.get(),
+                use_hash=self.incremental_hash_var.get()
+            )
             
             # Thông báo hoàn tất
             if processed_files:
@@ -1192,6 +1163,7 @@ class MainWindow:
         self.presentation_settings['contrast'] = get_config("presentation_contrast", "1.0")
         self.presentation_settings['saturation'] = get_config("presentation_saturation", "1.0")
         self.presentation_settings['scale_ratio'] = get_config("presentation_scale_ratio", "1.0")
+        self.encoder_profile_var.set(get_config("presentation_encoder_profile", DEFAULT_ENCODER_PROFILE))
         
         # Cài đặt cho chế độ research
         self.research_settings['output_format'] = get_config("research_output_format", ".tif")
@@ -1203,6 +1175,12 @@ class MainWindow:
         self.research_settings['scale_ratio'] = get_config("research_scale_ratio", "1.0")
         self.research_settings['preserve_geospatial'] = get_config("research_preserve_geospatial", True)
         self.research_settings['geo_format'] = get_config("research_geo_format", "GeoTIFF (.tif)")
+        self.geo_write_profile_var.set(get_config("research_geo_write_profile", DEFAULT_GEO_WRITE_PROFILE))
+        self.build_overviews_var.set(get_config("research_build_overviews", False))
+        self.overview_resampling_var.set(get_config("research_overview_resampling", DEFAULT_OVERVIEW_RESAMPLING))
+        self.overview_external_var.set(get_config("research_overview_external", False))
+        self.incremental_var.set(get_config("research_incremental", False))
+        self.incremental_hash_var.set(get_config("research_incremental_hash", False))
 
 # Tạo lớp ResearchBasicTab kế thừa từ BasicTab nhưng không hiển thị định dạng xuất
 class ResearchBasicTab(BasicTab):
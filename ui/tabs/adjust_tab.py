@@ -3,10 +3,16 @@ Tab điều chỉnh ảnh cho ứng dụng TifTiff
 """
 
 import os
+import threading
 import ttkbootstrap as ttk
 from tkinterdnd2 import DND_FILES
+from PIL import ImageTk
 
-from resources.constants import ICONS
+from resources.constants import ICONS, PREVIEW_SIZE, PREVIEW_DEBOUNCE_MS
+from processing.preview import PreviewEngine
+
+# Định dạng ảnh có thể xem trước
+PREVIEW_EXTENSIONS = ('.tif', '.tiff', '.png', '.jpg', '.jpeg', '.bmp', '.webp')
 
 class AdjustTab:
     """Tab điều chỉnh ảnh"""
@@ -15,7 +21,27 @@ class AdjustTab:
         """Khởi tạo tab điều chỉnh ảnh"""
         self.parent = parent
         self.app = app
+        
+        # Proxy được giới hạn ở độ phân giải màn hình; bộ xem trước (cần ImageProcessor)
+        # chỉ được tạo khi xem trước lần đầu để không làm chậm lúc khởi động
+        self._screen = (parent.winfo_screenwidth(), parent.winfo_screenheight())
+        self._preview_engine = None
+        self._preview_engine_lock = threading.Lock()
+        self.preview_paths = []
+        self._preview_job = None
+        self._preview_photo = None
+        self._loading_path = None
+        self._loaded = None
+        
         self.build()
+        self._bind_preview()
+        
+    @property
+    def preview_engine(self):
+        with self._preview_engine_lock:
+            if self._preview_engine is None:
+                self._preview_engine = PreviewEngine(self.app.image_processor, self._screen)
+            return self._preview_engine
         
     def update_language(self):
         """Cập nhật ngôn ngữ cho tất cả các thành phần"""
@@ -39,6 +65,9 @@ class AdjustTab:
         
         if hasattr(self, 'scale_labelframe'):
             self.scale_labelframe.config(text=f"📏 {self.app._('scale_ratio')}")
+            
+        if hasattr(self, 'preview_frame'):
+            self.preview_frame.config(text=f"👁️ {self.app._('preview')}")
         
     def build(self):
         """Xây dựng giao diện tab"""
@@ -194,6 +223,124 @@ class AdjustTab:
             width=15
         ).pack(side="right")
         
+        # Khung xem trước
+        self.preview_frame = ttk.LabelFrame(self.parent, text=f"👁️ {self.app._('preview')}", padding=10)
+        self.preview_frame.pack(fill="both", expand=True, pady=(0, 10))
+        
+        self.preview_combobox = ttk.Combobox(self.preview_frame, state="readonly", bootstyle="primary")
+        self.preview_combobox.pack(fill="x", pady=(0, 5))
+        self.preview_combobox.bind("<<ComboboxSelected>>", lambda e: self._schedule_preview())
+        
+        self.preview_label = ttk.Label(self.preview_frame, anchor="center")
+        self.preview_label.pack(fill="both", expand=True)
+        
+        self.preview_info = ttk.Label(self.preview_frame, text=self.app._("preview_no_image"), font=self.app.small_font)
+        self.preview_info.pack(fill="x", pady=(5, 0))
+        
+    def _bind_preview(self):
+        """Cập nhật ảnh xem trước khi các tùy chọn hoặc danh sách ảnh đầu vào thay đổi"""
+        for var in (self.app.brightness_var, self.app.contrast_var, self.app.saturation_var,
+                    self.app.remove_black_bg, self.app.remove_white_bg, self.app.scale_ratio_var):
+            var.trace_add("write", lambda *args: self._schedule_preview())
+        self.app.input_path_var.trace_add("write", lambda *args: self._refresh_preview_files())
+        
+    def _refresh_preview_files(self):
+        """Cập nhật danh sách ảnh có thể xem trước từ các file/thư mục đầu vào"""
+        paths = list(self.app.input_files)
+        if not paths and self.app.input_folder and os.path.isdir(self.app.input_folder):
+            paths = [
+                os.path.join(self.app.input_folder, f)
+                for f in sorted(os.listdir(self.app.input_folder))
+                if f.lower().endswith(PREVIEW_EXTENSIONS)
+            ]
+        self.preview_paths = [p for p in paths if p.lower().endswith(PREVIEW_EXTENSIONS)]
+        self.preview_combobox.config(values=[os.path.basename(p) for p in self.preview_paths])
+        if self.preview_paths:
+            self.preview_combobox.current(0)
+        else:
+            self.preview_combobox.set("")
+        self._schedule_preview()
+        
+    def _schedule_preview(self):
+        """Gom các lần kéo thanh trượt liên tiếp: chỉ vẽ lại sau PREVIEW_DEBOUNCE_MS"""
+        if self._preview_job is not None:
+            self.parent.after_cancel(self._preview_job)
+        self._preview_job = self.parent.after(PREVIEW_DEBOUNCE_MS, self._render_preview)
+        
+    def _selected_preview_path(self):
+        index = self.preview_combobox.current()
+        if 0 <= index < len(self.preview_paths):
+            return self.preview_paths[index]
+        return None
+        
+    def _render_preview(self):
+        """Vẽ lại ảnh xem trước; proxy chưa có thì giải mã ở luồng nền"""
+        self._preview_job = None
+        path = self._selected_preview_path()
+        if not path:
+            self.preview_label.config(image="")
+            self.preview_info.config(text=self.app._("preview_no_image"))
+            return
+            
+        if self._loaded != path:
+            self._load_proxy(path)
+            return
+            
+        try:
+            img = self.preview_engine.render(
+                path,
+                self._float(self.app.brightness_var), self._float(self.app.contrast_var),
+                self._float(self.app.saturation_var),
+                self.app.remove_black_bg.get(), self.app.remove_white_bg.get(),
+                size=PREVIEW_SIZE
+            )
+            width, height = self.preview_engine.output_size(path, self._float(self.app.scale_ratio_var))
+        except Exception as e:
+            self.preview_info.config(text=f"{ICONS['error']} {e}")
+            return
+            
+        self._preview_photo = ImageTk.PhotoImage(img)
+        self.preview_label.config(image=self._preview_photo)
+        self.preview_info.config(
+            text=f"{self.app._('preview_output_size')}: {width}x{height} · {self.preview_engine.last_render_ms:.0f} ms"
+        )
+        
+    def _load_proxy(self, path):
+        """Giải mã proxy ở luồng nền (ảnh gốc có thể rất lớn) rồi vẽ lại"""
+        if self._loading_path == path:
+            return
+        self._loading_path = path
+        self.preview_info.config(text=self.app._("preview_loading"))
+        result = {}
+        
+        def load():
+            try:
+                self.preview_engine.proxy(path)
+            except Exception as e:
+                result["error"] = e
+            result["done"] = True
+            
+        def poll():
+            if not result.get("done"):
+                self.parent.after(50, poll)
+                return
+            self._loading_path = None
+            if "error" in result:
+                self.preview_info.config(text=f"{ICONS['error']} {result['error']}")
+                return
+            self._loaded = path
+            self._schedule_preview()
+            
+        threading.Thread(target=load, daemon=True).start()
+        poll()
+        
+    @staticmethod
+    def _float(var, default=1.0):
+        try:
+            return float(var.get())
+        except (ValueError, TypeError):
+            return default
+        
     def _reset_adjustments(self):
         """Đặt lại các giá trị điều chỉnh về mặc định"""
         self.app.brightness_var.set("1.0")
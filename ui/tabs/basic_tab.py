@@ -8,7 +8,7 @@ import os
 import ttkbootstrap as ttk
 from tkinterdnd2 import DND_FILES
 
-from resources.constants import ICONS
+from resources.constants import ICONS, ENCODER_PROFILES
 
 class BasicTab:
     """Tab cơ bản với tùy chọn nhập/xuất"""
@@ -42,6 +42,9 @@ class BasicTab:
             
         if hasattr(self, 'export_format_label'):
             self.export_format_label.config(text=self.app._("export_format"))
+            
+        if hasattr(self, 'encoder_profile_label'):
+            self.encoder_profile_label.config(text=f"{self.app._('encoder_profile')}:")
         
     def build(self):
         """Xây dựng giao diện tab"""
@@ -155,7 +158,7 @@ class BasicTab:
         )
         format_label.pack(side="left", padx=(0, 10))
         
-        formats = [".png", ".jpg", ".tif", ".bmp"]
+        formats = [".png", ".jpg", ".webp", ".tif", ".bmp"]
         self.format_combobox = ttk.Combobox(
             format_frame, 
             textvariable=self.app.output_format_var, 
@@ -167,6 +170,24 @@ class BasicTab:
         self.format_combobox.pack(side="left")
         self.format_combobox.bind("<<ComboboxSelected>>", self._format_changed)
         
+        # Chế độ nén: nhanh, cân bằng hoặc file nhỏ
+        self.encoder_profile_label = ttk.Label(
+            format_frame, 
+            text=f"{self.app._('encoder_profile')}:",
+            font=self.app.normal_font
+        )
+        self.encoder_profile_label.pack(side="left", padx=(20, 10))
+        
+        self.encoder_profile_combobox = ttk.Combobox(
+            format_frame, 
+            textvariable=self.app.encoder_profile_var, 
+            values=list(ENCODER_PROFILES),
+            state="readonly",
+            width=10,
+            bootstyle="primary"
+        )
+        self.encoder_profile_combobox.pack(side="left")
+        
     def _format_changed(self, *args):
         """Xử lý khi người dùng thay đổi định dạng ảnh"""
         # Gọi xử lý trong app nếu cần
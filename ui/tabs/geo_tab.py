@@ -4,7 +4,7 @@ import os
 import ttkbootstrap as ttk
 from tkinterdnd2 import DND_FILES
 
-from resources.constants import ICONS, COMMON_CRS
+from resources.constants import ICONS, COMMON_CRS, GEO_WRITE_PROFILES, OVERVIEW_RESAMPLING
 
 class GeoTab:
     """Tab chuyển đổi hệ tọa độ"""
@@ -35,6 +35,19 @@ class GeoTab:
         if hasattr(self, 'geo_format_label'):
             self.geo_format_label.config(text=self.app._('geo_format'))
             
+        if hasattr(self, 'geo_write_profile_label'):
+            self.geo_write_profile_label.config(text=self.app._('geo_write_profile'))
+            
+        if hasattr(self, 'build_overviews_check'):
+            self.build_overviews_check.config(text=self.app._('build_overviews'))
+            self.overview_resampling_label.config(text=self.app._('overview_resampling'))
+            self.overview_external_check.config(text=self.app._('overview_external'))
+            self.build_overviews_btn.config(text=self.app._('build_overviews_inputs'))
+            
+        if hasattr(self, 'incremental_check'):
+            self.incremental_check.config(text=self.app._('incremental_batch'))
+            self.incremental_hash_check.config(text=self.app._('incremental_hash'))
+            
         if hasattr(self, 'geo_guide_label'):
             self.geo_guide_label.config(text=f"{ICONS['geo_guide']} {self.app._('geo_guide')}")
     
@@ -134,6 +147,81 @@ class GeoTab:
         # Lưu trữ tham chiếu trong app
         self.app.geo_format_menu = self.geo_format_menu
         
+        # Chế độ ghi GeoTIFF: giữ bố cục nguồn hoặc Cloud-Optimized GeoTIFF (tile, nén, overview)
+        profile_frame = ttk.Frame(self.export_frame)
+        profile_frame.pack(fill="x", pady=(8, 0))
+        
+        self.geo_write_profile_label = ttk.Label(profile_frame, text=self.app._('geo_write_profile'))
+        self.geo_write_profile_label.pack(side="left")
+        
+        self.geo_write_profile_combobox = ttk.Combobox(
+            profile_frame,
+            textvariable=self.app.geo_write_profile_var,
+            values=list(GEO_WRITE_PROFILES),
+            state="readonly",
+            width=12,
+            bootstyle="primary"
+        )
+        self.geo_write_profile_combobox.pack(side="left", padx=(5, 0), fill="x", expand=True)
+        
+        # Overview: tạo sau khi chuyển đổi hoặc cho ảnh đầu vào có sẵn
+        self.build_overviews_check = ttk.Checkbutton(
+            self.export_frame,
+            text=self.app._('build_overviews'),
+            variable=self.app.build_overviews_var,
+            bootstyle="success"
+        )
+        self.build_overviews_check.pack(anchor="w", pady=(8, 0))
+        
+        resampling_frame = ttk.Frame(self.export_frame)
+        resampling_frame.pack(fill="x", pady=(5, 0))
+        
+        self.overview_resampling_label = ttk.Label(resampling_frame, text=self.app._('overview_resampling'))
+        self.overview_resampling_label.pack(side="left")
+        
+        self.overview_resampling_combobox = ttk.Combobox(
+            resampling_frame,
+            textvariable=self.app.overview_resampling_var,
+            values=list(OVERVIEW_RESAMPLING),
+            state="readonly",
+            width=10,
+            bootstyle="primary"
+        )
+        self.overview_resampling_combobox.pack(side="left", padx=(5, 0), fill="x", expand=True)
+        
+        self.overview_external_check = ttk.Checkbutton(
+            self.export_frame,
+            text=self.app._('overview_external'),
+            variable=self.app.overview_external_var,
+            bootstyle="success"
+        )
+        self.overview_external_check.pack(anchor="w", pady=(5, 0))
+        
+        self.build_overviews_btn = ttk.Button(
+            self.export_frame,
+            text=self.app._('build_overviews_inputs'),
+            command=self.app.build_input_overviews,
+            bootstyle="info-outline"
+        )
+        self.build_overviews_btn.pack(fill="x", pady=(8, 0))
+        
+        # Bỏ qua các file không thay đổi từ lần chạy trước (manifest trong thư mục đầu ra)
+        self.incremental_check = ttk.Checkbutton(
+            self.export_frame,
+            text=self.app._('incremental_batch'),
+            variable=self.app.incremental_var,
+            bootstyle="success"
+        )
+        self.incremental_check.pack(anchor="w", pady=(8, 0))
+        
+        self.incremental_hash_check = ttk.Checkbutton(
+            self.export_frame,
+            text=self.app._('incremental_hash'),
+            variable=self.app.incremental_hash_var,
+            bootstyle="success"
+        )
+        self.incremental_hash_check.pack(anchor="w", pady=(5, 0))
+        
         # Thêm hướng dẫn
         info_frame = ttk.Frame(top_frame)
         info_frame.pack(fill="x", pady=(15, 0))
@@ -171,6 +259,7 @@ class GeoTab:
 
 Lưu ý:
 - GeoTIFF (.tif) là định dạng được hỗ trợ tốt nhất và ổn định nhất cho hầu hết các ứng dụng
+- Chế độ ghi cog_deflate/cog_zstd/cog_lzw tạo Cloud-Optimized GeoTIFF (tile, nén, overview) mở nhanh trong QGIS; "source" giữ bố cục của file nguồn
         """
         
         format_info_text.insert("1.0", format_info)
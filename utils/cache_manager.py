@@ -352,7 +352,28 @@ class CacheManager:
             return f"{size_bytes/(1024*1024*1024):.1f} GB"
 
 # Tạo instance toàn cục
-cache_manager = CacheManager()
+_cache_manager = None
+_cache_manager_lock = threading.Lock()
+
+def get_cache_manager():
+    """
+    CacheManager dùng chung, khởi tạo ở lần dùng đầu tiên
+
+    Khởi tạo tạo thư mục cache, đọc metadata và có thể chạy luồng dọn dẹp nên không
+    làm lúc import (khi khởi động ứng dụng).
+    """
+    global _cache_manager
+    if _cache_manager is None:
+        with _cache_manager_lock:
+            if _cache_manager is None:
+                _cache_manager = CacheManager()
+    return _cache_manager
+
+def __getattr__(name):
+    # Giữ tương thích với "from utils.cache_manager import cache_manager"
+    if name == "cache_manager":
+        return get_cache_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Hàm wrapper tiện lợi
 @lru_cache(maxsize=128)
@@ -371,7 +392,7 @@ def cached_function(func):
         cache_key = (func.__name__, args, frozenset(kwargs.items()))
         
         # Kiểm tra cache
-        result = cache_manager.get_cache(cache_key, category='function')
+        result = get_cache_manager().get_cache(cache_key, category='function')
         if result is not None:
             return result
         
@@ -379,7 +400,7 @@ def cached_function(func):
         result = func(*args, **kwargs)
         
         # Lưu vào cache
-        cache_manager.set_cache(cache_key, result, category='function')
+        get_cache_manager().set_cache(cache_key, result, category='function')
         
         return result
         
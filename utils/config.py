@@ -5,7 +5,6 @@ Xử lý lưu và đọc cấu hình cho ứng dụng TifTiff
 import os
 import json
 import threading
-from .cache_manager import cache_manager
 
 class Config:
     """Quản lý cấu hình ứng dụng"""
@@ -38,7 +37,10 @@ class Config:
             "geo_format": "GTiff",
             "brightness": 1.0,
             "contrast": 1.0,
-            "saturation": 1.0
+            "saturation": 1.0,
+            "presentation_encoder_profile": "default",
+            "research_incremental": False,
+            "research_incremental_hash": False
         }
         
         # Tải cấu hình
@@ -109,9 +111,6 @@ class Config:
         with self.lock:
             self.config[key] = value
             
-            # Cache giá trị mới
-            cache_manager.set_cache(f"config_{key}", value, category="config")
-            
             if save:
                 return self.save_config()
             return True
@@ -140,10 +139,6 @@ class Config:
         with self.lock:
             self.config.update(new_config)
             
-            # Cache các giá trị mới
-            for key, value in new_config.items():
-                cache_manager.set_cache(f"config_{key}", value, category="config")
-            
             if save:
                 return self.save_config()
             return True
@@ -161,9 +156,6 @@ class Config:
         with self.lock:
             self.config = self.default_config.copy()
             
-            # Xóa cache
-            cache_manager.clear_cache(category="config")
-            
             if save:
                 return self.save_config()
             return True
@@ -173,19 +165,13 @@ config_manager = Config()
 
 # Hàm wrapper tiện lợi
 def get_config(key, default=None):
-    """Lấy giá trị cấu hình từ instance toàn cục"""
-    # Thử lấy từ cache trước
-    cached_value = cache_manager.get_cache(f"config_{key}", category="config")
-    if cached_value is not None:
-        return cached_value
-    
-    # Nếu không có trong cache, lấy từ config
-    value = config_manager.get(key, default)
-    
-    # Lưu vào cache
-    cache_manager.set_cache(f"config_{key}", value, category="config")
+    """
+    Lấy giá trị cấu hình từ instance toàn cục
     
-    return value
+    Cấu hình đã nằm trong bộ nhớ nên đọc trực tiếp, không qua CacheManager (mỗi lần
+    đọc cache ghi lại metadata ra đĩa, và khởi tạo cache làm chậm lúc khởi động).
+    """
+    return config_manager.get(key, default)
 
 def set_config(key, value, save=True):
     """Đặt giá trị cấu hình vào instance toàn cục"""
@@ -0,0 +1,62 @@
+"""
+Đo thời gian khởi động ứng dụng theo từng bước và so với ngân sách
+"""
+
+import sys
+import time
+
+from resources.constants import STARTUP_BUDGET_S, STARTUP_DEFERRED_MODULES
+
+
+class StartupTimer:
+    """
+    Ghi mốc thời gian các bước khởi động (import, tạo cửa sổ Tk, giao diện, khung hình đầu)
+
+    Mốc bắt đầu nên được lấy ở dòng đầu tiên của app.py (trước các import nặng) và
+    truyền vào qua tham số start.
+    """
+
+    def __init__(self, start=None, budget_s=STARTUP_BUDGET_S):
+        self.start = time.perf_counter() if start is None else start
+        self.budget_s = budget_s
+        self.marks = []
+
+    def mark(self, name):
+        """Ghi mốc kết thúc một bước (thời gian tính từ mốc bắt đầu)"""
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    @property
+    def elapsed(self):
+        """Thời gian đến mốc cuối cùng (giây)"""
+        return self.marks[-1][1] if self.marks else 0.0
+
+    def within_budget(self):
+        return self.elapsed <= self.budget_s
+
+    def deferred_loaded(self):
+        """Các module lẽ ra được import muộn nhưng đã nằm trong sys.modules"""
+        return [name for name in STARTUP_DEFERRED_MODULES if name in sys.modules]
+
+    def report(self):
+        """
+        Báo cáo khởi động (có thể ghi JSON)
+
+        Trả về:
+            dict: Thời gian từng bước, tổng thời gian, ngân sách và kết quả kiểm tra
+        """
+        steps, previous = {}, 0.0
+        for name, at in self.marks:
+            steps[name] = round(at - previous, 4)
+            previous = at
+        return {
+            "elapsed_s": round(self.elapsed, 4),
+            "budget_s": self.budget_s,
+            "within_budget": self.within_budget(),
+            "steps": steps,
+            "deferred_loaded": self.deferred_loaded(),
+        }
+
+    def summary(self):
+        """Một dòng tóm tắt cho log"""
+        steps = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self.report()["steps"].items())
+        return f"{self.elapsed:.2f}s / {self.budget_s:.2f}s ({steps})"